@@ -1,10 +1,12 @@
-from fractions import Fraction
-from flask import Flask, request, jsonify, abort, send_file, Response
+from decimal import Decimal, Context, ROUND_HALF_EVEN, ROUND_HALF_UP, localcontext
+from flask import Flask, request, jsonify, abort, send_file, Response, stream_with_context
 from flask_cors import CORS
 import uuid
 from datetime import datetime, timezone, timedelta
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func
 import os
+import time
 from scipy.optimize import brentq
 import numpy as np
 import math
@@ -12,9 +14,93 @@ import numpy_financial as npf
 import json
 import sqlite3
 from land_registry_db import get_comparable_sales
+from dcf_cache import LRUCache, canonical_key
+from irr_solver import IRR_NO_ROOT, irr_batch, npv_and_derivatives, pad_series
+from jobs import JobWorkers
+from goal_seek import goal_seek, parse_goal_seek
+from json_provider import ORJSONProvider
+from monte_carlo import (
+    MONTE_CARLO_MAX_WORKERS,
+    RESULT_DTYPES,
+    SAMPLING_METHODS,
+    STOCHASTIC_FIELDS,
+    chart_payload,
+    default_workers,
+    in_start_order,
+    is_path,
+    monte_carlo_memory_plan,
+    parse_chart_options,
+    parse_correlation,
+    run_monte_carlo,
+    run_portfolio_monte_carlo,
+    validate_distribution,
+)
+from sensitivity import parse_sensitivity_request, sensitivity_grid, tornado
+from streaming_stats import VAR_LEVEL, MonteCarloAccumulator, RunningCovariance, diversification_statistics
+from payload_formats import (
+    BINARY_MIMETYPE,
+    compress_float64,
+    decompress_float64,
+    encode_binary,
+    encode_float64_base64,
+    parse_response_format,
+    rows_to_columns,
+)
+from fast_dcf import (
+    MAX_HOLDING_PERIOD,
+    normalize_inputs,
+    pack_inputs,
+    calculate_cash_flows_fast,
+    calculate_cash_flows_batch,
+    calculate_npv_summary,
+    calculate_monthly_cash_flows,
+    what_if_state,
+    apply_what_if,
+    what_if_columns,
+    what_if_nbytes,
+    columns_to_rows,
+    batch_rows,
+)
 
 db = SQLAlchemy()
 PORT = int(os.environ.get("BACKEND_PORT", 5050))
+MAX_MONTE_CARLO_SIMULATIONS = 1_000_000
+# Larger runs return only streamed statistics unless include_samples is set
+MONTE_CARLO_SAMPLES_DEFAULT_MAX = 100_000
+# Request keys that configure a Monte Carlo run rather than the DCF inputs
+MONTE_CARLO_OPTION_KEYS = (
+    "annual_rent_growth", "discount_rate", "interest_rate", "num_simulations", "seed",
+    "include_samples", "histogram", "valuation_id", "sampling", "target_precision", "correlation", "dtype",
+)
+# Chunk size while checking a target precision, so runs stop close to it
+MONTE_CARLO_ADAPTIVE_CHUNK = 1000
+# Portfolio runs: shared shifts around each property's own inputs, plus property noise
+PORTFOLIO_MACRO_DEFAULTS = {
+    "annual_rent_growth": {"distribution": "normal", "mean": 0, "stddev": 1},
+    "discount_rate": {"distribution": "normal", "mean": 0, "stddev": 2},
+    "interest_rate": {"distribution": "normal", "mean": 0, "stddev": 1},
+}
+PORTFOLIO_IDIOSYNCRATIC_DEFAULTS = {"annual_rent_growth": 1}
+# Paths x properties priced per portfolio request
+MAX_PORTFOLIO_PROPERTY_PATHS = 10_000_000
+# A running job whose heartbeat is older than this is requeued (its worker died)
+MONTE_CARLO_JOB_STALE_SECONDS = 120
+# How often the reattachable job SSE stream polls the job row
+MONTE_CARLO_JOB_POLL_SECONDS = 0.5
+# Monte Carlo SSE streams send progress at most this often (config MONTE_CARLO_PROGRESS_SECONDS)
+MONTE_CARLO_PROGRESS_SECONDS = 0.25
+# ...and a comment line after this long without output (config SSE_HEARTBEAT_SECONDS), so
+# proxies keep long runs open and a closed connection is noticed on the next write
+SSE_HEARTBEAT_SECONDS = 10
+SSE_HEARTBEAT = ": heartbeat\n\n"
+MAX_DCF_BATCH_SIZE = 50000
+CASHFLOW_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CASH_FLOW_ROW_BYTES = 1024  # rough in-memory size of one cash-flow row dict
+# Bump whenever the exact engine's output changes: materialized rows written by
+# another version are ignored (computed instead) until `run.py backfill` rewrites them
+CASH_FLOW_ENGINE_VERSION = 2
+# Seeded Monte Carlo results (two float64 arrays per run, 16 MB at 1M simulations)
+MONTE_CARLO_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 # --- Utility Functions ---
 def validate_fields(data, required_fields, optional_fields=None):
@@ -63,6 +149,12 @@ def validate_fields(data, required_fields, optional_fields=None):
             cleaned[field] = value
     return True, cleaned
 
+def validate_holding_period(cleaned):
+    """Bound the holding period of validated valuation fields. Returns (True, cleaned) or (False, error_message)."""
+    if not cleaned["holding_period"] <= MAX_HOLDING_PERIOD:
+        return False, f"Holding period must be <= {MAX_HOLDING_PERIOD}."
+    return True, cleaned
+
 def populate_model_from_data(model, data, fields):
     """Set attributes on a model from a data dictionary for the given fields."""
     for field in fields:
@@ -156,6 +248,70 @@ class Valuation(db.Model):
             "selling_costs": self.selling_costs,
         }
 
+class ValuationCashFlow(db.Model):
+    """Materialized cash-flow row (one per valuation-year), written with the valuation."""
+    __tablename__ = "valuation_cashflow"
+    valuation_id = db.Column(db.String, db.ForeignKey("valuation.id"), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    gross_rent = db.Column(db.Float)
+    vacancy_loss = db.Column(db.Float)
+    effective_rent = db.Column(db.Float)
+    operating_expenses = db.Column(db.Float)
+    noi = db.Column(db.Float)
+    capex = db.Column(db.Float)
+    net_cash_flow = db.Column(db.Float)
+    discount_factor = db.Column(db.Float)
+    present_value = db.Column(db.Float)
+    cumulative_pv = db.Column(db.Float)
+    engine_version = db.Column(db.Integer)  # CASH_FLOW_ENGINE_VERSION that wrote the row
+
+    def to_dict(self):
+        return {
+            "year": self.year,
+            "gross_rent": self.gross_rent,
+            "vacancy_loss": self.vacancy_loss,
+            "effective_rent": self.effective_rent,
+            "operating_expenses": self.operating_expenses,
+            "noi": self.noi,
+            "capex": self.capex,
+            "net_cash_flow": self.net_cash_flow,
+            "discount_factor": self.discount_factor,
+            "present_value": self.present_value,
+            "cumulative_pv": self.cumulative_pv,
+        }
+
+class MonteCarloJob(db.Model):
+    """Queued Monte Carlo run; results are stored as compressed float64 arrays."""
+    __tablename__ = "monte_carlo_job"
+    id = db.Column(db.String, primary_key=True)
+    status = db.Column(db.String, nullable=False, default="queued")  # queued, running, done, failed
+    request = db.Column(db.Text, nullable=False)  # JSON: base_input, distributions, num_simulations, seed
+    num_simulations = db.Column(db.Integer, nullable=False)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.String, nullable=False)
+    updated_at = db.Column(db.String)  # worker heartbeat while running
+    finished_at = db.Column(db.String)
+    error = db.Column(db.Text)
+    summary = db.Column(db.Text)  # JSON
+    npvs = db.Column(db.LargeBinary)
+    irrs = db.Column(db.LargeBinary)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "num_simulations": self.num_simulations,
+            "completed": self.completed,
+            # Runs with a target precision may finish before num_simulations
+            "progress": 100 if self.status == "done" else (
+                int(100 * self.completed / self.num_simulations) if self.num_simulations else 0
+            ),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "summary": json.loads(self.summary) if self.summary else None,
+        }
+
 class LibraryItem(db.Model):
     id = db.Column(db.String, primary_key=True)
     title = db.Column(db.String, nullable=False)
@@ -170,6 +326,30 @@ class LibraryItem(db.Model):
         }
 
 # --- Utility Functions ---
+DCF_CONTEXT = Context(prec=28, rounding=ROUND_HALF_EVEN)
+PENCE = Decimal("0.01")
+DISCOUNT_FACTOR_PLACES = Decimal("0.000001")
+
+def to_pence(amount):
+    """Round a Decimal amount half-up to pence and return it as a float."""
+    return float(amount.quantize(PENCE, rounding=ROUND_HALF_UP))
+
+def materialize_cash_flows(valuation):
+    """Replace a valuation's valuation_cashflow rows in the current session (caller commits).
+
+    Inputs the exact engine cannot evaluate (e.g. a loan over a zero holding
+    period) are saved without rows, so reads fall back to the computed path.
+    Returns whether rows were written.
+    """
+    ValuationCashFlow.query.filter_by(valuation_id=valuation.id).delete()
+    try:
+        rows = calculate_cash_flows(valuation.to_dict())
+    except (ArithmeticError, TypeError, ValueError):
+        return False
+    for row in rows:
+        db.session.add(ValuationCashFlow(valuation_id=valuation.id, engine_version=CASH_FLOW_ENGINE_VERSION, **row))
+    return True
+
 def safe_number(val):
     if val in (None, '', 'None'):
         return 0
@@ -178,7 +358,7 @@ def safe_number(val):
 def calculate_mortgage_payment(initial_investment, ltv, interest_rate, holding_period):
     """Calculate monthly mortgage payment."""
     if ltv <= 0 or interest_rate <= 0:
-        return Fraction(0)
+        return Decimal(0)
     
     mortgage_amount = initial_investment * (ltv / 100)
     monthly_rate = interest_rate / 100 / 12
@@ -222,8 +402,51 @@ def calculate_year_cash_flow(
         "net_cash_flow": net_cash_flow
     }
 
-def calculate_cash_flows(input):
-    """Calculate cash flows for property investment analysis (Argus-style columns)."""
+DCF_ENGINES = ("exact", "fast")
+DCF_GRANULARITIES = ("annual", "monthly")
+
+def parse_dcf_engine(value):
+    """Validate a DCF engine name. Returns (True, engine) or (False, error_message)."""
+    engine = value or "exact"
+    if engine not in DCF_ENGINES:
+        return False, f"Engine must be one of: {', '.join(DCF_ENGINES)}."
+    return True, engine
+
+def parse_dcf_granularity(value):
+    """Validate a cash-flow granularity. Returns (True, granularity) or (False, error_message)."""
+    granularity = value or "annual"
+    if granularity not in DCF_GRANULARITIES:
+        return False, f"Granularity must be one of: {', '.join(DCF_GRANULARITIES)}."
+    return True, granularity
+
+def parse_holding_period_months(value):
+    """Validate the optional monthly exit horizon. Returns (True, months or None) or (False, error_message)."""
+    if value in (None, '', 'None'):
+        return True, None
+    try:
+        months = float(value)
+    except (TypeError, ValueError, OverflowError):
+        months = None
+    if isinstance(value, bool) or months is None or not 0 <= months <= MAX_HOLDING_PERIOD * 12:
+        return False, f"Holding period months must be a number from 0 to {MAX_HOLDING_PERIOD * 12}."
+    return True, int(months)
+
+def calculate_cash_flows(input, engine="exact", granularity="annual"):
+    """Calculate cash flows for property investment analysis (Argus-style columns).
+
+    The default "exact" engine uses Decimal arithmetic in DCF_CONTEXT and is the
+    reference implementation: intermediates keep 28 significant digits and
+    every amount is rounded once, half-up to pence, when its row is emitted
+    (the discount factor to 6 places), matching what DcfTable displays.
+    Present values and the cumulative PV are accumulated unrounded.
+    engine="fast" uses the vectorized float64 kernel in fast_dcf.
+    granularity="monthly" returns 12 periods per year (period 0 is the
+    acquisition) and is always computed with the vectorized kernel.
+    """
+    if granularity == "monthly":
+        return calculate_monthly_cash_flows(input)
+    if engine == "fast":
+        return calculate_cash_flows_fast(input)
     # Provide defaults for all expected fields, using safe_number
     input = {
         "initial_investment": safe_number(input.get("initial_investment", 0)),
@@ -245,98 +468,205 @@ def calculate_cash_flows(input):
         "exit_cap_rate": safe_number(input.get("exit_cap_rate", 0)),
         "selling_costs": safe_number(input.get("selling_costs", 0)),
     }
-    
-    # Convert to Fraction for precision
-    initial_investment = Fraction(str(input["initial_investment"]))
-    annual_rental_income = Fraction(str(input["annual_rental_income"]))
-    vacancy_val = input.get("vacancy_rate")
-    vacancy_rate = Fraction(str(vacancy_val if vacancy_val is not None else 0))
-    service_charge = Fraction(str(input["service_charge"]))
-    ground_rent = Fraction(str(input["ground_rent"]))
-    maintenance = Fraction(str(input["maintenance"]))
-    property_tax = Fraction(str(input["property_tax"]))
-    insurance = Fraction(str(input["insurance"]))
-    management_fees = Fraction(str(input["management_fees"]))
-    transaction_costs = Fraction(str(input["transaction_costs"]))
-    annual_rent_growth = Fraction(str(input["annual_rent_growth"]))
-    discount_rate = Fraction(str(input["discount_rate"]))
-    holding_period = int(input["holding_period"])
-    ltv = Fraction(str(input.get("ltv", 0) or 0))
-    interest_rate = Fraction(str(input.get("interest_rate", 0) or 0))
-    capex_value = Fraction(str(input["capex"]))
-    exit_cap_rate = Fraction(str(input["exit_cap_rate"]))
-    selling_costs = Fraction(str(input["selling_costs"]))
-
-    # Calculate mortgage payment
-    monthly_mortgage_payment = calculate_mortgage_payment(
-        initial_investment, ltv, interest_rate, holding_period
-    )
-    annual_mortgage_payment = monthly_mortgage_payment * 12
-
-    rows = []
-    cumulative_pv = Fraction(0)
-
-    # Year 0 (initial investment)
-    year0_row = {
-        "year": 0,
-        "gross_rent": float(f"{-initial_investment:.2f}"),
-        "vacancy_loss": 0.0,
-        "effective_rent": 0.0,
-        "operating_expenses": float(f"{transaction_costs + property_tax:.2f}"),
-        "noi": float(f"{-initial_investment - (transaction_costs + property_tax):.2f}"),
-        "capex": 0.0,
-        "net_cash_flow": float(f"{-initial_investment - (transaction_costs + property_tax):.2f}"),
-        "discount_factor": 1.0,
-        "present_value": float(f"{-initial_investment - (transaction_costs + property_tax):.2f}"),
-        "cumulative_pv": float(f"{-initial_investment - (transaction_costs + property_tax):.2f}"),
-    }
-    cumulative_pv += year0_row["present_value"]
-    rows.append(year0_row)
-
-    # Years 1 to holding_period
-    for year in range(1, holding_period + 1):
-        gross_rent = annual_rental_income * (1 + annual_rent_growth / 100) ** (year - 1)
-        vacancy_loss = gross_rent * (vacancy_rate / 100)
-        effective_rent = gross_rent - vacancy_loss
-        management_fee = effective_rent * management_fees / 100
-        operating_expenses = (
-            service_charge + ground_rent + maintenance + property_tax + insurance + management_fee + annual_mortgage_payment
-        )
-        noi = effective_rent - (
-            service_charge + ground_rent + maintenance + property_tax + insurance + management_fee
+
+    with localcontext(DCF_CONTEXT):
+        # Inputs are converted from their decimal string form, so no binary noise
+        initial_investment = Decimal(str(input["initial_investment"]))
+        annual_rental_income = Decimal(str(input["annual_rental_income"]))
+        vacancy_rate = Decimal(str(input["vacancy_rate"]))
+        service_charge = Decimal(str(input["service_charge"]))
+        ground_rent = Decimal(str(input["ground_rent"]))
+        maintenance = Decimal(str(input["maintenance"]))
+        property_tax = Decimal(str(input["property_tax"]))
+        insurance = Decimal(str(input["insurance"]))
+        management_fees = Decimal(str(input["management_fees"]))
+        transaction_costs = Decimal(str(input["transaction_costs"]))
+        annual_rent_growth = Decimal(str(input["annual_rent_growth"]))
+        discount_rate = Decimal(str(input["discount_rate"]))
+        holding_period = int(input["holding_period"])
+        ltv = Decimal(str(input["ltv"] or 0))
+        interest_rate = Decimal(str(input["interest_rate"] or 0))
+        capex = Decimal(str(input["capex"]))
+        exit_cap_rate = Decimal(str(input["exit_cap_rate"]))
+        selling_costs = Decimal(str(input["selling_costs"]))
+
+        # Calculate mortgage payment
+        monthly_mortgage_payment = calculate_mortgage_payment(
+            initial_investment, ltv, interest_rate, holding_period
         )
-        capex = capex_value
-        net_cash_flow = noi - capex - annual_mortgage_payment
-        
-        # Add terminal sale in the final year
-        if year == holding_period and exit_cap_rate > 0:
-            # Calculate terminal value based on exit cap rate
-            terminal_noi = noi  # Use the final year's NOI
-            terminal_value = terminal_noi / (exit_cap_rate / 100)
-            selling_costs_amount = terminal_value * (selling_costs / 100)
-            net_terminal_value = terminal_value - selling_costs_amount
-            net_cash_flow += net_terminal_value
-        
-        discount_factor = float(1 / (1 + discount_rate / 100) ** year)
-        present_value = float(net_cash_flow * discount_factor)
-        cumulative_pv += present_value
-        row = {
-            "year": year,
-            "gross_rent": float(gross_rent),
-            "vacancy_loss": float(vacancy_loss),
-            "effective_rent": float(effective_rent),
-            "operating_expenses": float(operating_expenses),
-            "noi": float(noi),
-            "capex": float(capex),
-            "net_cash_flow": float(net_cash_flow),
-            "discount_factor": float(discount_factor),
-            "present_value": float(present_value),
-            "cumulative_pv": float(cumulative_pv),
-        }
-        rows.append(row)
+        annual_mortgage_payment = monthly_mortgage_payment * 12
+
+        # Year 0 (initial investment)
+        acquisition_costs = transaction_costs + property_tax
+        year0_cash_flow = -initial_investment - acquisition_costs
+        rows = [{
+            "year": 0,
+            "gross_rent": to_pence(-initial_investment),
+            "vacancy_loss": 0.0,
+            "effective_rent": 0.0,
+            "operating_expenses": to_pence(acquisition_costs),
+            "noi": to_pence(year0_cash_flow),
+            "capex": 0.0,
+            "net_cash_flow": to_pence(year0_cash_flow),
+            "discount_factor": 1.0,
+            "present_value": to_pence(year0_cash_flow),
+            "cumulative_pv": to_pence(year0_cash_flow),
+        }]
+        cumulative_pv = year0_cash_flow
+
+        # Years 1 to holding_period; growth and discount factors are carried
+        # forward by one multiplication per year instead of re-exponentiating.
+        fixed_costs = service_charge + ground_rent + maintenance + property_tax + insurance
+        growth = 1 + annual_rent_growth / 100
+        discount = 1 + discount_rate / 100
+        growth_factor = Decimal(1)
+        discount_factor = Decimal(1)
+        for year in range(1, holding_period + 1):
+            gross_rent = annual_rental_income * growth_factor
+            vacancy_loss = gross_rent * (vacancy_rate / 100)
+            effective_rent = gross_rent - vacancy_loss
+            management_fee = effective_rent * management_fees / 100
+            operating_expenses = fixed_costs + management_fee + annual_mortgage_payment
+            noi = effective_rent - (fixed_costs + management_fee)
+            net_cash_flow = noi - capex - annual_mortgage_payment
+
+            # Add terminal sale in the final year
+            if year == holding_period and exit_cap_rate > 0:
+                # Calculate terminal value based on the final year's NOI
+                terminal_value = noi / (exit_cap_rate / 100)
+                selling_costs_amount = terminal_value * (selling_costs / 100)
+                net_cash_flow += terminal_value - selling_costs_amount
+
+            discount_factor /= discount
+            present_value = net_cash_flow * discount_factor
+            cumulative_pv += present_value
+            rows.append({
+                "year": year,
+                "gross_rent": to_pence(gross_rent),
+                "vacancy_loss": to_pence(vacancy_loss),
+                "effective_rent": to_pence(effective_rent),
+                "operating_expenses": to_pence(operating_expenses),
+                "noi": to_pence(noi),
+                "capex": to_pence(capex),
+                "net_cash_flow": to_pence(net_cash_flow),
+                "discount_factor": float(discount_factor.quantize(DISCOUNT_FACTOR_PLACES, rounding=ROUND_HALF_UP)),
+                "present_value": to_pence(present_value),
+                "cumulative_pv": to_pence(cumulative_pv),
+            })
+            growth_factor *= growth
 
     return rows
 
+def parse_monte_carlo_options(data):
+    """Options shared by every Monte Carlo request. Returns (True, options) or (False, error_message)."""
+    num_simulations = max(1, min(MAX_MONTE_CARLO_SIMULATIONS, int(data.get("num_simulations", 10000))))
+    # Optional seed makes a run reproducible, whatever the worker count
+    seed = data.get("seed")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return False, "seed must be a non-negative integer"
+    is_valid, charts = parse_chart_options(data.get("histogram"))
+    if not is_valid:
+        return False, charts
+    sampling = data.get("sampling", "random")
+    if sampling not in SAMPLING_METHODS:
+        return False, f"sampling must be one of: {', '.join(SAMPLING_METHODS)}"
+    dtype = data.get("dtype", "float64")
+    if dtype not in RESULT_DTYPES:
+        return False, f"dtype must be one of: {', '.join(RESULT_DTYPES)}"
+    return True, {
+        "num_simulations": num_simulations,
+        "seed": seed,
+        "sampling": sampling,
+        # Precision of path draws and returned samples; pricing is float64
+        "dtype": dtype,
+        # False keeps memory flat: only streaming statistics, no npvs/irrs arrays
+        "include_samples": bool(data.get("include_samples", num_simulations <= MONTE_CARLO_SAMPLES_DEFAULT_MAX)),
+        # Histogram/CDF/scatter sample in place of the raw arrays
+        "charts": charts,
+    }
+
+def parse_monte_carlo_request(data):
+    """Split a Monte Carlo request body. Returns (True, spec) or (False, error_message).
+
+    spec holds base_input, distributions (per sampled field), correlation, num_simulations, seed,
+    sampling and target_precision, plus the response options.
+    """
+    data = data or {}
+    is_valid, options = parse_monte_carlo_options(data)
+    if not is_valid:
+        return False, options
+    # Stop once the NPV mean and 5th/95th percentile CIs are this tight (relative)
+    target_precision = data.get("target_precision")
+    if target_precision is not None and (
+        isinstance(target_precision, bool) or not isinstance(target_precision, (int, float))
+        or not 0 < target_precision < 1
+    ):
+        return False, "target_precision must be a number between 0 and 1"
+
+    # Extract distribution parameters with defaults
+    distributions = {
+        "annual_rent_growth": data.get("annual_rent_growth", {"distribution": "normal", "mean": 2, "stddev": 1}),
+        "discount_rate": data.get("discount_rate", {"distribution": "normal", "mean": 15, "stddev": 2}),
+        "interest_rate": data.get("interest_rate", {"distribution": "normal", "mean": 5, "stddev": 1}),
+    }
+    # Any other DCF input given as a distribution config is sampled too
+    for field in STOCHASTIC_FIELDS:
+        if field not in distributions and isinstance(data.get(field), dict):
+            distributions[field] = data[field]
+    for field, config in distributions.items():
+        is_valid, error = validate_distribution(field, config)
+        if not is_valid:
+            return False, error
+    # AR(1) paths are drawn year by year, outside the copula
+    correlated_fields = [field for field, config in distributions.items() if not is_path(config)]
+    is_valid, correlation = parse_correlation(data.get("correlation"), correlated_fields)
+    if not is_valid:
+        return False, correlation
+    # Base input excludes distribution parameters
+    base_input = {k: v for k, v in data.items() if k not in MONTE_CARLO_OPTION_KEYS and k not in distributions}
+    return True, {
+        **options,
+        "base_input": base_input,
+        "distributions": distributions,
+        "correlation": correlation,
+        # num_simulations becomes an upper bound
+        "target_precision": target_precision,
+        # Tags cached results so they are dropped when the valuation is written
+        "valuation_id": data.get("valuation_id"),
+    }
+
+def parse_portfolio_monte_carlo_request(data):
+    """Validate a portfolio Monte Carlo body. Returns (True, spec) or (False, error_message).
+
+    "macro" maps fields to distributions of shifts (in the field's units)
+    shared by every property on a path, optionally correlated; "idiosyncratic"
+    maps fields to the std dev of independent per-property normal shifts.
+    """
+    data = data or {}
+    is_valid, options = parse_monte_carlo_options(data)
+    if not is_valid:
+        return False, options
+    macro = data.get("macro", PORTFOLIO_MACRO_DEFAULTS)
+    idiosyncratic = data.get("idiosyncratic", PORTFOLIO_IDIOSYNCRATIC_DEFAULTS)
+    if not isinstance(macro, dict) or not isinstance(idiosyncratic, dict):
+        return False, "macro and idiosyncratic must be objects keyed by field"
+    unknown = sorted((set(macro) | set(idiosyncratic)) - set(STOCHASTIC_FIELDS))
+    if unknown:
+        return False, f"Cannot sample fields: {', '.join(unknown)}"
+    for field, config in macro.items():
+        is_valid, error = validate_distribution(field, config)
+        if not is_valid:
+            return False, error
+        if is_path(config):
+            return False, "ar1 paths are not supported for portfolio macro shifts"
+    for field, stddev in idiosyncratic.items():
+        if isinstance(stddev, bool) or not isinstance(stddev, (int, float)) or stddev < 0:
+            return False, f"idiosyncratic {field} must be a non-negative std dev"
+    is_valid, correlation = parse_correlation(data.get("correlation"), list(macro))
+    if not is_valid:
+        return False, correlation
+    return True, {**options, "macro": macro, "idiosyncratic": idiosyncratic, "correlation": correlation}
+
 def calculate_irr(cash_flows):
     # IRR is the rate that makes NPV = 0
     try:
@@ -349,6 +679,7 @@ def npv(rate, cash_flows):
     return sum(cf / (1 + rate) ** i for i, cf in enumerate(cash_flows))
 
 def clean_for_json(obj):
+    """Replace NaN/inf with None. Responses no longer need this: ORJSONProvider does it while serializing."""
     if isinstance(obj, float):
         if math.isnan(obj) or math.isinf(obj):
             return None
@@ -491,15 +822,16 @@ def safe_float(val, default=0):
 # --- App Factory ---
 def create_app(test_config=None):
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3000")
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "dcf_calculations.db"
+    )
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["CORS_ORIGINS"] = FRONTEND_URL
+    # Overrides on top of the defaults (tests, CLI commands)
     if test_config:
         app.config.update(test_config)
-    else:
-        FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3000")
-        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "dcf_calculations.db"
-        )
-        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-        app.config["CORS_ORIGINS"] = FRONTEND_URL
     # --- CORS SETUP ---
     # For local development, allow all origins so frontend (localhost:3000) can always connect.
     # For production, change to: CORS(app, origins=os.environ.get("FRONTEND_URL", "http://localhost:3000"), supports_credentials=True)
@@ -507,6 +839,95 @@ def create_app(test_config=None):
     CORS(app, origins="*", supports_credentials=True)
     db.init_app(app)
 
+    cashflow_cache = LRUCache(app.config.get("CASHFLOW_CACHE_MAX_BYTES", CASHFLOW_CACHE_MAX_BYTES))
+    app.extensions["cashflow_cache"] = cashflow_cache
+    monte_carlo_cache = LRUCache(app.config.get("MONTE_CARLO_CACHE_MAX_BYTES", MONTE_CARLO_CACHE_MAX_BYTES))
+    app.extensions["monte_carlo_cache"] = monte_carlo_cache
+
+    def invalidate_valuation_caches(val_id):
+        cashflow_cache.invalidate_tag(val_id)
+        monte_carlo_cache.invalidate_tag(val_id)
+
+    def cached_cash_flows(valuation, engine="exact", granularity="annual"):
+        """Cash flows for a stored valuation, keyed on a hash of its DCF inputs."""
+        inputs = valuation.to_dict()
+        key = canonical_key("cash_flows", engine, granularity, normalize_inputs(inputs))
+        return cashflow_cache.get_or_compute(
+            key,
+            lambda: calculate_cash_flows(inputs, engine, granularity),
+            lambda rows: len(rows) * CASH_FLOW_ROW_BYTES,
+            tags=(valuation.id,),
+        )
+
+    def valuation_cash_flows(valuation, engine="exact", granularity="annual"):
+        """Cash flows for a stored valuation.
+
+        Exact-engine tables are served from the materialized valuation_cashflow
+        rows; other engines, and valuations that have not been backfilled yet
+        (or whose rows an older engine version wrote), are computed through
+        the cache.
+        """
+        if engine == "exact" and granularity == "annual":
+            stored = (
+                ValuationCashFlow.query.filter_by(valuation_id=valuation.id)
+                .order_by(ValuationCashFlow.year)
+                .all()
+            )
+            if stored and all(row.engine_version == CASH_FLOW_ENGINE_VERSION for row in stored):
+                return [row.to_dict() for row in stored]
+        return cached_cash_flows(valuation, engine, granularity)
+
+    def cash_flows_response(cash_flows, response_format):
+        """Serialize cash-flow rows as row dicts, a dict of columns, or binary."""
+        if response_format == "binary":
+            return Response(encode_binary(rows_to_columns(cash_flows)), mimetype=BINARY_MIMETYPE)
+        if response_format == "columnar":
+            return jsonify({"cashFlows": rows_to_columns(cash_flows)})
+        return jsonify({"cashFlows": cash_flows})
+
+    def portfolio_valuations(portfolio_id):
+        """Valuations of a portfolio's properties. Returns (True, valuations) or (False, error_message)."""
+        property_ids = [
+            prop_id for (prop_id,) in db.session.query(Property.id).filter_by(portfolio_id=portfolio_id)
+        ]
+        if not property_ids:
+            return False, "No properties found for this portfolio"
+        valuations = Valuation.query.filter(Valuation.property_id.in_(property_ids)).all()
+        if not valuations:
+            return False, "No valuations found for properties"
+        return True, valuations
+
+    def portfolio_cash_flows(portfolio_id):
+        """Sum net cash flows by year across a portfolio. Returns (True, cash_flows) or (False, error_message)."""
+        is_valid, valuations = portfolio_valuations(portfolio_id)
+        if not is_valid:
+            return False, valuations
+
+        # Valuations materialized by the current engine are aggregated in SQL; the rest are computed.
+        valuation_ids = [v.id for v in valuations]
+        materialized_ids = {
+            val_id for (val_id,) in db.session.query(ValuationCashFlow.valuation_id)
+            .filter(
+                ValuationCashFlow.valuation_id.in_(valuation_ids),
+                ValuationCashFlow.engine_version == CASH_FLOW_ENGINE_VERSION,
+            )
+            .distinct()
+        }
+        totals = {}
+        if materialized_ids:
+            yearly_totals = (
+                db.session.query(ValuationCashFlow.year, func.sum(ValuationCashFlow.net_cash_flow))
+                .filter(ValuationCashFlow.valuation_id.in_(materialized_ids))
+                .group_by(ValuationCashFlow.year)
+            )
+            totals.update(yearly_totals)
+        for valuation in valuations:
+            if valuation.id in materialized_ids:
+                continue
+            for row in cached_cash_flows(valuation):
+                totals[row["year"]] = totals.get(row["year"], 0) + row["net_cash_flow"]
+        return True, [totals.get(year, 0) for year in range(max(totals) + 1)]
+
     # Ensure all tables are created on startup (only if not in testing)
     if not app.config.get("TESTING", False):
         with app.app_context():
@@ -517,7 +938,7 @@ def create_app(test_config=None):
     def valuations_collection():
         if request.method == "GET":
             vals = Valuation.query.all()
-            return jsonify({"items": [v.to_dict() for v in vals]}), 200
+            return jsonify({"items": vals}), 200
         elif request.method == "POST":
             data = request.json
             required_fields = [
@@ -543,6 +964,8 @@ def create_app(test_config=None):
                 ("selling_costs", (int, float), 0),
             ]
             is_valid, cleaned = validate_fields(data, required_fields, optional_fields)
+            if is_valid:
+                is_valid, cleaned = validate_holding_period(cleaned)
             if not is_valid:
                 return jsonify({"error": cleaned}), 400
             val_id = str(uuid.uuid4())
@@ -550,8 +973,9 @@ def create_app(test_config=None):
             valuation = Valuation(id=val_id, created_at=now)
             valuation = populate_model_from_data(valuation, cleaned, cleaned.keys())
             db.session.add(valuation)
+            materialize_cash_flows(valuation)
             db.session.commit()
-            return jsonify({"data": clean_for_json(valuation.to_dict())}), 201
+            return jsonify({"data": valuation.to_dict()}), 201
 
     # GET/PUT/DELETE /api/valuations/<id>
     @app.route("/api/valuations/<val_id>", methods=["GET", "PUT", "DELETE"])
@@ -560,7 +984,7 @@ def create_app(test_config=None):
         if not valuation:
             return jsonify({"error": "Valuation not found"}), 404
         if request.method == "GET":
-            return jsonify({"data": clean_for_json(valuation.to_dict())}), 200
+            return jsonify({"data": valuation.to_dict()}), 200
         elif request.method == "PUT":
             data = request.json
             required_fields = [
@@ -586,14 +1010,20 @@ def create_app(test_config=None):
                 ("selling_costs", (int, float), 0),
             ]
             is_valid, cleaned = validate_fields(data, required_fields, optional_fields)
+            if is_valid:
+                is_valid, cleaned = validate_holding_period(cleaned)
             if not is_valid:
                 return jsonify({"error": cleaned}), 400
             valuation = populate_model_from_data(valuation, cleaned, cleaned.keys())
+            materialize_cash_flows(valuation)
             db.session.commit()
-            return jsonify({"data": clean_for_json(valuation.to_dict())}), 200
+            invalidate_valuation_caches(val_id)
+            return jsonify({"data": valuation.to_dict()}), 200
         elif request.method == "DELETE":
+            ValuationCashFlow.query.filter_by(valuation_id=val_id).delete()
             db.session.delete(valuation)
             db.session.commit()
+            invalidate_valuation_caches(val_id)
             return "", 204
 
     # GET /api/valuations/<id>/cashflows
@@ -602,25 +1032,179 @@ def create_app(test_config=None):
         valuation = db.session.get(Valuation, val_id)
         if not valuation:
             abort(404)
-        cash_flows = calculate_cash_flows(valuation.to_dict())
-        return jsonify({"cashFlows": cash_flows})
+        is_valid, engine = parse_dcf_engine(request.args.get("engine"))
+        if not is_valid:
+            return jsonify({"error": engine}), 400
+        is_valid, granularity = parse_dcf_granularity(request.args.get("granularity"))
+        if not is_valid:
+            return jsonify({"error": granularity}), 400
+        is_valid, response_format = parse_response_format(request.args.get("format"), request.accept_mimetypes)
+        if not is_valid:
+            return jsonify({"error": response_format}), 400
+        cash_flows = valuation_cash_flows(valuation, engine, granularity)
+        return cash_flows_response(cash_flows, response_format)
+
+    # GET /api/valuations/<id>/npv (closed-form summary, no per-year table)
+    @app.route("/api/valuations/<val_id>/npv", methods=["GET"])
+    def valuation_npv(val_id):
+        valuation = db.session.get(Valuation, val_id)
+        if not valuation:
+            abort(404)
+        return jsonify(calculate_npv_summary(valuation.to_dict()))
 
     @app.route("/api/valuations/<val_id>/payback", methods=["GET"])
     def valuation_payback(val_id):
         valuation = db.session.get(Valuation, val_id)
         if not valuation:
             abort(404)
-        cash_flows = calculate_cash_flows(valuation.to_dict())
+        cash_flows = valuation_cash_flows(valuation)
         net_cash_flows = [row["net_cash_flow"] for row in cash_flows]
         payback_data = calculate_payback_period(net_cash_flows)
         return jsonify(payback_data)
 
+    # POST /api/valuations/<id>/sensitivity (two-way NPV/IRR grid or tornado, one vectorized pass)
+    @app.route("/api/valuations/<val_id>/sensitivity", methods=["POST"])
+    def valuation_sensitivity(val_id):
+        valuation = db.session.get(Valuation, val_id)
+        if not valuation:
+            abort(404)
+        is_valid, spec = parse_sensitivity_request(request.json or {})
+        if not is_valid:
+            return jsonify({"error": spec}), 400
+        try:
+            base_params = normalize_inputs(valuation.to_dict())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if spec["mode"] == "tornado":
+            return jsonify(tornado(base_params, spec["bumps"]))
+        return jsonify(sensitivity_grid(base_params, spec["x"], spec["y"]))
+
+    # POST /api/valuations/goal-seek (input value that hits a target NPV, IRR or payback)
+    @app.route("/api/valuations/goal-seek", methods=["POST"])
+    def valuations_goal_seek():
+        data = request.json or {}
+        is_valid, spec = parse_goal_seek(data)
+        if not is_valid:
+            return jsonify({"error": spec}), 400
+        if data.get("valuation_id"):
+            valuation = db.session.get(Valuation, data["valuation_id"])
+            if not valuation:
+                return jsonify({"error": "Valuation not found"}), 404
+            valuations = [valuation.to_dict()]
+        elif isinstance(data.get("valuation"), dict):
+            valuations = [data["valuation"]]
+        elif isinstance(data.get("valuations"), list) and data["valuations"]:
+            valuations = data["valuations"]
+        else:
+            return jsonify({"error": "Provide a valuation_id, a valuation or a non-empty list of valuations"}), 400
+        if len(valuations) > MAX_DCF_BATCH_SIZE:
+            return jsonify({"error": f"A batch may contain at most {MAX_DCF_BATCH_SIZE} valuations"}), 400
+        try:
+            params = pack_inputs(valuations)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        results = goal_seek(params, spec["field"], spec["metric"], spec["target"], spec["bounds"])
+        return jsonify({"results": results})
+
     # POST /api/cashflows/calculate (ad-hoc DCF calculation)
     @app.route("/api/cashflows/calculate", methods=["POST"])
     def cashflows_calculate():
         data = request.json
-        cash_flows = calculate_cash_flows(data)
-        return jsonify({"cashFlows": cash_flows})
+        is_valid, engine = parse_dcf_engine(request.args.get("engine"))
+        if not is_valid:
+            return jsonify({"error": engine}), 400
+        is_valid, granularity = parse_dcf_granularity(request.args.get("granularity"))
+        if not is_valid:
+            return jsonify({"error": granularity}), 400
+        is_valid, response_format = parse_response_format(request.args.get("format"), request.accept_mimetypes)
+        if not is_valid:
+            return jsonify({"error": response_format}), 400
+        try:
+            normalize_inputs(data or {})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if granularity == "monthly":
+            is_valid, months = parse_holding_period_months(data.get("holding_period_months"))
+            if not is_valid:
+                return jsonify({"error": months}), 400
+        cash_flows = calculate_cash_flows(data, engine, granularity)
+        return cash_flows_response(cash_flows, response_format)
+
+    # POST /api/cashflows/calculate-batch (many deals in one vectorized pass)
+    @app.route("/api/cashflows/calculate-batch", methods=["POST"])
+    def cashflows_calculate_batch():
+        data = request.json or {}
+        valuations = data.get("valuations")
+        if not isinstance(valuations, list) or not valuations:
+            return jsonify({"error": "valuations must be a non-empty list of valuation inputs"}), 400
+        if len(valuations) > MAX_DCF_BATCH_SIZE:
+            return jsonify({"error": f"A batch may contain at most {MAX_DCF_BATCH_SIZE} valuations"}), 400
+        include_cash_flows = data.get("include_cash_flows", True)
+        try:
+            batch = calculate_cash_flows_batch(valuations)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        irrs, _ = irr_batch(batch["net_cash_flow"])
+        results = []
+        for i in range(len(valuations)):
+            result = {
+                "npv": float(batch["npv"][i]),
+                "irr": float(irrs[i]) * 100,
+            }
+            if include_cash_flows:
+                result["cashFlows"] = batch_rows(batch, i)
+            results.append(result)
+        return jsonify({"results": results})
+
+    # POST /api/cashflows/what-if (recompute only the columns a change affects)
+    @app.route("/api/cashflows/what-if", methods=["POST"])
+    def cashflows_what_if():
+        data = request.json or {}
+        changes = data.get("changes") or {}
+        if not isinstance(changes, dict):
+            return jsonify({"error": "changes must be an object of valuation fields"}), 400
+        tags = ()
+        if data.get("valuation_id"):
+            valuation = db.session.get(Valuation, data["valuation_id"])
+            if not valuation:
+                return jsonify({"error": "Valuation not found"}), 404
+            base = valuation.to_dict()
+            tags = (valuation.id,)
+        elif isinstance(data.get("base"), dict):
+            base = data["base"]
+        else:
+            return jsonify({"error": "Provide a base valuation or a valuation_id"}), 400
+        try:
+            base_inputs = normalize_inputs(base)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Intermediate arrays are cached per base, so repeated edits of the
+        # same valuation only rerun the stages downstream of the changed fields.
+        base_state = cashflow_cache.get_or_compute(
+            canonical_key("what_if", base_inputs),
+            lambda: what_if_state(base_inputs),
+            what_if_nbytes,
+            tags=tags,
+        )
+        try:
+            state, recomputed = apply_what_if(base_state, changes)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        columns = what_if_columns(state)
+        return jsonify({
+            "cashFlows": columns_to_rows(columns),
+            "npv": float(columns["cumulative_pv"][-1]),
+            "recomputed": recomputed,
+        })
+
+    @app.route("/api/cashflows/cache-stats", methods=["GET"])
+    def cashflow_cache_stats():
+        return jsonify(cashflow_cache.stats())
+
+    @app.route("/api/valuations/monte-carlo/cache-stats", methods=["GET"])
+    def monte_carlo_cache_stats():
+        return jsonify(monte_carlo_cache.stats())
 
     @app.route("/api/cashflows/irr", methods=["POST"])
     def irr_calculate():
@@ -636,11 +1220,62 @@ def create_app(test_config=None):
             return jsonify({"error": "IRR could not be calculated"}), 400
         return jsonify({"irr": irr * 100})
 
+    # POST /api/cashflows/irr/batch (many series in one vectorized solve)
+    @app.route("/api/cashflows/irr/batch", methods=["POST"])
+    def irr_calculate_batch():
+        data = request.json or {}
+        series = data.get("series")
+        if not isinstance(series, list) or not series:
+            return jsonify({"error": "series must be a non-empty list of cash-flow lists"}), 400
+        if len(series) > MAX_DCF_BATCH_SIZE:
+            return jsonify({"error": f"A batch may contain at most {MAX_DCF_BATCH_SIZE} series"}), 400
+        discount_rate = data.get("discount_rate")
+        if discount_rate is not None and (not isinstance(discount_rate, (int, float)) or isinstance(discount_rate, bool)):
+            return jsonify({"error": "discount_rate must be a number (percent)"}), 400
+
+        # Invalid series get a per-item error instead of failing the request.
+        results = [None] * len(series)
+        valid = []
+        for i, cash_flows in enumerate(series):
+            if (
+                isinstance(cash_flows, list)
+                and 2 <= len(cash_flows) <= MAX_HOLDING_PERIOD + 1
+                and all(isinstance(cf, (int, float)) and not isinstance(cf, bool) for cf in cash_flows)
+            ):
+                valid.append(i)
+            else:
+                results[i] = {
+                    "irr": None,
+                    "npv": None,
+                    "status": "invalid",
+                    "error": f"cash_flows must be a list of 2 to {MAX_HOLDING_PERIOD + 1} numbers",
+                }
+        if valid:
+            matrix = pad_series([series[i] for i in valid])
+            irrs, statuses = irr_batch(matrix)
+            npvs = None
+            if discount_rate is not None:
+                npvs, _, _ = npv_and_derivatives(np.full(len(valid), discount_rate / 100), matrix)
+            for j, i in enumerate(valid):
+                results[i] = {
+                    "irr": float(irrs[j]) * 100,
+                    "npv": float(npvs[j]) if npvs is not None else None,
+                    "status": statuses[j],
+                }
+                if statuses[j] == IRR_NO_ROOT:
+                    results[i]["error"] = "IRR could not be calculated"
+        return jsonify({"results": results})
+
     @app.route("/api/valuations", methods=["OPTIONS"])
     @app.route("/api/valuations/<val_id>", methods=["OPTIONS"])
     @app.route("/api/valuations/<val_id>/cashflows", methods=["OPTIONS"])
+    @app.route("/api/valuations/<val_id>/sensitivity", methods=["OPTIONS"])
+    @app.route("/api/valuations/goal-seek", methods=["OPTIONS"])
     @app.route("/api/cashflows/calculate", methods=["OPTIONS"])
+    @app.route("/api/cashflows/calculate-batch", methods=["OPTIONS"])
+    @app.route("/api/cashflows/what-if", methods=["OPTIONS"])
     @app.route("/api/cashflows/irr", methods=["OPTIONS"])
+    @app.route("/api/cashflows/irr/batch", methods=["OPTIONS"])
     def options_handler(val_id=None):
         return "", 204
 
@@ -649,7 +1284,7 @@ def create_app(test_config=None):
     def properties_collection():
         if request.method == "GET":
             props = Property.query.all()
-            return jsonify({"items": [p.to_dict() for p in props]}), 200
+            return jsonify({"items": props}), 200
         elif request.method == "POST":
             data = request.json
             required_fields = [
@@ -673,7 +1308,7 @@ def create_app(test_config=None):
                 prop.listing_link = cleaned["listing_link"]
             db.session.add(prop)
             db.session.commit()
-            return jsonify({"data": clean_for_json(prop.to_dict())}), 201
+            return jsonify({"data": prop.to_dict()}), 201
 
     @app.route("/api/properties/<prop_id>", methods=["GET", "PUT", "PATCH"])
     def property_item(prop_id):
@@ -681,7 +1316,7 @@ def create_app(test_config=None):
         if not prop:
             return jsonify({"error": "Property not found"}), 404
         if request.method == "GET":
-            return jsonify({"data": clean_for_json(prop.to_dict())}), 200
+            return jsonify({"data": prop.to_dict()}), 200
         elif request.method == "PUT":
             data = request.json
             required_fields = [
@@ -699,7 +1334,7 @@ def create_app(test_config=None):
                 return jsonify({"error": result}), 400
             prop = populate_model_from_data(prop, cleaned, cleaned.keys())
             db.session.commit()
-            return jsonify({"data": clean_for_json(prop.to_dict())}), 200
+            return jsonify({"data": prop.to_dict()}), 200
         elif request.method == "PATCH":
             data = request.json
             # Only update provided fields
@@ -711,7 +1346,7 @@ def create_app(test_config=None):
                     return jsonify({"error": result}), 400
             prop = populate_model_from_data(prop, cleaned, cleaned.keys())
             db.session.commit()
-            return jsonify({"data": clean_for_json(prop.to_dict())}), 200
+            return jsonify({"data": prop.to_dict()}), 200
 
     # --- Property Valuation Endpoints ---
     @app.route("/api/properties/<prop_id>/valuation", methods=["GET", "POST", "PUT"])
@@ -726,7 +1361,7 @@ def create_app(test_config=None):
                 return jsonify({"data": None}), 200
             val_dict = val.to_dict()
             val_dict["postcode"] = prop.postcode
-            return jsonify({"data": clean_for_json(val_dict)})
+            return jsonify({"data": val_dict})
         elif request.method in ["POST", "PUT"]:
             data = request.json
             
@@ -754,6 +1389,8 @@ def create_app(test_config=None):
                 ("selling_costs", (int, float), 0),
             ]
             is_valid, cleaned = validate_fields(data, required_fields, optional_fields)
+            if is_valid:
+                is_valid, cleaned = validate_holding_period(cleaned)
             if not is_valid:
                 return jsonify({"error": cleaned}), 400
             
@@ -764,8 +1401,10 @@ def create_app(test_config=None):
                 # Update existing valuation
                 existing_val = populate_model_from_data(existing_val, cleaned, cleaned.keys())
                 existing_val.created_at = datetime.now(timezone.utc).isoformat()
+                materialize_cash_flows(existing_val)
                 db.session.commit()
-                return jsonify({"data": clean_for_json(existing_val.to_dict())}), 200
+                invalidate_valuation_caches(existing_val.id)
+                return jsonify({"data": existing_val.to_dict()}), 200
             else:
                 # Create new valuation
                 val_id = str(uuid.uuid4())
@@ -773,72 +1412,357 @@ def create_app(test_config=None):
                 valuation = Valuation(id=val_id, property_id=prop_id, created_at=now)
                 valuation = populate_model_from_data(valuation, cleaned, cleaned.keys())
                 db.session.add(valuation)
+                materialize_cash_flows(valuation)
                 db.session.commit()
-                return jsonify({"data": clean_for_json(valuation.to_dict())}), 201
+                return jsonify({"data": valuation.to_dict()}), 201
 
     @app.route("/api/valuations/monte-carlo", methods=["POST"])
     def monte_carlo_valuation():
         """Run Monte Carlo simulation for property valuation with SSE progress reporting."""
-        from flask import Response
-        import json
-        import time
-        data = request.json
-        num_simulations = max(1, min(50000, int(data.get("num_simulations", 10000))))
-        
-        # Extract distribution parameters with defaults
-        rent_growth_dist = data.get("annual_rent_growth", {"distribution": "normal", "mean": 2, "stddev": 1})
-        discount_rate_dist = data.get("discount_rate", {"distribution": "normal", "mean": 15, "stddev": 2})
-        interest_rate_dist = data.get("interest_rate", {"distribution": "normal", "mean": 5, "stddev": 1})
-        
-        # Base input excludes distribution parameters
-        base_input = {
-            k: v for k, v in data.items()
-            if k not in ["annual_rent_growth", "discount_rate", "interest_rate", "num_simulations"]
-        }
-        
-        # Generate random variables
-        rent_growths = _generate_random_variable(rent_growth_dist, num_simulations)
-        discount_rates = _generate_random_variable(discount_rate_dist, num_simulations)
-        interest_rates = _generate_random_variable(interest_rate_dist, num_simulations)
-        
+        # SSE is text, so "binary" ships npvs/irrs as base64 little-endian float64
+        is_valid, response_format = parse_response_format(request.args.get("format"))
+        if not is_valid:
+            return jsonify({"error": response_format}), 400
+        is_valid, spec = parse_monte_carlo_request(request.json)
+        if not is_valid:
+            return jsonify({"error": spec}), 400
+        num_simulations = spec["num_simulations"]
+        charts = spec["charts"]
+        # Chart payloads are computed from the samples, but only the charts are sent
+        include_samples = spec["include_samples"] or charts is not None
+
+        try:
+            holding_period = normalize_inputs(spec["base_input"])["holding_period"]
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            plan = monte_carlo_plan(spec, holding_period, include_samples)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Only seeded runs are reproducible, so only they are cached
+        cache_key = monte_carlo_cache_key(spec, include_samples) if spec["seed"] is not None else None
+        tags = (spec["valuation_id"],) if spec["valuation_id"] else ()
+
         def event_stream():
-            npvs = []
-            irrs = []
-            batch = max(1, num_simulations // 100)  # Send progress every 1%
-            for i in range(num_simulations):
-                sim_input = base_input.copy()
-                sim_input["annual_rent_growth"] = rent_growths[i]
-                sim_input["discount_rate"] = discount_rates[i]
-                sim_input["interest_rate"] = interest_rates[i]
-                cash_flows = calculate_cash_flows(sim_input)
-                npv = cash_flows[-1]["cumulative_pv"]
-                npvs.append(npv)
-                cf_values = [cf["net_cash_flow"] for cf in cash_flows]
-                irr = calculate_irr(cf_values)
-                irrs.append(float('nan') if irr is None else irr)
-                if (i + 1) % batch == 0 or (i + 1) == num_simulations:
-                    progress = int(100 * (i + 1) / num_simulations)
-                    yield f"data: {json.dumps({'progress': progress})}\n\n"
+            hit, cached = monte_carlo_cache.get(cache_key) if cache_key is not None else (False, None)
+            if hit:
+                npvs, irrs, summary = cached
+                if not include_samples:
+                    yield f"data: {app.json.dumps({'progress': 100, 'summary': summary, 'done': True, 'cached': True})}\n\n"
+                else:
+                    yield monte_carlo_final_event(
+                        npvs, irrs, summary, response_format, charts, spec["seed"], extra={'cached': True}
+                    )
+                return
+            stats = MonteCarloAccumulator()
+            if include_samples:
+                npvs = np.empty(num_simulations, dtype=spec["dtype"])
+                irrs = np.empty(num_simulations, dtype=spec["dtype"])
+                filled = np.zeros(num_simulations, dtype=bool)
+            # Closing the stream (client gone) closes the chunk generators and cancels queued chunks
+            stream = paced(monte_carlo_chunks(spec, stats, plan["chunk_size"], poll=monte_carlo_poll_seconds()))
+            try:
+                for chunk, due in stream:
+                    if chunk is not None and include_samples:
+                        _, start, chunk_npvs, chunk_irrs = chunk
+                        npvs[start:start + len(chunk_npvs)] = chunk_npvs
+                        irrs[start:start + len(chunk_irrs)] = chunk_irrs
+                        filled[start:start + len(chunk_npvs)] = True
+                    if due == "progress":
+                        # Live partial summary (t-digest percentiles) with every progress event
+                        progress = int(100 * stats.simulations / num_simulations)
+                        yield f"data: {app.json.dumps({'progress': progress, 'summary': stats.summary()})}\n\n"
+                    elif due == "heartbeat":
+                        yield SSE_HEARTBEAT
+            finally:
+                stream.close()
             # Final results
-            summary = _calculate_monte_carlo_summary(np.array(npvs), np.array(irrs))
-            yield f"data: {json.dumps({'progress': 100, 'npvs': npvs, 'irrs': irrs, 'summary': summary, 'done': True})}\n\n"
+            if not include_samples:
+                summary = stats.summary()
+                if cache_key is not None:
+                    monte_carlo_cache.put(cache_key, (None, None, summary), 1024, tags)
+                yield f"data: {app.json.dumps({'progress': 100, 'summary': summary, 'done': True})}\n\n"
+                return
+            if not filled.all():
+                npvs, irrs = npvs[filled], irrs[filled]
+            summary = _calculate_monte_carlo_summary(npvs, irrs)
+            if cache_key is not None:
+                # Cached arrays are shared between responses, so freeze them
+                npvs.flags.writeable = irrs.flags.writeable = False
+                monte_carlo_cache.put(cache_key, (npvs, irrs, summary), npvs.nbytes + irrs.nbytes, tags)
+            yield monte_carlo_final_event(npvs, irrs, summary, response_format, charts, spec["seed"])
         return Response(event_stream(), mimetype="text/event-stream")
 
-    def _generate_random_variable(distribution_config, num_simulations):
-        """Generate random variables based on distribution configuration."""
-        dist = distribution_config.get("distribution")
-        if dist == "normal":
-            return np.random.normal(
-                distribution_config["mean"], 
-                distribution_config["stddev"], 
-                num_simulations
-            )
-        elif dist == "pareto":
-            a = distribution_config.get("shape", 2)
-            min_val = distribution_config.get("mean", 1)
-            return min_val * (1 + np.random.pareto(a, num_simulations))
+    def monte_carlo_workers():
+        workers = app.config.get("MONTE_CARLO_WORKERS")
+        return min(workers, MONTE_CARLO_MAX_WORKERS) if workers else default_workers()
+
+    def monte_carlo_plan(spec, holding_period, keep_samples, properties=1):
+        """Chunk size and memory estimate within the MONTE_CARLO_MEMORY_LIMIT config (bytes)."""
+        return monte_carlo_memory_plan(
+            spec["num_simulations"],
+            holding_period,
+            properties,
+            keep_samples,
+            spec.get("dtype", "float64"),
+            app.config.get("MONTE_CARLO_MEMORY_LIMIT"),
+        )
+
+    def sse_cadence():
+        """(progress, heartbeat) intervals of Monte Carlo SSE streams, in seconds."""
+        return (
+            app.config.get("MONTE_CARLO_PROGRESS_SECONDS", MONTE_CARLO_PROGRESS_SECONDS),
+            app.config.get("SSE_HEARTBEAT_SECONDS", SSE_HEARTBEAT_SECONDS),
+        )
+
+    def monte_carlo_poll_seconds():
+        """Idle tick period of streamed runs: often enough for both progress and heartbeats."""
+        progress_seconds, heartbeat_seconds = sse_cadence()
+        return min(progress_seconds, heartbeat_seconds) if progress_seconds else heartbeat_seconds
+
+    def paced(chunks):
+        """Pass ``chunks`` through as ``(chunk, due)`` pairs on a wall-clock cadence.
+
+        ``due`` is "progress" when chunks finished since the last progress
+        event and MONTE_CARLO_PROGRESS_SECONDS have passed, "heartbeat" when
+        nothing was due for SSE_HEARTBEAT_SECONDS, else None. ``chunk`` is None
+        on idle ticks. Closing this closes ``chunks``.
+        """
+        progress_seconds, heartbeat_seconds = sse_cadence()
+        last_sent = time.monotonic()
+        last_progress = None
+        unreported = False
+        try:
+            for chunk in chunks:
+                now = time.monotonic()
+                unreported = unreported or chunk is not None
+                if unreported and (last_progress is None or now - last_progress >= progress_seconds):
+                    last_sent = last_progress = now
+                    unreported = False
+                    yield chunk, "progress"
+                elif now - last_sent >= heartbeat_seconds:
+                    last_sent = now
+                    yield chunk, "heartbeat"
+                else:
+                    yield chunk, None
+        finally:
+            chunks.close()
+
+    def monte_carlo_chunks(spec, stats, chunk_size, poll=None):
+        """run_monte_carlo for a parsed request, feeding stats with every chunk.
+
+        Chunks are sampled and priced on the worker pool but passed on in
+        order of their start, so stats (and a target-precision stop, which
+        cancels pending chunks) only ever see a contiguous prefix of the run:
+        a seeded run gives the same results however the pool schedules it.
+        With ``poll``, idle ticks (None) are passed through.
+        """
+        target_precision = spec.get("target_precision")
+        if target_precision:
+            chunk_size = min(chunk_size, MONTE_CARLO_ADAPTIVE_CHUNK)
+        chunks = run_monte_carlo(
+            spec["base_input"],
+            spec["distributions"],
+            spec["num_simulations"],
+            spec["seed"],
+            monte_carlo_workers(),
+            sampling=spec.get("sampling", "random"),
+            chunk_size=chunk_size,
+            correlation=spec.get("correlation"),
+            dtype=spec.get("dtype", "float64"),
+            poll=poll,
+        )
+        try:
+            for chunk in in_start_order(chunks):
+                if chunk is None:
+                    yield chunk
+                    continue
+                stats.update(chunk[2], chunk[3])
+                yield chunk
+                if target_precision and stats.meets_precision(target_precision):
+                    return
+        finally:
+            chunks.close()
+
+    def monte_carlo_cache_key(spec, include_samples):
+        """Canonical key of everything that determines a seeded run's results.
+
+        Summary-only runs hold streamed (t-digest) statistics rather than the
+        samples, so they are cached apart from full runs.
+        """
+        return canonical_key(
+            "monte_carlo",
+            normalize_inputs(spec["base_input"]),
+            spec["distributions"],
+            spec["correlation"],
+            spec["num_simulations"],
+            spec["seed"],
+            spec["sampling"],
+            spec["target_precision"],
+            spec["dtype"],
+            include_samples,
+        )
+
+    def monte_carlo_final_event(npvs, irrs, summary, response_format, charts=None, seed=None, extra=None):
+        if charts is not None:
+            final = {'progress': 100, 'summary': summary, 'done': True, **chart_payload(npvs, irrs, seed=seed, **charts)}
         else:
-            return np.full(num_simulations, distribution_config.get("mean", 0))
+            final = {'progress': 100, 'npvs': npvs, 'irrs': irrs, 'summary': summary, 'done': True}
+        final.update(extra or {})
+        if charts is not None:
+            return f"data: {app.json.dumps(final)}\n\n"
+        if response_format == "binary":
+            final.update(npvs=encode_float64_base64(npvs), irrs=encode_float64_base64(irrs), encoding="float64-le-base64")
+        return f"data: {app.json.dumps(final)}\n\n"
+
+    # --- Background Monte Carlo jobs (persisted, reattachable) ---
+    def claim_monte_carlo_job():
+        """Move the oldest queued job to running; returns its id or None."""
+        now = datetime.now(timezone.utc)
+        stale = (now - timedelta(seconds=MONTE_CARLO_JOB_STALE_SECONDS)).isoformat()
+        # Requeue runs whose worker stopped heartbeating (e.g. the server restarted)
+        MonteCarloJob.query.filter(
+            MonteCarloJob.status == "running", MonteCarloJob.updated_at < stale
+        ).update({"status": "queued", "completed": 0, "updated_at": now.isoformat()})
+        job = MonteCarloJob.query.filter_by(status="queued").order_by(MonteCarloJob.created_at).first()
+        claimed = 0
+        if job is not None:
+            claimed = MonteCarloJob.query.filter_by(id=job.id, status="queued").update(
+                {"status": "running", "updated_at": now.isoformat()}
+            )
+        db.session.commit()
+        return job.id if claimed else None
+
+    def run_monte_carlo_job(job_id):
+        job = db.session.get(MonteCarloJob, job_id)
+        spec = json.loads(job.request)
+        dtype = spec.get("dtype", "float64")
+        stats = MonteCarloAccumulator()
+        try:
+            plan = monte_carlo_plan(spec, normalize_inputs(spec["base_input"])["holding_period"], True)
+            npvs = np.empty(job.num_simulations, dtype=dtype)
+            irrs = np.empty(job.num_simulations, dtype=dtype)
+            filled = np.zeros(job.num_simulations, dtype=bool)
+            for completed, start, chunk_npvs, chunk_irrs in monte_carlo_chunks(spec, stats, plan["chunk_size"]):
+                npvs[start:start + len(chunk_npvs)] = chunk_npvs
+                irrs[start:start + len(chunk_irrs)] = chunk_irrs
+                filled[start:start + len(chunk_npvs)] = True
+                job.completed = completed
+                job.summary = app.json.dumps(stats.summary())
+                job.updated_at = datetime.now(timezone.utc).isoformat()
+                db.session.commit()
+            if not filled.all():
+                npvs, irrs = npvs[filled], irrs[filled]
+            job.summary = app.json.dumps(_calculate_monte_carlo_summary(npvs, irrs))
+            job.npvs = compress_float64(npvs)
+            job.irrs = compress_float64(irrs)
+            job.status = "done"
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(MonteCarloJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+        db.session.commit()
+
+    monte_carlo_jobs = JobWorkers(
+        app,
+        claim_monte_carlo_job,
+        run_monte_carlo_job,
+        workers=app.config.get("MONTE_CARLO_JOB_WORKERS", 1),
+    )
+    app.extensions["monte_carlo_jobs"] = monte_carlo_jobs
+    # Workers are started by the process meant to run jobs (the dev server, "run.py worker"),
+    # not by every app built for a CLI command, a migration or each WSGI worker
+    if app.config.get("MONTE_CARLO_JOB_AUTOSTART"):
+        monte_carlo_jobs.start()
+
+    @app.route("/api/valuations/monte-carlo/jobs", methods=["POST"])
+    def monte_carlo_job_create():
+        is_valid, spec = parse_monte_carlo_request(request.json)
+        if not is_valid:
+            return jsonify({"error": spec}), 400
+        try:
+            monte_carlo_plan(spec, normalize_inputs(spec["base_input"])["holding_period"], True)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        if spec["seed"] is None:
+            # Fix the seed up front so a requeued job reproduces the same run
+            spec["seed"] = int(np.random.SeedSequence().entropy % 2**63)
+        now = datetime.now(timezone.utc).isoformat()
+        job = MonteCarloJob(
+            id=str(uuid.uuid4()),
+            status="queued",
+            request=app.json.dumps(spec),
+            num_simulations=spec["num_simulations"],
+            completed=0,
+            created_at=now,
+            updated_at=now,
+        )
+        db.session.add(job)
+        db.session.commit()
+        monte_carlo_jobs.notify()
+        return jsonify({"data": job}), 202
+
+    @app.route("/api/valuations/monte-carlo/jobs/<job_id>", methods=["GET"])
+    def monte_carlo_job_item(job_id):
+        job = db.session.get(MonteCarloJob, job_id)
+        if not job:
+            abort(404)
+        is_valid, response_format = parse_response_format(request.args.get("format"), request.accept_mimetypes)
+        if not is_valid:
+            return jsonify({"error": response_format}), 400
+        if job.status != "done":
+            return jsonify({"data": job})
+        npvs, irrs = decompress_float64(job.npvs), decompress_float64(job.irrs)
+        if response_format == "binary":
+            return Response(encode_binary({"npvs": npvs, "irrs": irrs}), mimetype=BINARY_MIMETYPE)
+        return jsonify({"data": job, "npvs": npvs, "irrs": irrs})
+
+    # SSE stream that can be (re)attached at any point of a job's run
+    @app.route("/api/valuations/monte-carlo/jobs/<job_id>/events", methods=["GET"])
+    def monte_carlo_job_events(job_id):
+        if not db.session.get(MonteCarloJob, job_id):
+            abort(404)
+        is_valid, response_format = parse_response_format(request.args.get("format"))
+        if not is_valid:
+            return jsonify({"error": response_format}), 400
+
+        def event_stream():
+            last_progress = None
+            last_sent = time.monotonic()
+            while True:
+                db.session.expire_all()
+                job = db.session.get(MonteCarloJob, job_id)
+                if job.status == "done":
+                    npvs, irrs = decompress_float64(job.npvs), decompress_float64(job.irrs)
+                    spec = json.loads(job.request)
+                    yield monte_carlo_final_event(
+                        npvs, irrs, json.loads(job.summary), response_format, spec.get("charts"), spec["seed"]
+                    )
+                    return
+                if job.status == "failed":
+                    yield f"data: {app.json.dumps({'error': job.error, 'done': True})}\n\n"
+                    return
+                progress = job.to_dict()["progress"]
+                stale = (datetime.now(timezone.utc) - timedelta(seconds=MONTE_CARLO_JOB_STALE_SECONDS)).isoformat()
+                if job.updated_at < stale:
+                    # Nothing claimed or advanced the job lately, so no worker may be running:
+                    # end the stream instead of heartbeating forever (clients can reattach)
+                    error = f"No job worker has picked up or advanced this job for {MONTE_CARLO_JOB_STALE_SECONDS} s"
+                    yield f"data: {app.json.dumps({'progress': progress, 'status': job.status, 'stalled': True, 'error': error})}\n\n"
+                    return
+                if progress != last_progress:
+                    summary = json.loads(job.summary) if job.summary else None
+                    yield f"data: {app.json.dumps({'progress': progress, 'status': job.status, 'summary': summary})}\n\n"
+                    last_progress = progress
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= sse_cadence()[1]:
+                    yield SSE_HEARTBEAT
+                    last_sent = time.monotonic()
+                db.session.remove()
+                time.sleep(MONTE_CARLO_JOB_POLL_SECONDS)
+        return Response(stream_with_context(event_stream()), mimetype="text/event-stream")
 
     def _calculate_monte_carlo_summary(npvs, irrs):
         """Calculate summary statistics for Monte Carlo results."""
@@ -846,6 +1770,8 @@ def create_app(test_config=None):
         valid_irrs = irrs[np.isfinite(irrs)]
         percent_valid_irr = 100 * len(valid_irrs) / len(irrs) if len(irrs) > 0 else 0
         mean_valid_irr = float(np.nanmean(valid_irrs)) if len(valid_irrs) > 0 else None
+        npv_5th = float(np.nanpercentile(npvs, 100 * VAR_LEVEL))
+        tail = npvs[npvs <= npv_5th]
         return {
             "npv_mean": float(np.nanmean(npvs)),
             "npv_5th_percentile": float(np.nanpercentile(npvs, 5)),
@@ -856,6 +1782,10 @@ def create_app(test_config=None):
             "probability_npv_positive": float(np.mean(npvs > 0)),
             "mean_valid_irr": mean_valid_irr,
             "percent_valid_irr": percent_valid_irr,
+            "npv_std": float(np.nanstd(npvs, ddof=1)) if len(npvs) > 1 else 0.0,
+            "npv_var_95": -npv_5th,
+            "npv_cvar_95": -float(tail.mean()) if tail.size else None,
+            "simulations": len(npvs),
         }
 
     # Minimal Portfolio CRUD endpoints (KISS, DRY, YAGNI)
@@ -897,75 +1827,115 @@ def create_app(test_config=None):
 
     @app.route("/api/portfolios/<portfolio_id>/irr", methods=["GET"])
     def portfolio_irr(portfolio_id):
-        # Get all properties in the portfolio
-        properties = db.session.query(Property).filter_by(portfolio_id=portfolio_id).all()
-        if not properties:
-            return jsonify({"error": "No properties found for this portfolio"}), 404
-
-        # For each property, get valuation and cash flows
-        all_cash_flows = []
-        max_years = 0
-        for prop in properties:
-            valuation = db.session.query(Valuation).filter_by(property_id=prop.id).first()
-            if not valuation:
-                continue  # skip properties without valuation
-            cash_flows = calculate_cash_flows(valuation.to_dict())
-            net_cash_flows = [row["net_cash_flow"] for row in cash_flows]
-            all_cash_flows.append(net_cash_flows)
-            max_years = max(max_years, len(net_cash_flows))
-
-        if not all_cash_flows:
-            return jsonify({"error": "No valuations found for properties"}), 404
-
-        # Aggregate by year
-        portfolio_cash_flows = []
-        for year in range(max_years):
-            year_sum = 0
-            for cf in all_cash_flows:
-                if year < len(cf):
-                    year_sum += cf[year]
-            portfolio_cash_flows.append(year_sum)
+        is_valid, result = portfolio_cash_flows(portfolio_id)
+        if not is_valid:
+            return jsonify({"error": result}), 404
 
         # Calculate IRR
-        irr = calculate_irr(portfolio_cash_flows)
+        irr = calculate_irr(result)
         if irr is None:
             return jsonify({"error": "IRR could not be calculated"}), 400
 
         return jsonify({"irr": irr * 100})
 
+    @app.route("/api/portfolios/<portfolio_id>/monte-carlo", methods=["POST"])
+    def portfolio_monte_carlo(portfolio_id):
+        """Joint Monte Carlo over a portfolio's valuations with SSE progress reporting."""
+        is_valid, response_format = parse_response_format(request.args.get("format"))
+        if not is_valid:
+            return jsonify({"error": response_format}), 400
+        is_valid, spec = parse_portfolio_monte_carlo_request(request.json)
+        if not is_valid:
+            return jsonify({"error": spec}), 400
+        is_valid, valuations = portfolio_valuations(portfolio_id)
+        if not is_valid:
+            return jsonify({"error": valuations}), 404
+        num_simulations = spec["num_simulations"]
+        if num_simulations * len(valuations) > MAX_PORTFOLIO_PROPERTY_PATHS:
+            return jsonify({"error": f"num_simulations x properties must not exceed {MAX_PORTFOLIO_PROPERTY_PATHS}"}), 400
+        charts = spec["charts"]
+        include_samples = spec["include_samples"] or charts is not None
+        try:
+            horizon = max(normalize_inputs(valuation.to_dict())["holding_period"] for valuation in valuations)
+            plan = monte_carlo_plan(spec, horizon, include_samples, len(valuations))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            chunks = run_portfolio_monte_carlo(
+                [valuation.to_dict() for valuation in valuations],
+                spec["macro"],
+                spec["idiosyncratic"],
+                num_simulations,
+                spec["seed"],
+                monte_carlo_workers(),
+                sampling=spec["sampling"],
+                correlation=spec["correlation"],
+                chunk_size=plan["chunk_size"],
+                poll=monte_carlo_poll_seconds(),
+            )
+        except (TypeError, ValueError):
+            return jsonify({"error": "Valuation inputs must be numeric."}), 400
+
+        def event_stream():
+            stats = MonteCarloAccumulator()
+            moments = RunningCovariance(len(valuations))
+            if include_samples:
+                npvs = np.empty(num_simulations, dtype=spec["dtype"])
+                irrs = np.empty(num_simulations, dtype=spec["dtype"])
+            stream = paced(chunks)
+            try:
+                for chunk, due in stream:
+                    if chunk is not None:
+                        _, start, chunk_npvs, chunk_irrs, property_npvs = chunk
+                        if include_samples:
+                            npvs[start:start + len(chunk_npvs)] = chunk_npvs
+                            irrs[start:start + len(chunk_irrs)] = chunk_irrs
+                        stats.update(chunk_npvs, chunk_irrs)
+                        moments.update(property_npvs)
+                    if due == "progress":
+                        progress = int(100 * stats.simulations / num_simulations)
+                        yield f"data: {app.json.dumps({'progress': progress, 'summary': stats.summary()})}\n\n"
+                    elif due == "heartbeat":
+                        yield SSE_HEARTBEAT
+            finally:
+                stream.close()
+            diversification = diversification_statistics(moments)
+            properties = [
+                {
+                    "valuation_id": valuation.id,
+                    "property_id": valuation.property_id,
+                    "npv_mean": diversification["property_npv_mean"][i],
+                    "npv_std": diversification["property_npv_std"][i],
+                    "risk_contribution": (
+                        diversification["risk_contribution"][i]
+                        if diversification["risk_contribution"] is not None else None
+                    ),
+                }
+                for i, valuation in enumerate(valuations)
+            ]
+            extra = {
+                "diversification": {
+                    key: diversification[key] for key in (
+                        "portfolio_npv_std", "standalone_npv_std_sum", "diversification_ratio", "average_correlation",
+                    )
+                },
+                "properties": properties,
+            }
+            if not include_samples:
+                yield f"data: {app.json.dumps({'progress': 100, 'summary': stats.summary(), 'done': True, **extra})}\n\n"
+                return
+            summary = _calculate_monte_carlo_summary(npvs, irrs)
+            yield monte_carlo_final_event(npvs, irrs, summary, response_format, charts, spec["seed"], extra=extra)
+        return Response(event_stream(), mimetype="text/event-stream")
+
     @app.route("/api/portfolios/<portfolio_id>/payback", methods=["GET"])
     def portfolio_payback(portfolio_id):
-        # Get all properties in the portfolio
-        properties = db.session.query(Property).filter_by(portfolio_id=portfolio_id).all()
-        if not properties:
-            return jsonify({"error": "No properties found for this portfolio"}), 404
-
-        # For each property, get valuation and cash flows
-        all_cash_flows = []
-        max_years = 0
-        for prop in properties:
-            valuation = db.session.query(Valuation).filter_by(property_id=prop.id).first()
-            if not valuation:
-                continue  # skip properties without valuation
-            cash_flows = calculate_cash_flows(valuation.to_dict())
-            net_cash_flows = [row["net_cash_flow"] for row in cash_flows]
-            all_cash_flows.append(net_cash_flows)
-            max_years = max(max_years, len(net_cash_flows))
-
-        if not all_cash_flows:
-            return jsonify({"error": "No valuations found for properties"}), 404
-
-        # Aggregate by year
-        portfolio_cash_flows = []
-        for year in range(max_years):
-            year_sum = 0
-            for cf in all_cash_flows:
-                if year < len(cf):
-                    year_sum += cf[year]
-            portfolio_cash_flows.append(year_sum)
+        is_valid, result = portfolio_cash_flows(portfolio_id)
+        if not is_valid:
+            return jsonify({"error": result}), 404
 
         # Calculate payback period
-        payback_data = calculate_payback_period(portfolio_cash_flows)
+        payback_data = calculate_payback_period(result)
         
         return jsonify(payback_data)
 
@@ -1137,4 +2107,7 @@ def create_app(test_config=None):
 
 if __name__ == "__main__":
     app = create_app()
+    # Under the reloader only the child process serves requests, so only it runs jobs
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        app.extensions["monte_carlo_jobs"].start()
     app.run(debug=True, port=PORT)
@@ -0,0 +1,573 @@
+"""Vectorized float64 DCF engine.
+
+Mirrors the columns of ``app.calculate_cash_flows`` (the exact reference
+engine, which works year by year in fixed-context Decimal arithmetic) but
+evaluates every year at once in NumPy float64.
+"""
+import numpy as np
+
+DCF_INPUT_FIELDS = (
+    "initial_investment",
+    "annual_rental_income",
+    "vacancy_rate",
+    "service_charge",
+    "ground_rent",
+    "maintenance",
+    "property_tax",
+    "insurance",
+    "management_fees",
+    "transaction_costs",
+    "annual_rent_growth",
+    "discount_rate",
+    "holding_period",
+    "ltv",
+    "interest_rate",
+    "capex",
+    "exit_cap_rate",
+    "selling_costs",
+)
+# Longest horizon any endpoint prices; every array has holding_period + 1 years
+MAX_HOLDING_PERIOD = 100
+
+CASH_FLOW_COLUMNS = (
+    "gross_rent",
+    "vacancy_loss",
+    "effective_rent",
+    "operating_expenses",
+    "noi",
+    "capex",
+    "net_cash_flow",
+    "discount_factor",
+    "present_value",
+    "cumulative_pv",
+)
+
+
+def is_finite_number(value):
+    """True for a JSON number (int or float, not bool) that is a finite float."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    try:
+        return bool(np.isfinite(float(value)))
+    except OverflowError:
+        return False
+
+
+def _as_float(val):
+    if val in (None, '', 'None'):
+        return 0.0
+    return float(val)
+
+
+def normalize_inputs(input):
+    """Return a dict of float inputs with the same defaults as the exact engine.
+
+    Raises ValueError for a non-numeric input, or a holding period that is not
+    a finite number of years up to MAX_HOLDING_PERIOD.
+    """
+    params = {}
+    for field in DCF_INPUT_FIELDS:
+        try:
+            params[field] = _as_float(input.get(field, 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be numeric.")
+    if not params["holding_period"] <= MAX_HOLDING_PERIOD or params["holding_period"] == -np.inf:
+        raise ValueError(f"holding_period must be at most {MAX_HOLDING_PERIOD} years.")
+    params["holding_period"] = max(int(params["holding_period"]), 0)
+    return params
+
+
+def pack_inputs(inputs):
+    """Stack many input dicts into (N, 1) parameter arrays for ``dcf_kernel``."""
+    rows = []
+    for index, input in enumerate(inputs):
+        try:
+            rows.append(normalize_inputs(input))
+        except AttributeError:
+            raise ValueError(f"Valuation at index {index} must be an object of inputs.")
+        except ValueError as e:
+            raise ValueError(f"Valuation at index {index}: {e}")
+    params = {
+        field: np.array([row[field] for row in rows], dtype=float).reshape(-1, 1)
+        for field in DCF_INPUT_FIELDS
+    }
+    params["holding_period"] = params["holding_period"].astype(int)
+    return params
+
+
+def annual_mortgage_payment(initial_investment, ltv, interest_rate, holding_period):
+    """Annual debt service (12 monthly payments); zero when there is no loan."""
+    initial_investment, ltv, interest_rate, holding_period = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (initial_investment, ltv, interest_rate, holding_period))
+    )
+    mortgage_amount = initial_investment * (ltv / 100)
+    monthly_rate = interest_rate / 100 / 12
+    num_payments = holding_period * 12
+    has_loan = (ltv > 0) & (interest_rate > 0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + monthly_rate) ** num_payments
+        payment = mortgage_amount * (monthly_rate * growth) / (growth - 1)
+    return np.where(has_loan, payment, 0.0) * 12
+
+
+def _timeline_stage(params, years):
+    years = np.asarray(years)
+    holding_period = np.asarray(params["holding_period"])
+    active = years <= holding_period
+    return {
+        "years": years,
+        "active": active,
+        "operating": (years >= 1) & active,
+        "year0": (years == 0) & active,
+        "final_year": (years == holding_period) & (years >= 1),
+    }
+
+
+def _rent_stage(params, stages):
+    years = stages["timeline"]["years"]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + params["annual_rent_growth"] / 100) ** (years - 1)
+        gross_rent = params["annual_rental_income"] * growth
+    vacancy_loss = gross_rent * (params["vacancy_rate"] / 100)
+    return {"gross_rent": gross_rent, "vacancy_loss": vacancy_loss, "effective_rent": gross_rent - vacancy_loss}
+
+
+def _debt_stage(params, stages):
+    return {"annual_debt": annual_mortgage_payment(
+        params["initial_investment"], params["ltv"], params["interest_rate"], params["holding_period"]
+    )}
+
+
+def _operating_stage(params, stages):
+    effective_rent = stages["rent"]["effective_rent"]
+    annual_debt = stages["debt"]["annual_debt"]
+    fixed_costs = (
+        params["service_charge"] + params["ground_rent"] + params["maintenance"]
+        + params["property_tax"] + params["insurance"]
+    )
+    management_fee = effective_rent * params["management_fees"] / 100
+    return {
+        "noi": effective_rent - (fixed_costs + management_fee),
+        "operating_expenses": fixed_costs + management_fee + annual_debt,
+    }
+
+
+def _cash_flow_stage(params, stages):
+    timeline = stages["timeline"]
+    operating, year0 = timeline["operating"], timeline["year0"]
+    noi = stages["operating"]["noi"]
+    net_cash_flow = noi - params["capex"] - stages["debt"]["annual_debt"]
+    exit_cap_rate = np.asarray(params["exit_cap_rate"])
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        terminal_value = noi / (exit_cap_rate / 100)
+        net_terminal_value = terminal_value - terminal_value * (params["selling_costs"] / 100)
+    net_cash_flow = np.where(timeline["final_year"] & (exit_cap_rate > 0), net_cash_flow + net_terminal_value, net_cash_flow)
+
+    # Year 0 is the acquisition: rounded to pence like the exact engine.
+    acquisition_costs = params["transaction_costs"] + params["property_tax"]
+    year0_outflow = round_half_up(-params["initial_investment"] - acquisition_costs, 2)
+    zero = np.zeros(np.broadcast(noi, timeline["active"]).shape)
+    rent = stages["rent"]
+    return {
+        "gross_rent": np.where(year0, round_half_up(-params["initial_investment"], 2), np.where(operating, rent["gross_rent"], zero)),
+        "vacancy_loss": np.where(operating, rent["vacancy_loss"], zero),
+        "effective_rent": np.where(operating, rent["effective_rent"], zero),
+        "operating_expenses": np.where(
+            year0, round_half_up(acquisition_costs, 2), np.where(operating, stages["operating"]["operating_expenses"], zero)
+        ),
+        "noi": np.where(year0, year0_outflow, np.where(operating, noi, zero)),
+        "capex": np.where(operating, params["capex"], zero),
+        "net_cash_flow": np.where(year0, year0_outflow, np.where(operating, net_cash_flow, zero)),
+    }
+
+
+def _discount_stage(params, stages):
+    timeline = stages["timeline"]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        discount_factor = 1 / (1 + params["discount_rate"] / 100) ** timeline["years"]
+    zero = np.zeros(np.broadcast(discount_factor, timeline["active"]).shape)
+    return {"discount_factor": np.where(timeline["year0"], 1.0, np.where(timeline["operating"], discount_factor, zero))}
+
+
+def _present_value_stage(params, stages):
+    present_value = stages["cash_flow"]["net_cash_flow"] * stages["discount"]["discount_factor"]
+    active = stages["timeline"]["active"]
+    return {
+        "present_value": present_value,
+        "cumulative_pv": np.where(active, np.cumsum(present_value, axis=-1), 0.0),
+    }
+
+
+# Dependency graph of the DCF model: (stage, input fields, upstream stages, compute).
+# Stages are listed in topological order; "timeline" (driven by holding_period
+# and the year grid) is upstream of everything.
+DCF_STAGES = (
+    ("rent", ("annual_rental_income", "annual_rent_growth", "vacancy_rate"), ("timeline",), _rent_stage),
+    ("debt", ("initial_investment", "ltv", "interest_rate"), ("timeline",), _debt_stage),
+    ("operating", (
+        "service_charge", "ground_rent", "maintenance", "property_tax", "insurance", "management_fees",
+    ), ("rent", "debt"), _operating_stage),
+    ("cash_flow", (
+        "capex", "exit_cap_rate", "selling_costs", "initial_investment", "transaction_costs", "property_tax",
+    ), ("operating", "debt"), _cash_flow_stage),
+    ("discount", ("discount_rate",), ("timeline",), _discount_stage),
+    ("present_value", (), ("cash_flow", "discount"), _present_value_stage),
+)
+
+
+def run_dcf_stages(params, years, previous=None, changed=()):
+    """Evaluate the DCF stages, reusing ``previous`` outputs where possible.
+
+    A stage is recomputed when there is no previous output for it, when one of
+    its input fields is in ``changed`` or when an upstream stage was
+    recomputed. Returns ``(stages, recomputed_stage_names)``.
+    """
+    stages = {}
+    recomputed = []
+    if previous is None or "holding_period" in changed:
+        stages["timeline"] = _timeline_stage(params, years)
+        recomputed.append("timeline")
+    else:
+        stages["timeline"] = previous["timeline"]
+    for name, fields, upstream, compute in DCF_STAGES:
+        if (
+            previous is None
+            or any(field in changed for field in fields)
+            or any(stage in recomputed for stage in upstream)
+        ):
+            stages[name] = compute(params, stages)
+            recomputed.append(name)
+        else:
+            stages[name] = previous[name]
+    return stages, recomputed
+
+
+def stages_to_columns(stages):
+    """Flatten stage outputs into the cash-flow column dict."""
+    return {**stages["cash_flow"], **stages["discount"], **stages["present_value"]}
+
+
+def dcf_kernel(params, years):
+    """Compute every cash-flow column on a broadcast grid of deals and years.
+
+    ``params`` maps each field in ``DCF_INPUT_FIELDS`` to a scalar or an array
+    of shape (N, 1); ``years`` is an integer array of shape (T,) or (1, T).
+    Cells past a deal's holding period are zero, so ragged holding periods can
+    share one padded (N, T) grid.
+    """
+    stages, _ = run_dcf_stages(params, years)
+    return stages_to_columns(stages)
+
+
+def what_if_state(input):
+    """Evaluate a deal and keep its per-stage arrays as the base for what-ifs."""
+    params = normalize_inputs(input)
+    stages, _ = run_dcf_stages(params, np.arange(params["holding_period"] + 1))
+    return {"params": params, "stages": stages}
+
+
+def apply_what_if(state, changes):
+    """Apply changed inputs to a what-if state, recomputing only dependent stages.
+
+    Returns ``(new_state, recomputed_stage_names)``; ``state`` is not modified,
+    so cached states can be shared between requests.
+    """
+    unknown = sorted(set(changes) - set(DCF_INPUT_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown valuation fields: {', '.join(unknown)}.")
+    params = normalize_inputs({**state["params"], **changes})
+    changed = {field for field in DCF_INPUT_FIELDS if params[field] != state["params"][field]}
+    stages, recomputed = run_dcf_stages(
+        params, np.arange(params["holding_period"] + 1), state["stages"], changed
+    )
+    return {"params": params, "stages": stages}, recomputed
+
+
+def what_if_columns(state):
+    """Cash-flow column dict (with ``year``) for a what-if state."""
+    columns = stages_to_columns(state["stages"])
+    columns["year"] = state["stages"]["timeline"]["years"]
+    return columns
+
+
+def what_if_nbytes(state):
+    """Approximate memory held by a what-if state's arrays."""
+    return sum(
+        np.asarray(value).nbytes for stage in state["stages"].values() for value in stage.values()
+    )
+
+
+def cash_flow_columns(input):
+    """Return ``{"year": ..., <column>: ndarray}`` for years 0..holding_period."""
+    params = normalize_inputs(input)
+    years = np.arange(params["holding_period"] + 1)
+    columns = dcf_kernel(params, years)
+    columns["year"] = years
+    return columns
+
+
+def round_half_up(values, decimals):
+    """Round half away from zero, as the exact engine and DcfTable do."""
+    scale = 10.0 ** decimals
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale + 0.0
+
+
+def _display_values(columns, names):
+    """Column values as lists, amounts in pence and discount factors to 6 places."""
+    return [
+        round_half_up(columns[name], 6 if name == "discount_factor" else 2).tolist()
+        for name in names
+    ]
+
+
+def columns_to_rows(columns):
+    """Convert a column dict into the row-dict layout the API returns.
+
+    The arrays stay unrounded; like the exact engine, values are rounded only
+    when a row is emitted.
+    """
+    years = columns["year"].tolist()
+    values = _display_values(columns, CASH_FLOW_COLUMNS)
+    return [
+        {"year": year, **dict(zip(CASH_FLOW_COLUMNS, row))}
+        for year, row in zip(years, zip(*values))
+    ]
+
+
+def calculate_cash_flows_fast(input):
+    """Float64 equivalent of ``calculate_cash_flows`` returning the same rows."""
+    return columns_to_rows(cash_flow_columns(input))
+
+
+def calculate_cash_flows_batch(inputs):
+    """Price many deals in one pass over a padded (N, max_years + 1) grid.
+
+    Returns a dict with the ``year`` axis (T,), each deal's ``holding_period``
+    (N,), every cash-flow column as an (N, T) array (zero past each deal's
+    holding period) and the per-deal ``npv`` (N,).
+    """
+    params = pack_inputs(inputs)
+    holding_periods = params["holding_period"][:, 0]
+    years = np.arange(holding_periods.max(initial=0) + 1)
+    batch = dcf_kernel(params, years[None, :])
+    batch["year"] = years
+    batch["holding_period"] = holding_periods
+    batch["npv"] = batch["cumulative_pv"][np.arange(len(holding_periods)), holding_periods]
+    return batch
+
+
+def batch_cash_flows(batch, index):
+    """Return one deal's net cash flows (years 0..holding_period) from a batch."""
+    return batch["net_cash_flow"][index, :batch["holding_period"][index] + 1]
+
+
+def batch_rows(batch, index):
+    """Unpack one deal from ``calculate_cash_flows_batch`` into API rows."""
+    length = batch["holding_period"][index] + 1
+    columns = {name: batch[name][index, :length] for name in CASH_FLOW_COLUMNS}
+    columns["year"] = batch["year"][:length]
+    return columns_to_rows(columns)
+
+
+def _geometric_sum(ratio, n):
+    """Sum of ratio**k for k in 0..n-1, accurate when ratio is close to 1."""
+    ratio = np.asarray(ratio, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        near_one = np.expm1(n * np.log(ratio)) / (ratio - 1)
+        general = (1 - ratio ** n) / (1 - ratio)
+    return np.where(ratio == 1, n, np.where(ratio > 0, near_one, general))
+
+
+def npv_closed_form(params):
+    """Closed-form NPV of the ``dcf_kernel`` model, O(1) per deal.
+
+    Rent grows geometrically and every other line is constant, so the
+    discounted and undiscounted sums are geometric series. Accepts the same
+    scalar or (N, 1) ``params`` as ``dcf_kernel`` and returns arrays for
+    ``npv``, ``undiscounted_total``, ``terminal_value`` and
+    ``net_terminal_value``.
+    """
+    holding_period = np.asarray(params["holding_period"])
+    annual_debt = annual_mortgage_payment(
+        params["initial_investment"], params["ltv"], params["interest_rate"], holding_period
+    )
+    fixed_costs = (
+        params["service_charge"] + params["ground_rent"] + params["maintenance"]
+        + params["property_tax"] + params["insurance"]
+    )
+    fixed_outgoings = fixed_costs + params["capex"] + annual_debt
+    # Effective rent net of the management fee; NOI is this minus fixed_costs.
+    year1_net_rent = (
+        params["annual_rental_income"]
+        * (1 - params["vacancy_rate"] / 100)
+        * (1 - params["management_fees"] / 100)
+    )
+    growth = 1 + params["annual_rent_growth"] / 100
+    discount = 1 + params["discount_rate"] / 100
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        discounted_growth = _geometric_sum(growth / discount, holding_period) / discount
+        annuity = _geometric_sum(1 / discount, holding_period) / discount
+        final_noi = year1_net_rent * growth ** (holding_period - 1) - fixed_costs
+        exit_cap_rate = np.asarray(params["exit_cap_rate"])
+        has_sale = (exit_cap_rate > 0) & (holding_period >= 1)
+        terminal_value = np.where(has_sale, final_noi / (exit_cap_rate / 100), 0.0)
+        net_terminal_value = terminal_value - terminal_value * (params["selling_costs"] / 100)
+        terminal_pv = net_terminal_value / discount ** holding_period
+
+    year0 = round_half_up(-params["initial_investment"] - params["transaction_costs"] - params["property_tax"], 2)
+    npv = year0 + year1_net_rent * discounted_growth - fixed_outgoings * annuity + terminal_pv
+    undiscounted_total = (
+        year0
+        + year1_net_rent * _geometric_sum(growth, holding_period)
+        - fixed_outgoings * holding_period
+        + net_terminal_value
+    )
+    return {
+        "npv": npv,
+        "undiscounted_total": undiscounted_total,
+        "terminal_value": terminal_value,
+        "net_terminal_value": net_terminal_value,
+    }
+
+
+def calculate_npv_summary(input):
+    """NPV, undiscounted total and terminal value for one valuation without the table."""
+    summary = npv_closed_form(normalize_inputs(input))
+    return {key: float(value) for key, value in summary.items()}
+
+
+MONTHLY_CASH_FLOW_COLUMNS = (
+    "gross_rent",
+    "vacancy_loss",
+    "effective_rent",
+    "operating_expenses",
+    "noi",
+    "capex",
+    "debt_service",
+    "interest",
+    "principal",
+    "loan_balance",
+    "net_cash_flow",
+    "discount_factor",
+    "present_value",
+    "cumulative_pv",
+)
+
+
+def amortization_schedule(principal, monthly_rate, num_payments, months):
+    """Vectorized loan schedule: payment, interest, principal and balance per month.
+
+    ``months`` is an integer array of elapsed months; balances use the closed
+    form B_k = P(1+r)^k - pmt((1+r)^k - 1)/r, so no loop over payments.
+    """
+    months = np.asarray(months)
+    if principal <= 0 or monthly_rate <= 0 or num_payments <= 0:
+        zero = np.zeros(months.shape)
+        return {"payment": 0.0, "interest": zero, "principal": zero, "balance": zero}
+    growth = (1 + monthly_rate) ** num_payments
+    payment = principal * monthly_rate * growth / (growth - 1)
+    elapsed = np.minimum(months, num_payments)
+    balance = principal * (1 + monthly_rate) ** elapsed - payment * np.expm1(elapsed * np.log1p(monthly_rate)) / monthly_rate
+    balance = np.maximum(balance, 0.0)
+    opening = principal * (1 + monthly_rate) ** (elapsed - 1) - payment * np.expm1((elapsed - 1) * np.log1p(monthly_rate)) / monthly_rate
+    in_term = (months >= 1) & (months <= num_payments)
+    interest = np.where(in_term, opening * monthly_rate, 0.0)
+    return {
+        "payment": payment,
+        "interest": interest,
+        "principal": np.where(in_term, payment - interest, 0.0),
+        "balance": balance,
+    }
+
+
+def monthly_cash_flow_columns(input):
+    """Monthly version of ``cash_flow_columns`` computed with array operations.
+
+    Rent steps up by the growth rate every 12 months and is received in equal
+    monthly instalments; fixed costs and capex are spread evenly; debt service
+    follows the loan's monthly amortization schedule. Cash flows are
+    discounted monthly at the equivalent of the annual discount rate.
+
+    ``holding_period_months`` (optional) ends the hold part-way through a
+    year: any outstanding loan balance is repaid in the exit month and the
+    sale is priced on that month's annualized NOI.
+    """
+    params = normalize_inputs(input)
+    loan_term = params["holding_period"] * 12
+    horizon = input.get("holding_period_months")
+    horizon = loan_term if horizon in (None, '', 'None') else max(int(float(horizon)), 0)
+
+    periods = np.arange(horizon + 1)
+    years = (periods + 11) // 12
+    operating = periods >= 1
+
+    loan = amortization_schedule(
+        params["initial_investment"] * params["ltv"] / 100,
+        params["interest_rate"] / 100 / 12 if params["ltv"] > 0 else 0.0,
+        loan_term,
+        periods,
+    )
+    debt_service = np.where(operating & (periods <= loan_term), loan["payment"], 0.0)
+
+    fixed_costs = (
+        params["service_charge"] + params["ground_rent"] + params["maintenance"]
+        + params["property_tax"] + params["insurance"]
+    ) / 12
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + params["annual_rent_growth"] / 100) ** (years - 1)
+    gross_rent = np.where(operating, params["annual_rental_income"] / 12 * growth, 0.0)
+    vacancy_loss = gross_rent * (params["vacancy_rate"] / 100)
+    effective_rent = gross_rent - vacancy_loss
+    management_fee = effective_rent * params["management_fees"] / 100
+    noi = np.where(operating, effective_rent - (fixed_costs + management_fee), 0.0)
+    capex = np.where(operating, params["capex"] / 12, 0.0)
+    net_cash_flow = noi - capex - debt_service
+
+    if horizon >= 1:
+        net_cash_flow[-1] -= loan["balance"][-1]
+        if params["exit_cap_rate"] > 0:
+            terminal_value = 12 * noi[-1] / (params["exit_cap_rate"] / 100)
+            net_cash_flow[-1] += terminal_value - terminal_value * (params["selling_costs"] / 100)
+
+    acquisition_costs = params["transaction_costs"] + params["property_tax"]
+    year0_outflow = round_half_up(-params["initial_investment"] - acquisition_costs, 2)
+    net_cash_flow[0] = year0_outflow
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        discount_factor = (1 + params["discount_rate"] / 100) ** (-periods / 12)
+    present_value = net_cash_flow * discount_factor
+
+    gross_rent[0] = round_half_up(-params["initial_investment"], 2)
+    noi[0] = year0_outflow
+    operating_expenses = np.where(operating, fixed_costs + management_fee + debt_service, round_half_up(acquisition_costs, 2))
+    return {
+        "period": periods,
+        "year": years,
+        "month": np.where(operating, periods - 12 * (years - 1), 0),
+        "gross_rent": gross_rent,
+        "vacancy_loss": vacancy_loss,
+        "effective_rent": effective_rent,
+        "operating_expenses": operating_expenses,
+        "noi": noi,
+        "capex": capex,
+        "debt_service": debt_service,
+        "interest": loan["interest"],
+        "principal": loan["principal"],
+        "loan_balance": loan["balance"],
+        "net_cash_flow": net_cash_flow,
+        "discount_factor": discount_factor,
+        "present_value": present_value,
+        "cumulative_pv": np.cumsum(present_value),
+    }
+
+
+def calculate_monthly_cash_flows(input):
+    """Monthly cash-flow rows (period 0 is the acquisition) for the API."""
+    columns = monthly_cash_flow_columns(input)
+    index = [columns[name].tolist() for name in ("period", "year", "month")]
+    values = _display_values(columns, MONTHLY_CASH_FLOW_COLUMNS)
+    return [
+        {"period": period, "year": year, "month": month, **dict(zip(MONTHLY_CASH_FLOW_COLUMNS, row))}
+        for period, year, month, row in zip(*index, zip(*values))
+    ]
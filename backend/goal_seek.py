@@ -0,0 +1,174 @@
+"""Goal seek: the value of one input at which deals hit a target NPV, IRR or payback.
+
+NPV is affine in most inputs (price, rent, costs, LTV; see AFFINE_FIELDS),
+so two closed-form evaluations (``fast_dcf.npv_closed_form``) give the exact
+solution. An IRR target reuses that: a deal whose cash flows change sign once
+has IRR equal to the target exactly where its NPV, discounted at the target
+rate, is zero. Other inputs, and payback targets, are solved by bisection
+inside the input's bounds, for every deal of a batch at once.
+"""
+import numpy as np
+
+from fast_dcf import DCF_INPUT_FIELDS, dcf_kernel, is_finite_number, npv_closed_form
+from irr_solver import irr_batch
+
+GOAL_SEEK_METRICS = ("npv", "irr", "payback")
+# The horizon sets the array shape, so it is not solved for
+GOAL_SEEK_FIELDS = tuple(field for field in DCF_INPUT_FIELDS if field != "holding_period")
+# Fields NPV is affine in: rent and costs enter linearly, debt service is linear in price and LTV
+AFFINE_FIELDS = (
+    "initial_investment", "annual_rental_income", "vacancy_rate", "service_charge", "ground_rent",
+    "maintenance", "property_tax", "insurance", "management_fees", "transaction_costs", "ltv", "capex",
+    "selling_costs",
+)
+_PERCENT_BOUNDS = (0.0, 100.0)
+_AMOUNT_BOUNDS = (0.0, 1e12)
+# Search interval of each field (a request may narrow or widen it)
+GOAL_SEEK_BOUNDS = {
+    **{field: _AMOUNT_BOUNDS for field in GOAL_SEEK_FIELDS},
+    "vacancy_rate": _PERCENT_BOUNDS,
+    "management_fees": _PERCENT_BOUNDS,
+    "ltv": _PERCENT_BOUNDS,
+    "interest_rate": _PERCENT_BOUNDS,
+    "selling_costs": _PERCENT_BOUNDS,
+    # A zero exit cap rate means no sale, so the search stays above it
+    "exit_cap_rate": (0.01, 100.0),
+    "annual_rent_growth": (-99.0, 100.0),
+    "discount_rate": (-99.0, 1000.0),
+}
+GOAL_SEEK_MAX_ITERATIONS = 200
+GOAL_SEEK_XTOL = 1e-9
+
+GOAL_SEEK_SOLVED = "solved"
+GOAL_SEEK_NO_SOLUTION = "no_solution"
+
+
+def parse_goal_seek(data):
+    """Validate ``field``, ``metric``, ``target`` and optional ``bounds``.
+
+    Returns (True, spec) or (False, error_message). IRR and payback targets
+    are in percent and years.
+    """
+    field, metric, target = data.get("field"), data.get("metric"), data.get("target")
+    if field not in GOAL_SEEK_FIELDS:
+        return False, f"field must be one of: {', '.join(GOAL_SEEK_FIELDS)}"
+    if metric not in GOAL_SEEK_METRICS:
+        return False, f"metric must be one of: {', '.join(GOAL_SEEK_METRICS)}"
+    if not is_finite_number(target):
+        return False, "target must be a number"
+    if metric == "irr" and (field == "discount_rate" or target <= -99):
+        return False, "An IRR target must be above -99% and cannot be met by changing the discount rate"
+    if metric == "payback" and target <= 0:
+        return False, "A payback target must be a positive number of years"
+    bounds = data.get("bounds", GOAL_SEEK_BOUNDS[field])
+    if (
+        not isinstance(bounds, (list, tuple)) or len(bounds) != 2
+        or not all(is_finite_number(bound) for bound in bounds) or bounds[0] >= bounds[1]
+    ):
+        return False, "bounds must be [low, high] with low < high"
+    return True, {"field": field, "metric": metric, "target": float(target), "bounds": [float(b) for b in bounds]}
+
+
+def simple_payback(net_cash_flows):
+    """Vectorized ``app.calculate_payback_period`` simple payback (NaN where never repaid).
+
+    Only positive flows after year 0 count, and the repaying year is
+    interpolated linearly.
+    """
+    net_cash_flows = np.atleast_2d(net_cash_flows)
+    investment = np.where(net_cash_flows[:, 0] < 0, -net_cash_flows[:, 0], 0.0)
+    inflows = np.clip(net_cash_flows[:, 1:], 0, None)
+    cumulative = np.cumsum(inflows, axis=1)
+    reached = (inflows > 0) & (cumulative >= investment[:, None])
+    repaid = reached.any(axis=1) & (investment > 0)
+    year = reached.argmax(axis=1)
+    rows = np.arange(len(year))
+    inflow = inflows[rows, year]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = year + (investment - (cumulative[rows, year] - inflow)) / inflow
+    return np.where(repaid, payback, np.nan)
+
+
+def _metric_gap(params, metric, target):
+    """Signed distance of each deal from the target (NaN-free, +inf if never repaid)."""
+    if metric == "payback":
+        years = np.arange(int(np.max(params["holding_period"])) + 1)
+        payback = simple_payback(dcf_kernel(params, years)["net_cash_flow"])
+        return np.where(np.isnan(payback), np.inf, payback - target)
+    if metric == "irr":
+        params = {**params, "discount_rate": target}
+        target = 0.0
+    return np.ravel(npv_closed_form(params)["npv"]) - target
+
+
+def _with_value(params, field, values):
+    return {**params, field: np.asarray(values, dtype=float).reshape(-1, 1)}
+
+
+def _solve_affine(params, field, metric, target):
+    """Root of the affine NPV gap from its values at two points.
+
+    Exact up to the pence rounding of the year-0 outflow.
+    """
+    x0 = np.ravel(params[field]).astype(float)
+    gap0 = _metric_gap(_with_value(params, field, x0), metric, target)
+    slope = _metric_gap(_with_value(params, field, x0 + 1), metric, target) - gap0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x0 - gap0 / slope
+
+
+def _solve_bisection(params, field, metric, target, low, high):
+    """Bisection on every deal at once; NaN where the bounds do not bracket the target."""
+    n = len(np.ravel(params["holding_period"]))
+    low, high = np.full(n, low), np.full(n, high)
+    gap_low = _metric_gap(_with_value(params, field, low), metric, target)
+    gap_high = _metric_gap(_with_value(params, field, high), metric, target)
+    bracketed = np.sign(gap_low) * np.sign(gap_high) <= 0
+    for _ in range(GOAL_SEEK_MAX_ITERATIONS):
+        if np.all(high - low <= GOAL_SEEK_XTOL * (1 + np.abs(low))):
+            break
+        middle = (low + high) / 2
+        gap = _metric_gap(_with_value(params, field, middle), metric, target)
+        same_as_low = np.sign(gap) == np.sign(gap_low)
+        low = np.where(same_as_low, middle, low)
+        gap_low = np.where(same_as_low, gap, gap_low)
+        high = np.where(same_as_low, high, middle)
+    # An exact hit at the upper bound leaves low one step short, so use high there
+    return np.where(bracketed, np.where(gap_high == 0, high, (low + high) / 2), np.nan)
+
+
+def goal_seek(params, field, metric, target, bounds=None):
+    """Solve ``field`` for every deal in (N, 1) ``params`` (see fast_dcf.pack_inputs).
+
+    Returns one dict per deal with the solved ``value`` (None when no value
+    in ``bounds`` hits the target), the ``achieved`` NPV, IRR (percent) or
+    payback (years) there, ``status`` and the ``method`` used.
+    """
+    low, high = bounds or GOAL_SEEK_BOUNDS[field]
+    if metric != "payback" and field in AFFINE_FIELDS:
+        method = "linear"
+        values = _solve_affine(params, field, metric, target)
+        values = np.where((values >= low) & (values <= high), values, np.nan)
+    else:
+        method = "bisection"
+        values = _solve_bisection(params, field, metric, target, low, high)
+
+    solved = np.isfinite(values)
+    solved_params = _with_value(params, field, np.where(solved, values, np.ravel(params[field])))
+    years = np.arange(int(np.max(params["holding_period"])) + 1)
+    net_cash_flow = dcf_kernel(solved_params, years)["net_cash_flow"]
+    if metric == "npv":
+        achieved = np.ravel(npv_closed_form(solved_params)["npv"])
+    elif metric == "irr":
+        achieved = irr_batch(net_cash_flow)[0] * 100
+    else:
+        achieved = simple_payback(net_cash_flow)
+    return [
+        {
+            "value": float(values[i]) if solved[i] else None,
+            "achieved": float(achieved[i]) if solved[i] and np.isfinite(achieved[i]) else None,
+            "status": GOAL_SEEK_SOLVED if solved[i] else GOAL_SEEK_NO_SOLUTION,
+            "method": method,
+        }
+        for i in range(len(values))
+    ]
@@ -0,0 +1,130 @@
+"""Vectorized IRR solver for many cash-flow series at once.
+
+``irr_batch`` takes an (N, T) matrix of cash flows (ragged series padded with
+trailing zeros) and runs safeguarded Halley iterations on every row together.
+NPV and its first two derivatives come from one Horner pass in
+``x = 1 / (1 + r)``. Each row keeps a sign-change bracket inside
+``IRR_BRACKET``; a step that leaves the bracket is replaced by bisection.
+
+Only rows with exactly one sign change are solved this way: by Descartes'
+rule they have a single IRR above -100%, so the answer is the same root that
+``app.calculate_irr`` (``brentq`` over the same bracket) finds. Rows with
+several sign changes, or that fail to converge, fall back to ``brentq``.
+"""
+import numpy as np
+from scipy.optimize import brentq
+
+IRR_BRACKET = (-0.99, 10.0)
+IRR_MAX_ITERATIONS = 60
+IRR_XTOL = 1e-13
+
+IRR_CONVERGED = "converged"
+IRR_FALLBACK = "fallback"
+IRR_NO_ROOT = "no_root"
+
+
+def npv_and_derivatives(rates, cash_flows):
+    """NPV of each row at its rate, with first and second derivatives in the rate."""
+    x = 1.0 / (1.0 + rates)
+    p = np.zeros_like(x)
+    dp = np.zeros_like(x)
+    d2p = np.zeros_like(x)
+    for t in range(cash_flows.shape[1] - 1, -1, -1):
+        d2p = d2p * x + dp
+        dp = dp * x + p
+        p = p * x + cash_flows[:, t]
+    dp_dr = -x * x * dp
+    d2p_dr2 = 2 * x**4 * d2p + 2 * x**3 * dp
+    return p, dp_dr, d2p_dr2
+
+
+def _npv_row(rate, cash_flows):
+    # Same expression as app.npv, so fallback rows match calculate_irr exactly.
+    return sum(cf / (1 + rate) ** t for t, cf in enumerate(cash_flows))
+
+
+def sign_changes(cash_flows):
+    """Number of sign changes in each row, ignoring zeros."""
+    signs = np.sign(cash_flows)
+    nonzero = signs != 0
+    # Carry the last non-zero sign forward over zero entries.
+    idx = np.where(nonzero, np.arange(signs.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    carried = np.take_along_axis(signs, idx, axis=1)
+    previous = carried[:, :-1]
+    return np.sum(nonzero[:, 1:] & (previous != 0) & (signs[:, 1:] != previous), axis=1)
+
+
+def irr_batch(cash_flows):
+    """Return (irrs, statuses) for an (N, T) cash-flow matrix.
+
+    ``irrs`` is float64 with NaN where no IRR exists in ``IRR_BRACKET``;
+    ``statuses`` holds IRR_CONVERGED, IRR_FALLBACK or IRR_NO_ROOT per row.
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n = cash_flows.shape[0]
+    lo = np.full(n, IRR_BRACKET[0])
+    hi = np.full(n, IRR_BRACKET[1])
+    irrs = np.full(n, np.nan)
+    statuses = np.full(n, IRR_NO_ROOT, dtype=object)
+    if n == 0 or cash_flows.shape[1] == 0:
+        return irrs, statuses
+
+    with np.errstate(all="ignore"):
+        f_lo = npv_and_derivatives(lo, cash_flows)[0]
+        f_hi = npv_and_derivatives(hi, cash_flows)[0]
+        finite = np.isfinite(cash_flows).all(axis=1)
+        bracketed = finite & (np.sign(f_lo) * np.sign(f_hi) < 0)
+        fallback = finite & ~bracketed & ((f_lo == 0) | (f_hi == 0))
+        solve = bracketed & (sign_changes(cash_flows) == 1)
+        fallback |= bracketed & ~solve
+
+        rows = np.flatnonzero(solve)
+        cf = cash_flows[rows]
+        lo, hi, f_lo = lo[rows], hi[rows], f_lo[rows]
+        rate = np.clip(np.full(rows.size, 0.1), lo, hi)
+        active = np.ones(rows.size, dtype=bool)
+        for _ in range(IRR_MAX_ITERATIONS):
+            if not active.any():
+                break
+            a = np.flatnonzero(active)
+            f, df, d2f = npv_and_derivatives(rate[a], cf[a])
+            exact = f == 0
+            # Shrink the bracket around the root before stepping.
+            same_as_lo = np.sign(f) == np.sign(f_lo[a])
+            lo[a] = np.where(same_as_lo, rate[a], lo[a])
+            f_lo[a] = np.where(same_as_lo, f, f_lo[a])
+            hi[a] = np.where(same_as_lo, hi[a], rate[a])
+            newton = f / df
+            step = newton / (1 - 0.5 * newton * d2f / df)
+            step = np.where(np.isfinite(step), step, newton)
+            candidate = rate[a] - step
+            outside = ~np.isfinite(candidate) | (candidate <= lo[a]) | (candidate >= hi[a])
+            candidate = np.where(outside, 0.5 * (lo[a] + hi[a]), candidate)
+            done = exact | (np.abs(candidate - rate[a]) <= IRR_XTOL * (1 + np.abs(rate[a])))
+            rate[a] = np.where(exact, rate[a], candidate)
+            active[a[done]] = False
+
+        irrs[rows] = rate
+        statuses[rows] = IRR_CONVERGED
+        fallback[rows[active]] = True
+
+    for i in np.flatnonzero(fallback):
+        nonzero = np.flatnonzero(cash_flows[i])
+        row = cash_flows[i, :nonzero[-1] + 1 if nonzero.size else 0].tolist()
+        try:
+            irrs[i] = brentq(_npv_row, *IRR_BRACKET, args=(row,))
+            statuses[i] = IRR_FALLBACK
+        except (ValueError, RuntimeError):
+            irrs[i] = np.nan
+            statuses[i] = IRR_NO_ROOT
+    return irrs, statuses
+
+
+def pad_series(series):
+    """Stack ragged cash-flow series into an (N, T) matrix padded with trailing zeros."""
+    width = max((len(s) for s in series), default=0)
+    matrix = np.zeros((len(series), width))
+    for i, s in enumerate(series):
+        matrix[i, :len(s)] = s
+    return matrix
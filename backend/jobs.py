@@ -0,0 +1,70 @@
+"""Background worker threads for queued jobs (e.g. Monte Carlo runs).
+
+The queue itself lives in the database: ``claim`` atomically moves one queued
+job to running and returns its id (or None), and ``run`` executes it. Both
+are called inside an app context, so several processes can share one queue.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorkers:
+    """A small pool of daemon threads that claim and run queued jobs."""
+
+    def __init__(self, app, claim, run, workers=1, poll_interval=2.0):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._claim = claim
+        self._run = run
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def run_forever(self):
+        """Run the workers until interrupted (the body of a dedicated worker process)."""
+        self.start()
+        try:
+            while not self._stop.wait(self.poll_interval):
+                pass
+        finally:
+            self.stop()
+
+    def notify(self):
+        """Wake idle workers after a job was queued."""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_pending(self):
+        """Run queued jobs in the calling thread until the queue is empty."""
+        count = 0
+        with self.app.app_context():
+            while (job_id := self._claim()) is not None:
+                self._run(job_id)
+                count += 1
+        return count
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_pending():
+                    continue
+            except Exception:
+                # e.g. tables not migrated yet; keep polling
+                logger.exception("Job worker failed to claim or run a job")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
@@ -0,0 +1,59 @@
+"""Flask JSON provider that serializes API payloads in a single orjson pass.
+
+NaN and +/-inf become null (what clean_for_json used to do in a separate
+recursive walk), NumPy scalars and arrays are written natively, and objects
+exposing ``to_dict`` (SQLAlchemy models) are serialized through it. Arrays
+orjson cannot write directly (non-contiguous views, float16, object dtype)
+fall back to lists.
+"""
+from decimal import Decimal
+
+import numpy as np
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, np.ndarray):
+        return np.ascontiguousarray(obj).tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, sort_keys=False, indent=None):
+    """Serialize obj to UTF-8 JSON bytes (NaN/inf as null)."""
+    option = ORJSON_OPTIONS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's provider; parsing stays on the stdlib.
+
+    Keys are sorted like Flask's default (``sort_keys``); ``indent`` maps to
+    orjson's two-space indent and other ``json.dumps`` options fall back to
+    the stdlib provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        sort_keys = kwargs.pop("sort_keys", self.sort_keys)
+        indent = kwargs.pop("indent", None)
+        if kwargs:
+            return super().dumps(obj, sort_keys=sort_keys, indent=indent, **kwargs)
+        return dumps_bytes(obj, sort_keys, indent).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys), mimetype=self.mimetype)
@@ -0,0 +1,29 @@
+"""add_engine_version_to_valuation_cashflow
+
+Revision ID: 5f2d8a6c1e93
+Revises: 3b7c91e0f2a4
+Create Date: 2026-10-17 18:22:09.734511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2d8a6c1e93'
+down_revision: Union[str, Sequence[str], None] = '3b7c91e0f2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows get NULL, so they count as stale until `run.py backfill` rewrites them
+    op.add_column('valuation_cashflow', sa.Column('engine_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('valuation_cashflow', 'engine_version')
@@ -0,0 +1,593 @@
+"""Vectorized Monte Carlo valuation over (simulations x years) arrays.
+
+Sampled inputs are passed to ``fast_dcf.dcf_kernel`` as (n, 1) columns next
+to the scalar base inputs, so every simulation of a chunk is priced in one
+broadcast pass and its IRRs are solved together with ``irr_batch``.
+
+Simulations are split into chunks whose boundaries depend only on the
+request. Each chunk draws its samples from its own generator, seeded by
+``SeedSequence(seed).spawn``, so a seeded run gives the same results whether
+the chunks run inline or on any number of pool workers.
+
+Besides plain pseudo-random draws, inputs can be sampled quasi-randomly
+("sobol": one scrambled Sobol sequence, each chunk fast-forwarded to its
+first point; "lhs": a Latin hypercube per chunk) and mapped through each
+distribution's inverse CDF, which stabilizes percentiles with far fewer
+simulations.
+
+Any DCF input except holding_period can be sampled. A correlation matrix over
+some of the sampled fields couples them through a Gaussian copula: standard
+normals are mixed by a factor of the matrix, mapped to uniforms and then
+through each field's inverse CDF, all in one vectorized pass per chunk.
+
+Rent growth, discount rate and vacancy can instead follow per-year AR(1)
+paths ("distribution": "ar1"), drawn as (simulations x years) matrices. The
+kernel compounds a constant rate, so growth and discount paths are passed to
+it as the geometric-mean rate to date, which reproduces the compounded path.
+
+Chunk sizes come from a memory plan: the peak working set of pricing a
+chunk is about MONTE_CARLO_WORKING_ARRAYS float64 (chunk x years) arrays,
+so a RAM ceiling bounds the chunk size once the retained result arrays are
+accounted for.
+
+On the pool, only a small window of chunks per worker is submitted at a
+time, so a consumer that stops early (client disconnect, target precision
+met) leaves at most one running chunk per worker; closing the generator
+cancels the rest.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from scipy.signal import lfilter
+from scipy.special import ndtr, ndtri
+from scipy.stats import qmc
+
+from fast_dcf import DCF_INPUT_FIELDS, dcf_kernel, normalize_inputs
+from irr_solver import irr_batch
+
+# Cells (simulations x years) per chunk: ~2 MB per float64 cash-flow column.
+MONTE_CARLO_CHUNK_CELLS = 250_000
+# Peak live float64 (chunk x years) arrays while pricing a chunk (~17 measured, plus path draws)
+MONTE_CARLO_WORKING_ARRAYS = 24
+# Result arrays (npvs, irrs) may be kept in float32 to halve their footprint
+RESULT_DTYPES = ("float64", "float32")
+# Aim for at least this many chunks so long runs report progress.
+MONTE_CARLO_MIN_CHUNKS = 20
+# Smaller runs are cheaper inline than shipped to worker processes.
+MONTE_CARLO_PARALLEL_THRESHOLD = 20_000
+# Chunks submitted to the pool ahead of results, per worker
+MONTE_CARLO_SUBMIT_WINDOW = 2
+# Pool size cap; memory plans assume this many chunks in flight whatever the CPU count,
+# so a seeded run is chunked (and reproduces) the same on every machine
+MONTE_CARLO_MAX_WORKERS = 16
+SAMPLING_METHODS = ("random", "sobol", "lhs")
+# The cash-flow horizon sets the array shape, so it cannot vary per simulation
+STOCHASTIC_FIELDS = tuple(field for field in DCF_INPUT_FIELDS if field != "holding_period")
+# Inputs that may vary year by year ("ar1"); debt is fixed-rate, so interest_rate is not one
+PATH_FIELDS = ("annual_rent_growth", "discount_rate", "vacancy_rate")
+QMC_SPAWN_KEY = 2**32
+
+# Chart payloads sent instead of the raw arrays (see chart_payload)
+MONTE_CARLO_CDF_QUANTILES = (0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+# NumPy's adaptive bin-width rules, accepted in place of a bin count
+HISTOGRAM_BIN_RULES = ("auto", "fd", "doane", "scott", "stone", "rice", "sturges", "sqrt")
+MAX_HISTOGRAM_BINS = 200
+MAX_SCATTER_SAMPLE = 10_000
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def generate_random_variable(distribution_config, num_simulations, rng):
+    """Draw samples for one input from a distribution config."""
+    dist = distribution_config.get("distribution")
+    if dist == "normal":
+        return rng.normal(distribution_config["mean"], distribution_config["stddev"], num_simulations)
+    elif dist == "pareto":
+        a = distribution_config.get("shape", 2)
+        min_val = distribution_config.get("mean", 1)
+        return min_val * (1 + rng.pareto(a, num_simulations))
+    else:
+        return np.full(num_simulations, distribution_config.get("mean", 0))
+
+
+def inverse_cdf(distribution_config, u):
+    """Map uniforms in (0, 1) to samples with the same law as generate_random_variable."""
+    dist = distribution_config.get("distribution")
+    if dist == "normal":
+        return distribution_config["mean"] + distribution_config["stddev"] * ndtri(u)
+    elif dist == "pareto":
+        # NumPy's pareto is Lomax, so min_val * (1 + X) is Pareto(a) with scale min_val
+        a = distribution_config.get("shape", 2)
+        min_val = distribution_config.get("mean", 1)
+        return min_val * (1 - u) ** (-1 / a)
+    else:
+        return np.full(len(u), distribution_config.get("mean", 0))
+
+
+def is_path(distribution_config):
+    return distribution_config.get("distribution") == "ar1"
+
+
+def ar1_paths(distribution_config, num_simulations, horizon, rng, dtype="float64"):
+    """(num_simulations, horizon) AR(1) paths; column ``t - 1`` is year ``t``.
+
+    ``x_t = mean + phi * (x_{t-1} - mean) + stddev * e_t``. Year 1 follows
+    from ``initial`` when given, otherwise it is drawn from the stationary
+    distribution.
+    """
+    mean = distribution_config["mean"]
+    stddev = distribution_config["stddev"]
+    phi = distribution_config.get("phi", 0.5)
+    deviations = stddev * rng.standard_normal((num_simulations, horizon), dtype=dtype)
+    if not horizon:
+        return deviations
+    initial = distribution_config.get("initial")
+    if initial is None:
+        deviations[:, 0] /= np.sqrt(1 - phi * phi)
+        start = 0.0
+    else:
+        start = phi * (initial - mean)
+    zi = np.full((num_simulations, 1), start, dtype=dtype)
+    return mean + lfilter([1.0], [1.0, -phi], deviations, axis=1, zi=zi)[0].astype(dtype, copy=False)
+
+
+def path_kernel_input(field, path):
+    """Turn per-year values into a (simulations, years) input for ``dcf_kernel``.
+
+    The kernel compounds one rate, ``(1 + g) ** (t - 1)`` for rent and
+    ``(1 + r) ** t`` for discounting, so those columns hold the geometric-mean
+    rate to date. Year 0 (and year 1 for rent) never compounds and reuses the
+    first value.
+    """
+    path = np.asarray(path, dtype=float)
+    if not path.shape[1]:
+        return np.zeros((path.shape[0], 1))
+    first = path[:, :1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if field == "annual_rent_growth":
+            logs = np.cumsum(np.log1p(path[:, 1:] / 100), axis=1)
+            rates = 100 * np.expm1(logs / np.arange(1, path.shape[1]))
+            return np.hstack([first, first, rates])
+        if field == "discount_rate":
+            logs = np.cumsum(np.log1p(path / 100), axis=1)
+            return np.hstack([first, 100 * np.expm1(logs / np.arange(1, path.shape[1] + 1))])
+    return np.hstack([first, path])
+
+
+def validate_distribution(field, config):
+    """Check one distribution config. Returns (True, None) or (False, error_message)."""
+    if not isinstance(config, dict):
+        return False, f"{field} distribution must be an object"
+    if is_path(config):
+        if field not in PATH_FIELDS:
+            return False, f"ar1 paths are supported for: {', '.join(PATH_FIELDS)}"
+        phi, initial = config.get("phi", 0.5), config.get("initial")
+        if isinstance(phi, bool) or not isinstance(phi, (int, float)) or not -1 < phi < 1:
+            return False, f"{field} ar1 phi must be a number in (-1, 1)"
+        if initial is not None and (isinstance(initial, bool) or not isinstance(initial, (int, float))):
+            return False, f"{field} ar1 initial must be a number"
+    required = {"normal": ("mean", "stddev"), "ar1": ("mean", "stddev")}.get(config.get("distribution"), ())
+    for key in ("mean", "stddev", "shape"):
+        value = config.get(key)
+        if key in required and value is None:
+            return False, f"{field} distribution requires {key}"
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return False, f"{field} distribution {key} must be a number"
+    if config.get("stddev", 0) < 0 or config.get("shape", 1) <= 0:
+        return False, f"{field} distribution needs stddev >= 0 and shape > 0"
+    return True, None
+
+
+def parse_correlation(value, fields):
+    """Validate ``{"fields": [...], "matrix": [[...]]}`` over sampled fields.
+
+    Returns (True, correlation) or (False, error_message); correlation is None
+    when value is None.
+    """
+    if value is None:
+        return True, None
+    if not isinstance(value, dict) or not isinstance(value.get("fields"), list):
+        return False, "correlation must be an object with fields and matrix"
+    names = value["fields"]
+    if len(set(names)) != len(names) or any(name not in fields for name in names):
+        return False, "correlation fields must be distinct sampled fields"
+    try:
+        matrix = np.array(value.get("matrix"), dtype=float)
+    except (TypeError, ValueError):
+        return False, "correlation matrix must be numeric"
+    if matrix.shape != (len(names), len(names)):
+        return False, "correlation matrix must be square with one row per field"
+    if (
+        not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1)
+        or np.abs(matrix).max(initial=0) > 1
+    ):
+        return False, "correlation matrix must be symmetric with a unit diagonal and entries in [-1, 1]"
+    if len(names) and np.linalg.eigvalsh(matrix).min() < -1e-10:
+        return False, "correlation matrix must be positive semi-definite"
+    return True, {"fields": names, "matrix": matrix.tolist()}
+
+
+def correlation_factor(fields, correlation):
+    """Matrix ``F`` with ``F @ F.T`` equal to the correlation over ``fields``.
+
+    Fields outside the correlation stay independent (identity rows). Returns
+    None without a correlation so uncorrelated runs keep their plain draws.
+    """
+    if not correlation:
+        return None
+    matrix = np.array(correlation["matrix"], dtype=float)
+    try:
+        block = np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        # Semi-definite (e.g. perfectly correlated fields): factor via eigenvalues
+        values, vectors = np.linalg.eigh(matrix)
+        block = vectors * np.sqrt(np.clip(values, 0, None))
+    index = [fields.index(name) for name in correlation["fields"]]
+    factor = np.eye(len(fields))
+    factor[np.ix_(index, index)] = block
+    return factor
+
+
+def sample_inputs(
+    distributions, start, stop, rng, sampling="random", qmc_seed=None, factor=None, horizon=0, dtype="float64"
+):
+    """Samples of every distributed input for simulations ``start:stop``.
+
+    Per-simulation inputs are (n,) arrays; ``factor`` (see correlation_factor)
+    correlates them through a Gaussian copula. AR(1) inputs are (n, horizon)
+    paths drawn from ``rng`` after the others, outside the copula and QMC.
+    """
+    paths = {field: config for field, config in distributions.items() if is_path(config)}
+    distributions = {field: config for field, config in distributions.items() if not is_path(config)}
+    samples = _sample_scalars(distributions, start, stop, rng, sampling, qmc_seed, factor)
+    for field, config in paths.items():
+        samples[field] = ar1_paths(config, stop - start, horizon, rng, dtype)
+    return samples
+
+
+def _sample_scalars(distributions, start, stop, rng, sampling, qmc_seed, factor):
+    if sampling == "random" and factor is None:
+        return {
+            field: generate_random_variable(config, stop - start, rng)
+            for field, config in distributions.items()
+        }
+    if not distributions:
+        return {}
+    if sampling == "random":
+        u = rng.random((stop - start, len(distributions)))
+    else:
+        with warnings.catch_warnings():
+            # Balance warnings for sample counts that are not powers of two
+            warnings.simplefilter("ignore", UserWarning)
+            if sampling == "sobol":
+                engine = qmc.Sobol(len(distributions), scramble=True, seed=np.random.default_rng(qmc_seed))
+                if start:
+                    engine.fast_forward(start)
+            else:
+                engine = qmc.LatinHypercube(len(distributions), seed=rng)
+            u = engine.random(stop - start)
+    if factor is not None:
+        u = ndtr(ndtri(u) @ factor.T)
+    # Keep the infinite tails of the inverse CDFs out of reach
+    u = np.clip(u, np.finfo(float).eps, 1 - np.finfo(float).eps)
+    return {field: inverse_cdf(config, u[:, i]) for i, (field, config) in enumerate(distributions.items())}
+
+
+def monte_carlo_chunk_size(num_simulations, holding_period, properties=1):
+    by_memory = max(1, MONTE_CARLO_CHUNK_CELLS // ((holding_period + 1) * properties))
+    by_progress = max(1, -(-num_simulations // MONTE_CARLO_MIN_CHUNKS))
+    return min(by_memory, by_progress)
+
+
+def monte_carlo_memory_plan(
+    num_simulations, holding_period, properties=1, keep_samples=True, dtype="float64", memory_limit=None
+):
+    """Chunk size and estimated peak bytes of a run, within ``memory_limit`` if given.
+
+    Retained results cost two values plus a completion flag per simulation;
+    each chunk in flight costs its pricing working set. Pooled runs assume
+    MONTE_CARLO_MAX_WORKERS chunks in flight rather than the actual worker
+    count, since chunking decides the per-chunk seeds.
+    Raises ValueError when even one-simulation chunks cannot fit.
+    """
+    cells_per_simulation = (holding_period + 1) * properties
+    chunk_bytes_per_simulation = cells_per_simulation * MONTE_CARLO_WORKING_ARRAYS * 8
+    retained = num_simulations * (2 * np.dtype(dtype).itemsize + 1) if keep_samples else 0
+    chunk = monte_carlo_chunk_size(num_simulations, holding_period, properties)
+    in_flight = MONTE_CARLO_MAX_WORKERS if num_simulations >= MONTE_CARLO_PARALLEL_THRESHOLD else 1
+    if memory_limit:
+        by_limit = (memory_limit - retained) // in_flight // chunk_bytes_per_simulation
+        if by_limit < 1:
+            needed = retained + in_flight * chunk_bytes_per_simulation
+            raise ValueError(
+                f"A run of {num_simulations} simulations needs at least {needed / 2**20:.0f} MB, "
+                f"over the {memory_limit / 2**20:.0f} MB limit"
+            )
+        chunk = min(chunk, int(by_limit))
+    return {"chunk_size": chunk, "estimated_bytes": retained + in_flight * chunk * chunk_bytes_per_simulation}
+
+
+def simulate_chunk(base_params, samples):
+    """NPVs and IRRs (decimal) for one chunk of sampled inputs."""
+    params = dict(base_params)
+    n = 1
+    for field, values in samples.items():
+        values = np.asarray(values)
+        params[field] = path_kernel_input(field, values) if values.ndim == 2 else values.astype(float)[:, None]
+        n = len(values)
+    years = np.arange(base_params["holding_period"] + 1)[None, :]
+    columns = dcf_kernel(params, years)
+    shape = (n, years.shape[1])
+    net_cash_flow = np.broadcast_to(columns["net_cash_flow"], shape)
+    npvs = np.broadcast_to(columns["cumulative_pv"], shape)[:, -1]
+    irrs, _ = irr_batch(net_cash_flow)
+    return np.array(npvs), irrs
+
+
+def simulate_seeded_chunk(
+    base_params, distributions, seed_sequence, start, stop, sampling="random", qmc_seed=None, factor=None,
+    dtype="float64",
+):
+    """Sample and price simulations ``start:stop``; runs in pool workers."""
+    rng = np.random.default_rng(seed_sequence)
+    samples = sample_inputs(
+        distributions, start, stop, rng, sampling, qmc_seed, factor, base_params["holding_period"], dtype
+    )
+    npvs, irrs = simulate_chunk(base_params, samples)
+    return start, npvs.astype(dtype, copy=False), irrs.astype(dtype, copy=False)
+
+
+def get_process_pool(max_workers):
+    """Return the persistent worker pool, (re)creating it if needed."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a threaded WSGI server is unsafe
+            _pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = max_workers
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def default_workers():
+    return min(os.cpu_count() or 1, MONTE_CARLO_MAX_WORKERS)
+
+
+def _chunk_seeds(num_simulations, chunk, seed, sampling):
+    """Chunk starts with one child seed each, plus the shared Sobol scrambling seed."""
+    starts = range(0, num_simulations, chunk)
+    root = np.random.SeedSequence(seed)
+    # One scrambling for the whole Sobol sequence, whatever the chunking; its
+    # spawn key is past any chunk index so it never reuses a chunk's stream
+    qmc_seed = np.random.SeedSequence(root.entropy, spawn_key=(QMC_SPAWN_KEY,)) if sampling == "sobol" else None
+    return list(zip(root.spawn(len(starts)), starts)), qmc_seed
+
+
+def _run_chunks(simulate, tasks, num_simulations, workers, poll=None):
+    """Run ``simulate(*task)`` inline or on the pool, yielding ``(completed, *result)``.
+
+    Every result starts with ``(start, npvs, ...)``. With ``poll`` seconds,
+    pool runs also yield None whenever no chunk finished within ``poll``, so
+    the consumer can report progress or notice a disconnect meanwhile.
+    """
+    completed = 0
+    if workers <= 1 or len(tasks) == 1 or num_simulations < MONTE_CARLO_PARALLEL_THRESHOLD:
+        for task in tasks:
+            result = simulate(*task)
+            completed += len(result[1])
+            yield (completed, *result)
+        return
+
+    pool = get_process_pool(workers)
+    queue = iter(tasks)
+    pending = {pool.submit(simulate, *task) for task in itertools.islice(queue, MONTE_CARLO_SUBMIT_WINDOW * workers)}
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            if not done:
+                yield None
+                continue
+            pending |= {pool.submit(simulate, *task) for task in itertools.islice(queue, len(done))}
+            for future in done:
+                result = future.result()
+                completed += len(result[1])
+                yield (completed, *result)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def in_start_order(chunks):
+    """Re-yield ``(completed, start, npvs, ...)`` chunks in order of ``start``.
+
+    Chunks that finish early are held until the ones before them arrive, so
+    consumers see the same sequence however the pool schedules the work
+    (at most the submit window is held). ``completed`` then counts the
+    simulations yielded so far; idle ticks (None) pass straight through.
+    """
+    held = {}
+    next_start = completed = 0
+    for chunk in chunks:
+        if chunk is None:
+            yield None
+            continue
+        held[chunk[1]] = chunk
+        while next_start in held:
+            chunk = held.pop(next_start)
+            completed += len(chunk[2])
+            next_start += len(chunk[2])
+            yield (completed, *chunk[1:])
+
+
+def run_monte_carlo(
+    base_input, distributions, num_simulations, seed=None, workers=1, sampling="random", chunk_size=None,
+    correlation=None, dtype="float64", poll=None,
+):
+    """Yield ``(completed, start, npvs, irrs)`` as chunks of simulations finish.
+
+    ``distributions`` maps DCF input fields to distribution configs that
+    override ``base_input``; ``correlation`` (see parse_correlation) couples
+    some of them. Chunks may finish out of order; ``start`` is the
+    index of a chunk's first simulation and ``completed`` the running total.
+    ``chunk_size`` caps the memory-based chunk size (e.g. from
+    monte_carlo_memory_plan, or to check for convergence more often) and
+    ``dtype`` sets the precision of path draws and returned arrays; pricing
+    is always float64. ``poll`` adds idle ticks (see _run_chunks).
+    """
+    base_params = normalize_inputs(base_input)
+    chunk = monte_carlo_chunk_size(num_simulations, base_params["holding_period"])
+    if chunk_size:
+        chunk = min(chunk, chunk_size)
+    seeds, qmc_seed = _chunk_seeds(num_simulations, chunk, seed, sampling)
+    factor = correlation_factor([field for field, config in distributions.items() if not is_path(config)], correlation)
+    tasks = [
+        (
+            base_params, distributions, seed_sequence, start, min(start + chunk, num_simulations),
+            sampling, qmc_seed, factor, dtype,
+        )
+        for seed_sequence, start in seeds
+    ]
+    return _run_chunks(simulate_seeded_chunk, tasks, num_simulations, workers, poll)
+
+
+def simulate_portfolio_chunk(property_params, macro_shifts, noise, num_paths):
+    """Portfolio NPVs, IRRs and per-property NPVs for one chunk of paths.
+
+    ``property_params`` maps each DCF field to a (P,) array, one entry per
+    property; ``macro_shifts`` maps fields to (n,) shifts shared by every
+    property on a path and ``noise`` maps fields to (n, P) property-specific
+    shifts. The deals are priced on one (paths x properties x years) grid,
+    with years past a property's holding period left at zero.
+    """
+    num_properties = len(property_params["holding_period"])
+    params = {field: np.asarray(values, dtype=float)[None, :, None] for field, values in property_params.items()}
+    params["holding_period"] = np.asarray(property_params["holding_period"])[None, :, None]
+    for field, shift in macro_shifts.items():
+        params[field] = params[field] + shift[:, None, None]
+    for field, shift in noise.items():
+        params[field] = params[field] + shift[:, :, None]
+    years = np.arange(int(params["holding_period"].max()) + 1)[None, None, :]
+    columns = dcf_kernel(params, years)
+    shape = (num_paths, num_properties, years.shape[-1])
+    property_npvs = np.broadcast_to(columns["present_value"], shape).sum(axis=-1)
+    portfolio_cash_flows = np.broadcast_to(columns["net_cash_flow"], shape).sum(axis=1)
+    irrs, _ = irr_batch(portfolio_cash_flows)
+    return property_npvs.sum(axis=1), irrs, property_npvs
+
+
+def simulate_seeded_portfolio_chunk(
+    property_params, macro, noise_stddevs, seed_sequence, start, stop, sampling="random", qmc_seed=None, factor=None
+):
+    """Sample macro draws and property noise for paths ``start:stop`` and price them."""
+    rng = np.random.default_rng(seed_sequence)
+    macro_shifts = sample_inputs(macro, start, stop, rng, sampling, qmc_seed, factor)
+    num_properties = len(property_params["holding_period"])
+    noise = {field: rng.normal(0, stddev, (stop - start, num_properties)) for field, stddev in noise_stddevs.items()}
+    npvs, irrs, property_npvs = simulate_portfolio_chunk(property_params, macro_shifts, noise, stop - start)
+    return start, npvs, irrs, property_npvs
+
+
+def run_portfolio_monte_carlo(
+    property_inputs, macro, noise_stddevs, num_simulations, seed=None, workers=1, sampling="random",
+    correlation=None, chunk_size=None, poll=None,
+):
+    """Yield ``(completed, start, npvs, irrs, property_npvs)`` for a joint portfolio run.
+
+    Every property takes its own inputs plus the path's macro shifts (drawn
+    from ``macro`` configs, optionally correlated) plus independent normal
+    noise with ``noise_stddevs``. ``npvs`` are portfolio NPVs (the sum of
+    property NPVs), ``irrs`` the IRRs of the summed net cash flows and
+    ``property_npvs`` the (n, P) standalone NPVs. Chunks hold at most
+    ``MONTE_CARLO_CHUNK_CELLS`` path x property x year cells; ``poll`` is as
+    for run_monte_carlo.
+    """
+    rows = [normalize_inputs(inputs) for inputs in property_inputs]
+    property_params = {field: np.array([row[field] for row in rows]) for field in rows[0]}
+    horizon = int(property_params["holding_period"].max())
+    chunk = monte_carlo_chunk_size(num_simulations, horizon, len(rows))
+    if chunk_size:
+        chunk = min(chunk, chunk_size)
+    seeds, qmc_seed = _chunk_seeds(num_simulations, chunk, seed, sampling)
+    factor = correlation_factor(list(macro), correlation)
+    tasks = [
+        (
+            property_params, macro, noise_stddevs, seed_sequence, start, min(start + chunk, num_simulations),
+            sampling, qmc_seed, factor,
+        )
+        for seed_sequence, start in seeds
+    ]
+    return _run_chunks(simulate_seeded_portfolio_chunk, tasks, num_simulations, workers, poll)
+
+
+def histogram(values, bins):
+    """Histogram of finite values; ``bins`` is a count or a NumPy bin rule (adaptive)."""
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {"edges": [], "counts": []}
+    edges = np.histogram_bin_edges(values, bins)
+    if len(edges) - 1 > MAX_HISTOGRAM_BINS:
+        edges = np.histogram_bin_edges(values, MAX_HISTOGRAM_BINS)
+    counts, _ = np.histogram(values, edges)
+    return {"edges": edges, "counts": counts}
+
+
+def chart_payload(npvs, irrs, bins=20, sample_size=500, seed=None):
+    """Histograms, a CDF at fixed quantiles and a random (npv, irr) sample.
+
+    A few kilobytes regardless of the number of simulations; the sample is
+    drawn from ``seed`` so seeded runs return the same scatter points.
+    """
+    quantiles = np.array(MONTE_CARLO_CDF_QUANTILES)
+    finite_irrs = irrs[np.isfinite(irrs)]
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(len(npvs), size=min(sample_size, len(npvs)), replace=False))
+    return {
+        "histograms": {"npv": histogram(npvs, bins), "irr": histogram(irrs, bins)},
+        "cdf": {
+            "quantiles": quantiles,
+            "npv": np.nanpercentile(npvs, 100 * quantiles),
+            "irr": np.percentile(finite_irrs, 100 * quantiles) if finite_irrs.size else None,
+        },
+        "sample": {"npv": npvs[sample], "irr": irrs[sample]},
+    }
+
+
+def parse_chart_options(value):
+    """Validate the ``histogram`` request option. Returns (True, options) or (False, error_message)."""
+    if value is None:
+        return True, None
+    if value is True:
+        value = {}
+    if not isinstance(value, dict):
+        return False, "histogram must be an object with optional bins and sample_size"
+    bins = value.get("bins", 20)
+    if isinstance(bins, bool) or not (
+        (isinstance(bins, int) and 1 <= bins <= MAX_HISTOGRAM_BINS) or bins in HISTOGRAM_BIN_RULES
+    ):
+        return False, f"bins must be 1-{MAX_HISTOGRAM_BINS} or one of: {', '.join(HISTOGRAM_BIN_RULES)}"
+    sample_size = value.get("sample_size", 500)
+    if (
+        isinstance(sample_size, bool) or not isinstance(sample_size, int)
+        or not 0 <= sample_size <= MAX_SCATTER_SAMPLE
+    ):
+        return False, f"sample_size must be an integer from 0 to {MAX_SCATTER_SAMPLE}"
+    return True, {"bins": bins, "sample_size": sample_size}
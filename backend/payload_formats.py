@@ -0,0 +1,74 @@
+"""Compact encodings for numeric API payloads (cash-flow tables, simulation results).
+
+"json" keeps the historical list of row dicts; "columnar" is a dict of arrays;
+"binary" is a little-endian float64 block behind a small JSON header::
+
+    uint32 LE header length | JSON header (space-padded to 8 bytes) | float64 LE data
+
+The header is ``{"columns": [...], "length": n, "dtype": "<f8"}`` and the data
+holds each column's ``n`` values one column after another, so a client can view
+column ``k`` as ``Float64Array(buffer, offset + 8 * n * k, n)`` without parsing.
+"""
+import base64
+import json
+import struct
+import zlib
+
+import numpy as np
+
+RESPONSE_FORMATS = ("json", "columnar", "binary")
+BINARY_MIMETYPE = "application/octet-stream"
+
+
+def parse_response_format(value, accept=None):
+    """Validate a response format. Returns (True, format) or (False, error_message).
+
+    Without an explicit value, an Accept header preferring octet-stream selects binary.
+    """
+    if not value:
+        value = "binary" if accept and accept.best == BINARY_MIMETYPE else "json"
+    if value not in RESPONSE_FORMATS:
+        return False, f"Format must be one of: {', '.join(RESPONSE_FORMATS)}."
+    return True, value
+
+
+def rows_to_columns(rows):
+    """Turn a list of row dicts into a dict of lists keyed by column name."""
+    if not rows:
+        return {}
+    return {key: [row[key] for row in rows] for key in rows[0]}
+
+
+def encode_binary(columns):
+    """Pack equal-length numeric columns into the binary payload described above."""
+    names = list(columns)
+    data = np.vstack([np.asarray(columns[name], dtype="<f8") for name in names]) if names else np.empty((0, 0), "<f8")
+    header = json.dumps({"columns": names, "length": int(data.shape[1]), "dtype": "<f8"}).encode("utf-8")
+    header += b" " * (-(len(header) + 4) % 8)
+    return struct.pack("<I", len(header)) + header + data.tobytes()
+
+
+def decode_binary(payload):
+    """Inverse of encode_binary; returns a dict of float64 arrays."""
+    (header_length,) = struct.unpack_from("<I", payload)
+    header = json.loads(payload[4:4 + header_length])
+    data = np.frombuffer(payload, dtype=header["dtype"], offset=4 + header_length)
+    data = data.reshape(len(header["columns"]), header["length"])
+    return {name: data[i] for i, name in enumerate(header["columns"])}
+
+
+def encode_float64_base64(values):
+    """Base64 of raw little-endian float64, for numeric arrays inside text streams (SSE)."""
+    return base64.b64encode(np.asarray(values, dtype="<f8").tobytes()).decode("ascii")
+
+
+def compress_float64(values):
+    """zlib-compress float64 values after byte-shuffling (like blosc) for storage."""
+    raw = np.ascontiguousarray(values, dtype="<f8").view(np.uint8).reshape(-1, 8)
+    return zlib.compress(raw.T.tobytes(), 6)
+
+
+def decompress_float64(blob):
+    """Inverse of compress_float64."""
+    shuffled = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(8, -1)
+    return np.ascontiguousarray(shuffled.T).view("<f8").ravel()
@@ -6,13 +6,15 @@ Usage: python run.py <command>
 Commands:
     dev         - Start development server
     test        - Run all tests
+    backfill    - Materialize cash flows for existing valuations
+    worker      - Run queued Monte Carlo jobs until interrupted
     help        - Show this help message
 """
 
 import sys
 import subprocess
 import os
-from app import create_app, db
+from app import create_app, db, Valuation, materialize_cash_flows
 
 # Helper to get venv bin path
 VENV_BIN = os.path.join(os.path.dirname(__file__), 'venv', 'bin')
@@ -85,6 +87,29 @@ def init_db():
     print("✅ Database initialized!")
     return True
 
+def backfill_cash_flows():
+    """Populate the valuation_cashflow table for every existing valuation."""
+    print("🔁 Backfilling materialized cash flows...")
+    app = create_app()
+    with app.app_context():
+        valuations = Valuation.query.all()
+        for valuation in valuations:
+            materialize_cash_flows(valuation)
+        db.session.commit()
+    print(f"✅ Backfilled {len(valuations)} valuations!")
+    return True
+
+def run_worker():
+    """Claim and run queued Monte Carlo jobs (MONTE_CARLO_JOB_WORKERS threads)."""
+    print("🧮 Running Monte Carlo job workers...")
+    print("⏹️  Press Ctrl+C to stop")
+    app = create_app()
+    try:
+        app.extensions["monte_carlo_jobs"].run_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Job workers stopped")
+    return True
+
 def main():
     if len(sys.argv) != 2:
         print("❌ Usage: python run.py <command>")
@@ -105,6 +130,10 @@ def main():
         success = run_downgrade()
     elif command == "initdb":
         success = init_db()
+    elif command == "backfill":
+        success = backfill_cash_flows()
+    elif command == "worker":
+        success = run_worker()
     elif command == "help":
         show_help()
         success = True
@@ -0,0 +1,152 @@
+"""Vectorized sensitivity analysis of one valuation.
+
+A two-way grid varies two inputs over value ranges: the first field is passed
+to ``fast_dcf.dcf_kernel`` as an (nx, 1, 1) array and the second as (1, ny, 1),
+so every cell of the grid is priced in one broadcast pass over
+(nx, ny, years) and its IRRs are solved together with ``irr_batch``.
+
+A tornado bumps each of several inputs down and up from the base value, one at
+a time; all 2k scenarios are stacked into (2k, 1) parameter columns and
+priced in a single pass as well.
+"""
+import numpy as np
+
+from fast_dcf import DCF_INPUT_FIELDS, MAX_HOLDING_PERIOD, dcf_kernel, is_finite_number
+from irr_solver import irr_batch
+
+SENSITIVITY_MODES = ("grid", "tornado")
+# Values per grid axis (a 100 x 100 grid is 10,000 deals)
+MAX_SENSITIVITY_STEPS = 100
+
+
+def parse_sensitivity_axis(value):
+    """Validate ``{"field", "values": [...]}`` or ``{"field", "min", "max", "steps"}``.
+
+    Returns (True, {"field", "values"}) or (False, error_message).
+    """
+    if not isinstance(value, dict) or value.get("field") not in DCF_INPUT_FIELDS:
+        return False, f"Each axis needs a field, one of: {', '.join(DCF_INPUT_FIELDS)}"
+    field = value["field"]
+    if "values" in value:
+        values = value["values"]
+        if not isinstance(values, list) or not values or not all(is_finite_number(v) for v in values):
+            return False, f"{field} values must be a non-empty list of numbers"
+    else:
+        low, high, steps = value.get("min"), value.get("max"), value.get("steps", 11)
+        if not is_finite_number(low) or not is_finite_number(high) or low > high:
+            return False, f"{field} needs numeric min <= max, or a list of values"
+        if isinstance(steps, bool) or not isinstance(steps, int) or steps < 1:
+            return False, f"{field} steps must be a positive integer"
+        values = np.linspace(low, high, steps).tolist()
+    if len(values) > MAX_SENSITIVITY_STEPS:
+        return False, f"An axis may have at most {MAX_SENSITIVITY_STEPS} values"
+    if field == "holding_period" and any(v < 0 or v != int(v) or v > MAX_HOLDING_PERIOD for v in values):
+        return False, f"holding_period values must be whole years from 0 to {MAX_HOLDING_PERIOD}"
+    return True, {"field": field, "values": [float(v) for v in values]}
+
+
+def parse_tornado_bumps(value):
+    """Validate ``{field: bump}`` (each field moved by -bump and +bump).
+
+    Returns (True, bumps) or (False, error_message).
+    """
+    if not isinstance(value, dict) or not value:
+        return False, "bumps must be a non-empty object of field: bump"
+    for field, bump in value.items():
+        if field not in DCF_INPUT_FIELDS:
+            return False, f"Unknown valuation field: {field}"
+        if not is_finite_number(bump) or bump <= 0:
+            return False, f"{field} bump must be a positive number"
+        if field == "holding_period" and (bump != int(bump) or bump > MAX_HOLDING_PERIOD):
+            return False, f"holding_period bump must be whole years up to {MAX_HOLDING_PERIOD}"
+    return True, {field: float(bump) for field, bump in value.items()}
+
+
+def parse_sensitivity_request(data):
+    """Validate a grid (``x``, ``y`` axes) or tornado (``bumps``) request.
+
+    Returns (True, spec) with ``mode`` and the parsed axes or bumps, or
+    (False, error_message).
+    """
+    mode = data.get("mode", "grid")
+    if mode not in SENSITIVITY_MODES:
+        return False, f"mode must be one of: {', '.join(SENSITIVITY_MODES)}"
+    if mode == "tornado":
+        is_valid, bumps = parse_tornado_bumps(data.get("bumps"))
+        return (True, {"mode": mode, "bumps": bumps}) if is_valid else (False, bumps)
+    axes = {}
+    for name in ("x", "y"):
+        is_valid, axis = parse_sensitivity_axis(data.get(name))
+        if not is_valid:
+            return False, f"{name}: {axis}"
+        axes[name] = axis
+    if axes["x"]["field"] == axes["y"]["field"]:
+        return False, "The two axes must vary different fields"
+    return True, {"mode": mode, **axes}
+
+
+def price_scenarios(params):
+    """NPVs and IRRs (decimal) of broadcast ``params`` whose last axis is years.
+
+    Array inputs must have a trailing axis of length 1; the result has their
+    broadcast shape without it. Cells past a scenario's holding period are
+    zero, so varying holding periods share one padded year grid.
+    """
+    horizon = int(np.max(params["holding_period"]))
+    columns = dcf_kernel(params, np.arange(horizon + 1))
+    shape = np.broadcast_shapes(*(np.shape(value) for value in params.values()), (horizon + 1,))
+    net_cash_flow = np.broadcast_to(columns["net_cash_flow"], shape)
+    npvs = np.broadcast_to(columns["present_value"], shape).sum(axis=-1)
+    irrs, _ = irr_batch(net_cash_flow.reshape(-1, shape[-1]))
+    return npvs, irrs.reshape(shape[:-1])
+
+
+def _base_result(base_params):
+    npv, irr = price_scenarios(base_params)
+    return {"npv": float(npv), "irr": float(irr) * 100}
+
+
+def sensitivity_grid(base_params, x_axis, y_axis):
+    """NPV and IRR (percent) grids, indexed ``[i][j]`` for x value i and y value j."""
+    x_values, y_values = np.array(x_axis["values"]), np.array(y_axis["values"])
+    params = dict(base_params)
+    params[x_axis["field"]] = x_values[:, None, None]
+    params[y_axis["field"]] = y_values[None, :, None]
+    npvs, irrs = price_scenarios(params)
+    return {
+        "x": x_axis,
+        "y": y_axis,
+        "npv": npvs,
+        "irr": irrs * 100,
+        "base": _base_result(base_params),
+    }
+
+
+def tornado(base_params, bumps):
+    """NPV/IRR at each field's low and high bump, sorted by NPV swing (widest first)."""
+    fields = list(bumps)
+    params = {field: np.full((2 * len(fields), 1), value, dtype=float) for field, value in base_params.items()}
+    for i, field in enumerate(fields):
+        params[field][2 * i] = base_params[field] - bumps[field]
+        params[field][2 * i + 1] = base_params[field] + bumps[field]
+    # Holding periods are bumped no further than zero and MAX_HOLDING_PERIOD years
+    params["holding_period"] = np.clip(params["holding_period"], 0, MAX_HOLDING_PERIOD)
+    npvs, irrs = price_scenarios(params)
+    base = _base_result(base_params)
+    bars = []
+    for i, field in enumerate(fields):
+        npv_low, npv_high = float(npvs[2 * i]), float(npvs[2 * i + 1])
+        bars.append({
+            "field": field,
+            "low_value": float(params[field][2 * i, 0]),
+            "high_value": float(params[field][2 * i + 1, 0]),
+            "npv_low": npv_low,
+            "npv_high": npv_high,
+            "npv_delta_low": npv_low - base["npv"],
+            "npv_delta_high": npv_high - base["npv"],
+            "irr_low": float(irrs[2 * i]) * 100,
+            "irr_high": float(irrs[2 * i + 1]) * 100,
+            "swing": abs(npv_high - npv_low),
+        })
+    bars.sort(key=lambda bar: bar["swing"], reverse=True)
+    return {"base": base, "bars": bars}
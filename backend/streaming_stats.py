@@ -0,0 +1,236 @@
+"""Constant-memory, mergeable statistics for streamed Monte Carlo results.
+
+``RunningMoments`` keeps count/mean/M2 (Welford, merged with Chan et al.'s
+pairwise update) and ``TDigest`` is a merging t-digest whose size is bounded
+by its compression, so ``MonteCarloAccumulator`` can summarize any number
+of simulations chunk by chunk without keeping the samples.
+"""
+import numpy as np
+
+TDIGEST_COMPRESSION = 500
+# Tail probability for NPV value-at-risk / conditional value-at-risk
+VAR_LEVEL = 0.05
+# Two-sided 95% normal quantile for confidence intervals
+CI_Z = 1.959963984540054
+# Fewer simulations than this never count as converged
+MIN_PRECISION_SIMULATIONS = 1000
+
+
+class RunningMoments:
+    """Streaming count, mean and variance."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        other = RunningMoments()
+        other.count = values.size
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class RunningCovariance:
+    """Streaming mean vector and covariance matrix of k columns (Chan et al. merge)."""
+
+    def __init__(self, k):
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if not values.shape[0]:
+            return
+        count = self.count + values.shape[0]
+        mean = values.mean(axis=0)
+        centred = values - mean
+        delta = mean - self.mean
+        self.comoment += centred.T @ centred + np.outer(delta, delta) * self.count * values.shape[0] / count
+        self.mean += delta * values.shape[0] / count
+        self.count = count
+
+    @property
+    def covariance(self):
+        return self.comoment / (self.count - 1) if self.count > 1 else np.zeros_like(self.comoment)
+
+
+class TDigest:
+    """Merging t-digest (arcsine scale function) with vectorized compression."""
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(values.size)]))
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        if other.weights.size:
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        left = (np.cumsum(weights) - weights) / total
+        # Centroids whose left edge falls in the same unit of k-space are merged,
+        # which keeps tail centroids small and the digest size bounded by compression.
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * left - 1)
+        group = np.floor(k)
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q):
+        """Approximate q-quantile (linear interpolation between centroid centres)."""
+        if not self.weights.size:
+            return None
+        total = self.weights.sum()
+        centres = np.cumsum(self.weights) - self.weights / 2
+        positions = np.r_[0.0, centres, total]
+        values = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q * total, positions, values))
+
+    def tail_mean(self, q):
+        """Approximate mean of the lowest q fraction of the data."""
+        if not self.weights.size:
+            return None
+        target = q * self.weights.sum()
+        cumulative = np.cumsum(self.weights)
+        taken = np.clip(target - (cumulative - self.weights), 0, self.weights)
+        return float((taken * self.means).sum() / taken.sum()) if taken.sum() > 0 else float(self.min)
+
+
+class MonteCarloAccumulator:
+    """Running Monte Carlo summary (NPV and IRR) in constant memory."""
+
+    def __init__(self):
+        self.simulations = 0
+        self.positive_npvs = 0
+        self.npv = RunningMoments()
+        self.npv_digest = TDigest()
+        self.irr = RunningMoments()
+        self.irr_digest = TDigest()
+
+    def update(self, npvs, irrs):
+        npvs = np.asarray(npvs, dtype=float)
+        irrs = np.asarray(irrs, dtype=float)
+        self.simulations += npvs.size
+        self.positive_npvs += int((npvs > 0).sum())
+        npvs = npvs[~np.isnan(npvs)]
+        valid_irrs = irrs[np.isfinite(irrs)]
+        self.npv.update(npvs)
+        self.npv_digest.update(npvs)
+        self.irr.update(valid_irrs)
+        self.irr_digest.update(valid_irrs)
+
+    def merge(self, other):
+        self.simulations += other.simulations
+        self.positive_npvs += other.positive_npvs
+        self.npv.merge(other.npv)
+        self.npv_digest.merge(other.npv_digest)
+        self.irr.merge(other.irr)
+        self.irr_digest.merge(other.irr_digest)
+
+    def relative_precision(self):
+        """Largest 95% CI half-width relative to its estimate, over the NPV mean
+        and the 5th/95th percentiles (distribution-free order-statistic bounds).
+
+        The intervals assume independent draws, so for quasi-random samples
+        they are conservative.
+        """
+        n = self.npv.count
+        if n < 2:
+            return np.inf
+        widths = [CI_Z * np.sqrt(self.npv.variance / n) / abs(self.npv.mean) if self.npv.mean else np.inf]
+        for p in (VAR_LEVEL, 1 - VAR_LEVEL):
+            spread = CI_Z * np.sqrt(p * (1 - p) / n)
+            estimate = self.npv_digest.quantile(p)
+            upper = self.npv_digest.quantile(min(p + spread, 1))
+            lower = self.npv_digest.quantile(max(p - spread, 0))
+            half_width = (upper - lower) / 2
+            widths.append(half_width / abs(estimate) if estimate else np.inf)
+        return float(max(widths))
+
+    def meets_precision(self, target_precision):
+        return self.npv.count >= MIN_PRECISION_SIMULATIONS and self.relative_precision() <= target_precision
+
+    def summary(self):
+        """Same keys as the exact end-of-run summary; percentiles are t-digest estimates."""
+        has_irr = self.irr.count > 0
+        npv_5th = self.npv_digest.quantile(VAR_LEVEL)
+        npv_tail = self.npv_digest.tail_mean(VAR_LEVEL)
+        return {
+            "npv_mean": self.npv.mean if self.npv.count else None,
+            "npv_std": float(np.sqrt(self.npv.variance)),
+            "npv_5th_percentile": npv_5th,
+            "npv_95th_percentile": self.npv_digest.quantile(1 - VAR_LEVEL),
+            "irr_mean": self.irr.mean if has_irr else None,
+            "irr_5th_percentile": self.irr_digest.quantile(0.05) if has_irr else None,
+            "irr_95th_percentile": self.irr_digest.quantile(0.95) if has_irr else None,
+            "probability_npv_positive": self.positive_npvs / self.simulations if self.simulations else None,
+            "mean_valid_irr": self.irr.mean if has_irr else None,
+            "percent_valid_irr": 100 * self.irr.count / self.simulations if self.simulations else 0,
+            "npv_var_95": -npv_5th if npv_5th is not None else None,
+            "npv_cvar_95": -npv_tail if npv_tail is not None else None,
+            "simulations": self.simulations,
+        }
+
+
+def diversification_statistics(moments):
+    """Diversification of a portfolio whose NPV is the sum of the columns of ``moments``.
+
+    ``risk_contribution`` is each property's share of portfolio NPV variance
+    (cov(property, portfolio) / var(portfolio), summing to 1) and
+    ``diversification_ratio`` the sum of standalone NPV std devs over the
+    portfolio's.
+    """
+    covariance = moments.covariance
+    stds = np.sqrt(np.clip(np.diag(covariance), 0, None))
+    portfolio_variance = float(covariance.sum())
+    portfolio_std = float(np.sqrt(max(portfolio_variance, 0.0)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(stds, stds)
+    off_diagonal = correlation[~np.eye(len(stds), dtype=bool) & np.isfinite(correlation)]
+    return {
+        "portfolio_npv_std": portfolio_std,
+        "standalone_npv_std_sum": float(stds.sum()),
+        "diversification_ratio": float(stds.sum() / portfolio_std) if portfolio_std > 0 else None,
+        "average_correlation": float(off_diagonal.mean()) if off_diagonal.size else None,
+        "property_npv_mean": moments.mean,
+        "property_npv_std": stds,
+        "risk_contribution": covariance.sum(axis=1) / portfolio_variance if portfolio_variance > 0 else None,
+    }
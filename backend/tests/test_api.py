@@ -2,10 +2,14 @@ import pytest
 import math
 import uuid
 from datetime import datetime, timezone
-from app import Portfolio, Property, Valuation, db, validate_fields, populate_model_from_data
+from app import Portfolio, Property, Valuation, create_app, db, validate_fields, populate_model_from_data
 import os
 import json
 import io
+import threading
+import base64
+import numpy as np
+from payload_formats import decode_binary
 
 def create_property_with_valuation(app, portfolio_id, address, valuation_data):
     with app.app_context():
@@ -853,4 +857,636 @@ def test_library_upload_list_view_delete(client, app):
     # Confirm deletion
     resp = client.get('/api/library')
     items = resp.get_json()
-    assert not any(i['id'] == item_id for i in items) 
\ No newline at end of file
+    assert not any(i['id'] == item_id for i in items) 
+
+
+def test_valuation_cashflows_fast_engine(client, sample_valuation):
+    exact = client.get(f"/api/valuations/{sample_valuation}/cashflows").get_json()["cashFlows"]
+    resp = client.get(f"/api/valuations/{sample_valuation}/cashflows?engine=fast")
+    assert resp.status_code == 200
+    fast = resp.get_json()["cashFlows"]
+    assert len(fast) == len(exact)
+    assert abs(fast[-1]["cumulative_pv"] - exact[-1]["cumulative_pv"]) < 0.01
+
+def test_cashflows_calculate_engine_selection(client):
+    data = {
+        "initial_investment": 100000,
+        "annual_rental_income": 12000,
+        "maintenance": 1000,
+        "property_tax": 600,
+        "management_fees": 10,
+        "transaction_costs": 2000,
+        "annual_rent_growth": 2,
+        "discount_rate": 5,
+        "holding_period": 5,
+        "ltv": 80,
+        "interest_rate": 6,
+    }
+    exact = client.post("/api/cashflows/calculate", json=data).get_json()["cashFlows"]
+    fast = client.post("/api/cashflows/calculate?engine=fast", json=data).get_json()["cashFlows"]
+    assert [row["year"] for row in fast] == [row["year"] for row in exact]
+    for fast_row, exact_row in zip(fast, exact):
+        assert abs(fast_row["net_cash_flow"] - exact_row["net_cash_flow"]) < 0.01
+    resp = client.post("/api/cashflows/calculate?engine=turbo", json=data)
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+def test_cashflows_calculate_batch(client):
+    base = {
+        "initial_investment": 100000,
+        "annual_rental_income": 12000,
+        "maintenance": 1000,
+        "property_tax": 600,
+        "management_fees": 10,
+        "transaction_costs": 2000,
+        "annual_rent_growth": 2,
+        "discount_rate": 5,
+        "holding_period": 5,
+    }
+    deals = [base, {**base, "holding_period": 10, "exit_cap_rate": 6, "selling_costs": 2}]
+    resp = client.post("/api/cashflows/calculate-batch", json={"valuations": deals})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert len(results) == 2
+    for deal, result in zip(deals, results):
+        single = client.post("/api/cashflows/calculate", json=deal).get_json()["cashFlows"]
+        assert len(result["cashFlows"]) == deal["holding_period"] + 1
+        assert abs(result["npv"] - single[-1]["cumulative_pv"]) < 0.01
+        irr = client.post("/api/cashflows/irr", json={"cash_flows": [r["net_cash_flow"] for r in single]}).get_json()["irr"]
+        assert abs(result["irr"] - irr) < 1e-5
+
+    resp = client.post("/api/cashflows/calculate-batch", json={"valuations": deals, "include_cash_flows": False})
+    assert "cashFlows" not in resp.get_json()["results"][0]
+
+def test_cashflows_calculate_batch_invalid(client):
+    assert client.post("/api/cashflows/calculate-batch", json={"valuations": []}).status_code == 400
+    resp = client.post("/api/cashflows/calculate-batch", json={"valuations": [{"holding_period": "ten"}]})
+    assert resp.status_code == 400
+    assert "index 0" in resp.get_json()["error"]
+
+@pytest.mark.parametrize("months", ["soon", -1, True, "1e400", 12 * 100 + 1])
+def test_monthly_cashflows_reject_invalid_holding_period_months(client, months):
+    resp = client.post(
+        "/api/cashflows/calculate?granularity=monthly",
+        json={"annual_rental_income": 12000, "holding_period": 5, "holding_period_months": months},
+    )
+    assert resp.status_code == 400
+    assert "Holding period months" in resp.get_json()["error"]
+
+def test_holding_period_beyond_max_is_a_bad_request(client, sample_property):
+    from fast_dcf import MAX_HOLDING_PERIOD
+    too_long = {"holding_period": MAX_HOLDING_PERIOD + 1, "annual_rental_income": 1000}
+    # 1e400 parses to infinity
+    infinite = '{"holding_period": 1e400}'
+    assert client.post("/api/cashflows/calculate-batch", json={"valuations": [too_long]}).status_code == 400
+    resp = client.post("/api/cashflows/calculate", data=infinite, content_type="application/json")
+    assert resp.status_code == 400
+    assert "holding_period" in resp.get_json()["error"]
+    assert client.post("/api/cashflows/what-if", json={"base": too_long}).status_code == 400
+    resp = client.post("/api/valuations/monte-carlo", json={**too_long, "num_simulations": 10})
+    assert resp.status_code == 400
+    resp = client.post(f"/api/properties/{sample_property}/valuation", json={
+        "initial_investment": 200000,
+        "annual_rental_income": 24000,
+        "maintenance": 1000,
+        "property_tax": 6000,
+        "management_fees": 12,
+        "transaction_costs": 3000,
+        "annual_rent_growth": 2,
+        "discount_rate": 10,
+        "holding_period": MAX_HOLDING_PERIOD + 1,
+    })
+    assert resp.status_code == 400
+    series = {"series": [[-100.0] + [10.0] * (MAX_HOLDING_PERIOD + 1)]}
+    assert client.post("/api/cashflows/irr/batch", json=series).get_json()["results"][0]["status"] == "invalid"
+
+def test_valuation_npv_matches_cashflows(client, sample_valuation):
+    resp = client.get(f"/api/valuations/{sample_valuation}/npv")
+    assert resp.status_code == 200
+    summary = resp.get_json()
+    cash_flows = client.get(f"/api/valuations/{sample_valuation}/cashflows").get_json()["cashFlows"]
+    assert abs(summary["npv"] - cash_flows[-1]["cumulative_pv"]) < 0.01
+    assert abs(summary["undiscounted_total"] - sum(row["net_cash_flow"] for row in cash_flows)) < 0.01
+    assert summary["terminal_value"] == 0
+
+def test_valuation_npv_not_found(client):
+    resp = client.get(f"/api/valuations/{uuid.uuid4()}/npv")
+    assert resp.status_code == 404
+
+def test_valuation_sensitivity_grid_and_tornado(client, sample_valuation):
+    url = f"/api/valuations/{sample_valuation}/sensitivity"
+    body = {
+        "x": {"field": "discount_rate", "min": 5, "max": 15, "steps": 50},
+        "y": {"field": "annual_rent_growth", "min": 0, "max": 5, "steps": 50},
+    }
+    grid = client.post(url, json=body).get_json()
+    assert len(grid["npv"]) == len(grid["irr"]) == 50 and len(grid["npv"][0]) == 50
+    npv = client.get(f"/api/valuations/{sample_valuation}/npv").get_json()["npv"]
+    assert grid["base"]["npv"] == pytest.approx(npv)
+    # The last cell is discount_rate=15 with growth 5%: higher NPV than the base (growth 2%)
+    assert grid["npv"][-1][-1] > grid["base"]["npv"]
+
+    result = client.post(url, json={"mode": "tornado", "bumps": {"discount_rate": 1, "ltv": 10}}).get_json()
+    assert sorted(bar["field"] for bar in result["bars"]) == ["discount_rate", "ltv"]
+    assert result["bars"][0]["swing"] >= result["bars"][1]["swing"]
+    assert result["base"] == grid["base"]
+
+def test_valuation_sensitivity_invalid(client, sample_valuation):
+    url = f"/api/valuations/{sample_valuation}/sensitivity"
+    assert client.post(url, json={"x": {"field": "discount_rate", "values": [5]}}).status_code == 400
+    assert client.post(url, json={"mode": "tornado", "bumps": {"holding_period": 0.5}}).status_code == 400
+    assert client.post(f"/api/valuations/{uuid.uuid4()}/sensitivity", json={"mode": "tornado"}).status_code == 404
+
+def test_valuations_goal_seek(client, sample_valuation):
+    body = {"field": "initial_investment", "metric": "npv", "target": 0, "valuation_id": sample_valuation}
+    result = client.post("/api/valuations/goal-seek", json=body).get_json()["results"][0]
+    assert result["status"] == "solved" and result["method"] == "linear"
+    valuation = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    resp = client.post("/api/cashflows/calculate", json={**valuation, "initial_investment": result["value"]})
+    assert abs(resp.get_json()["cashFlows"][-1]["cumulative_pv"]) < 0.01
+
+    deals = [{**valuation, "annual_rental_income": rent} for rent in (30000, 50000, 1000)]
+    batch = client.post("/api/valuations/goal-seek", json={
+        "field": "initial_investment", "metric": "irr", "target": 12, "valuations": deals,
+    }).get_json()["results"]
+    assert batch[0]["value"] < batch[1]["value"]
+    assert batch[2]["status"] == "no_solution"
+
+def test_valuations_goal_seek_invalid(client):
+    url = "/api/valuations/goal-seek"
+    body = {"field": "initial_investment", "metric": "irr", "target": 12}
+    assert client.post(url, json=body).status_code == 400
+    assert client.post(url, json={**body, "metric": "moic", "valuation": {}}).status_code == 400
+    assert client.post(url, json={**body, "valuations": [{"holding_period": "ten"}]}).status_code == 400
+    assert client.post(url, json={**body, "valuation_id": str(uuid.uuid4())}).status_code == 404
+
+def test_valuation_cashflows_cached_and_invalidated(client, sample_valuation):
+    first = client.get(f"/api/valuations/{sample_valuation}/cashflows").get_json()["cashFlows"]
+    second = client.get(f"/api/valuations/{sample_valuation}/cashflows").get_json()["cashFlows"]
+    assert first == second
+    stats = client.get("/api/cashflows/cache-stats").get_json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+    valuation = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    valuation["annual_rental_income"] = 60000
+    resp = client.put(f"/api/valuations/{sample_valuation}", json=valuation)
+    assert resp.status_code == 200
+    assert client.get("/api/cashflows/cache-stats").get_json()["entries"] == 0
+    updated = client.get(f"/api/valuations/{sample_valuation}/cashflows?engine=fast").get_json()["cashFlows"]
+    assert updated[1]["gross_rent"] == 60000
+
+    client.get(f"/api/valuations/{sample_valuation}/cashflows?engine=fast")
+    assert client.get("/api/cashflows/cache-stats").get_json()["hits"] == 2
+    client.delete(f"/api/valuations/{sample_valuation}")
+    assert client.get("/api/cashflows/cache-stats").get_json()["entries"] == 0
+
+def test_valuation_writes_materialize_cash_flows(client, app, sample_property):
+    from app import ValuationCashFlow, calculate_cash_flows
+    valuation_data = {
+        "initial_investment": 200000,
+        "annual_rental_income": 24000,
+        "maintenance": 1000,
+        "property_tax": 6000,
+        "management_fees": 12,
+        "transaction_costs": 3000,
+        "annual_rent_growth": 2,
+        "discount_rate": 10,
+        "holding_period": 10,
+    }
+    resp = client.post(f"/api/properties/{sample_property}/valuation", json=valuation_data)
+    assert resp.status_code == 201
+    val_id = resp.get_json()["data"]["id"]
+    assert ValuationCashFlow.query.filter_by(valuation_id=val_id).count() == 11
+
+    valuation_data["holding_period"] = 5
+    client.put(f"/api/properties/{sample_property}/valuation", json=valuation_data)
+    assert ValuationCashFlow.query.filter_by(valuation_id=val_id).count() == 6
+    cash_flows = client.get(f"/api/valuations/{val_id}/cashflows").get_json()["cashFlows"]
+    assert cash_flows == calculate_cash_flows(valuation_data)
+    assert client.get("/api/cashflows/cache-stats").get_json()["misses"] == 0
+
+    client.delete(f"/api/valuations/{val_id}")
+    assert ValuationCashFlow.query.filter_by(valuation_id=val_id).count() == 0
+
+def test_rows_from_another_engine_version_are_not_served(client, app, sample_property):
+    from app import ValuationCashFlow, calculate_cash_flows
+    valuation_data = {
+        "initial_investment": 200000,
+        "annual_rental_income": 24000,
+        "maintenance": 1000,
+        "property_tax": 6000,
+        "management_fees": 12,
+        "transaction_costs": 3000,
+        "annual_rent_growth": 2,
+        "discount_rate": 10,
+        "holding_period": 3,
+    }
+    val_id = client.post(f"/api/properties/{sample_property}/valuation", json=valuation_data).get_json()["data"]["id"]
+    # Simulate rows left by an older engine
+    ValuationCashFlow.query.filter_by(valuation_id=val_id).update({"engine_version": None, "net_cash_flow": 1.0})
+    db.session.commit()
+    cash_flows = client.get(f"/api/valuations/{val_id}/cashflows").get_json()["cashFlows"]
+    assert cash_flows == calculate_cash_flows(valuation_data)
+
+def test_valuation_write_survives_inputs_the_exact_engine_rejects(client, app, sample_property):
+    from app import ValuationCashFlow
+    valuation_data = {
+        "initial_investment": 200000,
+        "annual_rental_income": 24000,
+        "maintenance": 1000,
+        "property_tax": 6000,
+        "management_fees": 12,
+        "transaction_costs": 3000,
+        "annual_rent_growth": 2,
+        "discount_rate": 10,
+        "holding_period": 0,
+        "ltv": 50,
+        "interest_rate": 5,
+    }
+    resp = client.post(f"/api/properties/{sample_property}/valuation", json=valuation_data)
+    assert resp.status_code == 201
+    val_id = resp.get_json()["data"]["id"]
+    assert ValuationCashFlow.query.filter_by(valuation_id=val_id).count() == 0
+    assert client.get(f"/api/valuations/{val_id}").status_code == 200
+
+def test_portfolio_cash_flows_mix_materialized_and_computed(client, app, sample_portfolio, sample_valuation):
+    from app import calculate_cash_flows, calculate_irr
+    prop_id = client.post("/api/properties", json={"address": "9 Materialized Rd", "postcode": "TEST9 9ZZ"}).get_json()["data"]["id"]
+    client.patch(f"/api/properties/{prop_id}", json={"portfolio_id": sample_portfolio})
+    valuation_data = {
+        "initial_investment": 150000,
+        "annual_rental_income": 30000,
+        "maintenance": 1000,
+        "property_tax": 2000,
+        "management_fees": 10,
+        "transaction_costs": 2000,
+        "annual_rent_growth": 1,
+        "discount_rate": 10,
+        "holding_period": 30,
+    }
+    client.post(f"/api/properties/{prop_id}/valuation", json=valuation_data)
+    stored = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    flows_a = [row["net_cash_flow"] for row in calculate_cash_flows(stored)]
+    flows_b = [row["net_cash_flow"] for row in calculate_cash_flows(valuation_data)]
+    expected = [b + (flows_a[i] if i < len(flows_a) else 0) for i, b in enumerate(flows_b)]
+    resp = client.get(f"/api/portfolios/{sample_portfolio}/irr")
+    assert resp.status_code == 200
+    assert abs(resp.get_json()["irr"] - calculate_irr(expected) * 100) < 1e-6
+
+def test_cashflows_monthly_granularity(client, sample_valuation):
+    resp = client.get(f"/api/valuations/{sample_valuation}/cashflows?granularity=monthly")
+    assert resp.status_code == 200
+    rows = resp.get_json()["cashFlows"]
+    assert len(rows) == 25 * 12 + 1
+    assert {"period", "month", "debt_service", "loan_balance"} <= set(rows[1])
+    valuation = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    resp = client.post("/api/cashflows/calculate?granularity=monthly", json=valuation)
+    assert resp.get_json()["cashFlows"] == rows
+    resp = client.post("/api/cashflows/calculate?granularity=weekly", json=valuation)
+    assert resp.status_code == 400
+
+def test_cashflows_what_if(client, sample_valuation):
+    body = {"valuation_id": sample_valuation, "changes": {"discount_rate": 10}}
+    resp = client.post("/api/cashflows/what-if", json=body)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["recomputed"] == ["discount", "present_value"]
+    valuation = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    expected = client.post("/api/cashflows/calculate?engine=fast", json={**valuation, "discount_rate": 10}).get_json()["cashFlows"]
+    assert data["cashFlows"] == expected
+    assert data["npv"] == pytest.approx(expected[-1]["cumulative_pv"], abs=0.005)
+
+    client.post("/api/cashflows/what-if", json={**body, "changes": {"discount_rate": 11}})
+    assert client.get("/api/cashflows/cache-stats").get_json()["hits"] == 1
+
+    resp = client.post("/api/cashflows/what-if", json={"base": valuation, "changes": {"bogus": 1}})
+    assert resp.status_code == 400
+    assert client.post("/api/cashflows/what-if", json={"changes": {}}).status_code == 400
+
+def test_cashflows_columnar_and_binary_formats(client, sample_valuation):
+    rows = client.get(f"/api/valuations/{sample_valuation}/cashflows").get_json()["cashFlows"]
+    columnar = client.get(f"/api/valuations/{sample_valuation}/cashflows?format=columnar").get_json()["cashFlows"]
+    assert columnar["net_cash_flow"] == [row["net_cash_flow"] for row in rows]
+    assert columnar["year"] == list(range(26))
+
+    resp = client.get(f"/api/valuations/{sample_valuation}/cashflows?format=binary")
+    assert resp.mimetype == "application/octet-stream"
+    decoded = decode_binary(resp.get_data())
+    assert decoded["cumulative_pv"].tolist() == [row["cumulative_pv"] for row in rows]
+
+    valuation = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    resp = client.post("/api/cashflows/calculate", json=valuation, headers={"Accept": "application/octet-stream"})
+    assert decode_binary(resp.get_data())["noi"].tolist() == [row["noi"] for row in rows]
+    assert client.post("/api/cashflows/calculate?format=xml", json=valuation).status_code == 400
+
+def test_monte_carlo_binary_format(client):
+    body = {
+        "num_simulations": 50,
+        "initial_investment": 200000,
+        "annual_rental_income": 24000,
+        "holding_period": 10,
+        "discount_rate": {"distribution": "normal", "mean": 8, "stddev": 1},
+    }
+    payload = _get_last_sse_event(client.post("/api/valuations/monte-carlo?format=binary", json=body))
+    assert payload["encoding"] == "float64-le-base64"
+    npvs = np.frombuffer(base64.b64decode(payload["npvs"]), "<f8")
+    assert npvs.shape == (50,)
+    assert float(npvs.mean()) == pytest.approx(payload["summary"]["npv_mean"])
+
+def test_irr_batch_endpoint(client):
+    series = [
+        [-1000, 300, 400, 500],
+        [-100, 10, 10, 110, 0, 0],
+        [1, 2, 3],
+        ["a", 1],
+        [5],
+    ]
+    resp = client.post("/api/cashflows/irr/batch", json={"series": series, "discount_rate": 10})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    single = client.post("/api/cashflows/irr", json={"cash_flows": series[0]}).get_json()["irr"]
+    assert results[0]["irr"] == pytest.approx(single, abs=1e-6)
+    assert results[0]["status"] == "converged"
+    assert results[0]["npv"] == pytest.approx(-1000 + 300 / 1.1 + 400 / 1.1 ** 2 + 500 / 1.1 ** 3)
+    assert results[1]["irr"] == pytest.approx(10)
+    assert results[2]["irr"] is None
+    assert results[2]["status"] == "no_root"
+    assert results[2]["npv"] == pytest.approx(1 + 2 / 1.1 + 3 / 1.1 ** 2)
+    assert results[3]["status"] == results[4]["status"] == "invalid"
+    assert results[3]["npv"] is None
+
+    without_rate = client.post("/api/cashflows/irr/batch", json={"series": series[:1]}).get_json()["results"]
+    assert without_rate[0]["npv"] is None
+    assert client.post("/api/cashflows/irr/batch", json={"series": []}).status_code == 400
+    assert client.post("/api/cashflows/irr/batch", json={"series": series, "discount_rate": "x"}).status_code == 400
+
+def test_monte_carlo_above_previous_cap(client):
+    body = {
+        "num_simulations": 60000,
+        "initial_investment": 100000,
+        "annual_rental_income": 12000,
+        "holding_period": 5,
+        "discount_rate": {"distribution": "normal", "mean": 8, "stddev": 1},
+    }
+    payload = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    assert len(payload["npvs"]) == 60000
+    assert payload["summary"]["npv_mean"] == pytest.approx(np.mean(payload["npvs"]))
+
+def test_monte_carlo_seed_is_reproducible(client):
+    body = {
+        "num_simulations": 500,
+        "initial_investment": 100000,
+        "annual_rental_income": 12000,
+        "holding_period": 5,
+        "seed": 7,
+    }
+    first = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    second = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    assert first["npvs"] == second["npvs"]
+    assert client.post("/api/valuations/monte-carlo", json={**body, "seed": "x"}).status_code == 400
+
+def test_monte_carlo_histogram_payload(client):
+    body = {**MC_JOB_BODY, "num_simulations": 2000, "seed": 5, "histogram": {"bins": 30, "sample_size": 50}}
+    final = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    assert "npvs" not in final and "irrs" not in final
+    assert len(final["histograms"]["npv"]["counts"]) == 30
+    assert len(final["histograms"]["npv"]["edges"]) == 31
+    assert sum(final["histograms"]["npv"]["counts"]) == 2000
+    assert final["cdf"]["quantiles"][4] == 0.5
+    assert len(final["sample"]["npv"]) == 50
+    assert final["summary"]["simulations"] == 2000
+    resp = client.post("/api/valuations/monte-carlo", json={**body, "histogram": {"bins": 5000}})
+    assert resp.status_code == 400
+
+def test_monte_carlo_seeded_results_are_cached(app, client, sample_valuation):
+    cache = app.extensions["monte_carlo_cache"]
+    body = {**MC_JOB_BODY, "seed": 11, "valuation_id": sample_valuation}
+    first = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    second = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    assert "cached" not in first and second["cached"] is True
+    assert second["npvs"] == first["npvs"]
+    assert second["summary"] == first["summary"]
+    assert cache.stats()["hits"] == 1
+
+    # A different seed, N or input is a different run; unseeded runs are never cached
+    other = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json={**body, "num_simulations": 301}))
+    assert "cached" not in other
+    unseeded = {k: v for k, v in body.items() if k != "seed"}
+    client.post("/api/valuations/monte-carlo", json=unseeded).get_data()
+    assert cache.stats()["entries"] == 2
+    stats = client.get("/api/valuations/monte-carlo/cache-stats").get_json()
+    assert stats["entries"] == 2
+
+    # Writing the valuation drops results tagged with it
+    valuation = client.get(f"/api/valuations/{sample_valuation}").get_json()["data"]
+    assert client.put(f"/api/valuations/{sample_valuation}", json=valuation).status_code == 200
+    assert cache.stats()["entries"] == 0
+
+def test_monte_carlo_target_precision_stops_early(app, client):
+    body = {
+        **MC_JOB_BODY, "num_simulations": 200_000, "seed": 2, "sampling": "sobol", "target_precision": 0.01,
+        "include_samples": True,
+    }
+    events = _get_sse_events(client.post("/api/valuations/monte-carlo", json=body))
+    final = events[-1]
+    assert final["done"]
+    assert 1000 <= final["summary"]["simulations"] < 20_000
+    assert len(final["npvs"]) == final["summary"]["simulations"]
+    # On the pool the run stops at the same simulation, whatever order the chunks finish in
+    app.config["MONTE_CARLO_WORKERS"] = 2
+    pooled = _get_sse_events(client.post("/api/valuations/monte-carlo", json={**body, "seed": 3}))[-1]
+    app.config["MONTE_CARLO_WORKERS"] = 1
+    inline = _get_sse_events(client.post("/api/valuations/monte-carlo", json={**body, "seed": 3}))[-1]
+    assert pooled["npvs"] == inline["npvs"]
+    assert client.post("/api/valuations/monte-carlo", json={**body, "sampling": "halton"}).status_code == 400
+    assert client.post("/api/valuations/monte-carlo", json={**body, "target_precision": 0}).status_code == 400
+
+def test_large_monte_carlo_runs_default_to_summary_only():
+    from app import MONTE_CARLO_SAMPLES_DEFAULT_MAX, parse_monte_carlo_options
+    assert parse_monte_carlo_options({"num_simulations": MONTE_CARLO_SAMPLES_DEFAULT_MAX})[1]["include_samples"]
+    large = {"num_simulations": MONTE_CARLO_SAMPLES_DEFAULT_MAX + 1}
+    assert not parse_monte_carlo_options(large)[1]["include_samples"]
+    assert parse_monte_carlo_options({**large, "include_samples": True})[1]["include_samples"]
+
+def test_monte_carlo_correlated_extra_fields(client):
+    body = {
+        **MC_JOB_BODY,
+        "num_simulations": 500,
+        "seed": 4,
+        "exit_cap_rate": {"distribution": "normal", "mean": 6, "stddev": 0.5},
+        "vacancy_rate": {"distribution": "normal", "mean": 5, "stddev": 2},
+        "correlation": {"fields": ["discount_rate", "exit_cap_rate"], "matrix": [[1, 0.8], [0.8, 1]]},
+    }
+    final = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    assert len(final["npvs"]) == 500
+    assert len(set(final["npvs"])) > 1
+    bad = {**body, "correlation": {"fields": ["discount_rate", "capex"], "matrix": [[1, 0], [0, 1]]}}
+    assert client.post("/api/valuations/monte-carlo", json=bad).status_code == 400
+    bad = {**body, "exit_cap_rate": {"distribution": "normal", "mean": 6}}
+    assert client.post("/api/valuations/monte-carlo", json=bad).status_code == 400
+
+def test_portfolio_monte_carlo(client):
+    app = client.application
+    portfolio_id = str(uuid.uuid4())
+    base = {
+        "initial_investment": 100000, "annual_rental_income": 12000, "service_charge": 500, "ground_rent": 100,
+        "maintenance": 500, "property_tax": 1000, "insurance": 200, "management_fees": 10,
+        "transaction_costs": 2000, "annual_rent_growth": 2, "discount_rate": 8, "holding_period": 5,
+        "exit_cap_rate": 6,
+    }
+    create_portfolio_with_properties_and_valuations(app, portfolio_id, [
+        (f"1 Joint St {uuid.uuid4().hex[:8]}", base),
+        (f"2 Joint St {uuid.uuid4().hex[:8]}", {**base, "annual_rental_income": 9000, "holding_period": 8}),
+    ])
+    body = {"num_simulations": 400, "seed": 1, "idiosyncratic": {"annual_rent_growth": 1, "vacancy_rate": 2}}
+    events = _get_sse_events(client.post(f"/api/portfolios/{portfolio_id}/monte-carlo", json=body))
+    final = events[-1]
+    assert final["done"] and len(final["npvs"]) == 400
+    assert final["summary"]["simulations"] == 400
+    assert final["diversification"]["diversification_ratio"] >= 1
+    assert len(final["properties"]) == 2
+    assert sum(p["npv_mean"] for p in final["properties"]) == pytest.approx(final["summary"]["npv_mean"])
+    assert sum(p["risk_contribution"] for p in final["properties"]) == pytest.approx(1)
+
+    resp = client.post(f"/api/portfolios/{portfolio_id}/monte-carlo", json={**body, "macro": {"holding_period": {}}})
+    assert resp.status_code == 400
+    assert client.post(f"/api/portfolios/{uuid.uuid4()}/monte-carlo", json=body).status_code == 404
+
+def test_monte_carlo_ar1_paths_within_memory_limit(app, client):
+    body = {
+        **MC_JOB_BODY,
+        "num_simulations": 2000,
+        "seed": 9,
+        "dtype": "float32",
+        "annual_rent_growth": {"distribution": "ar1", "mean": 2, "stddev": 1, "phi": 0.7},
+        "discount_rate": {"distribution": "ar1", "mean": 8, "stddev": 0.5, "phi": 0.9, "initial": 9},
+    }
+    final = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json=body))
+    assert len(final["npvs"]) == 2000
+    assert final["summary"]["simulations"] == 2000
+
+    app.config["MONTE_CARLO_MEMORY_LIMIT"] = 2**20
+    limited = _get_last_sse_event(client.post("/api/valuations/monte-carlo", json={**body, "seed": 10}))
+    assert limited["summary"]["simulations"] == 2000
+    app.config["MONTE_CARLO_MEMORY_LIMIT"] = 1000
+    assert client.post("/api/valuations/monte-carlo", json=body).status_code == 400
+
+    bad = {**body, "interest_rate": {"distribution": "ar1", "mean": 5, "stddev": 1}}
+    assert client.post("/api/valuations/monte-carlo", json=bad).status_code == 400
+
+MC_JOB_BODY = {
+    "num_simulations": 300,
+    "initial_investment": 100000,
+    "annual_rental_income": 12000,
+    "holding_period": 5,
+    "discount_rate": {"distribution": "normal", "mean": 8, "stddev": 1},
+}
+
+def test_monte_carlo_job_lifecycle(app, client):
+    resp = client.post("/api/valuations/monte-carlo/jobs", json=MC_JOB_BODY)
+    assert resp.status_code == 202
+    job = resp.get_json()["data"]
+    assert job["status"] == "queued"
+    assert client.get(f"/api/valuations/monte-carlo/jobs/{job['id']}").get_json()["data"]["progress"] == 0
+
+    assert app.extensions["monte_carlo_jobs"].run_pending() == 1
+    done = client.get(f"/api/valuations/monte-carlo/jobs/{job['id']}").get_json()
+    assert done["data"]["status"] == "done"
+    assert done["data"]["completed"] == 300
+    assert len(done["npvs"]) == 300
+    assert done["data"]["summary"]["npv_mean"] == pytest.approx(np.mean(done["npvs"]))
+
+    binary = client.get(f"/api/valuations/monte-carlo/jobs/{job['id']}?format=binary")
+    assert decode_binary(binary.get_data())["npvs"].tolist() == done["npvs"]
+
+    # Reattaching after completion replays the final event without re-simulating
+    payload = _get_last_sse_event(client.get(f"/api/valuations/monte-carlo/jobs/{job['id']}/events"))
+    assert payload["npvs"] == done["npvs"]
+    assert payload["summary"] == done["data"]["summary"]
+    assert client.get("/api/valuations/monte-carlo/jobs/missing").status_code == 404
+
+def test_monte_carlo_job_is_reproducible_when_requeued(app, client):
+    from app import MonteCarloJob
+    job_id = client.post("/api/valuations/monte-carlo/jobs", json=MC_JOB_BODY).get_json()["data"]["id"]
+    app.extensions["monte_carlo_jobs"].run_pending()
+    first = client.get(f"/api/valuations/monte-carlo/jobs/{job_id}").get_json()["npvs"]
+
+    # Simulate a worker that died mid-run: stale heartbeat on a running job
+    job = db.session.get(MonteCarloJob, job_id)
+    job.status, job.completed, job.updated_at = "running", 120, "2000-01-01T00:00:00+00:00"
+    db.session.commit()
+    assert app.extensions["monte_carlo_jobs"].run_pending() == 1
+    assert client.get(f"/api/valuations/monte-carlo/jobs/{job_id}").get_json()["npvs"] == first
+
+def test_job_events_end_when_no_worker_runs_the_job(app, client):
+    from app import MonteCarloJob
+    job_id = client.post("/api/valuations/monte-carlo/jobs", json=MC_JOB_BODY).get_json()["data"]["id"]
+    job = db.session.get(MonteCarloJob, job_id)
+    job.updated_at = "2000-01-01T00:00:00+00:00"
+    db.session.commit()
+    events = _get_sse_events(client.get(f"/api/valuations/monte-carlo/jobs/{job_id}/events"))
+    assert len(events) == 1
+    assert events[0]["status"] == "queued" and events[0]["stalled"]
+
+def test_job_workers_only_start_when_asked():
+    def job_threads():
+        return [thread for thread in threading.enumerate() if thread.name.startswith("job-worker")]
+    plain = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    assert plain.extensions["monte_carlo_jobs"].workers == 1 and not job_threads()
+    autostart = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "MONTE_CARLO_JOB_AUTOSTART": True})
+    try:
+        assert len(job_threads()) == 1
+    finally:
+        autostart.extensions["monte_carlo_jobs"].stop(timeout=5)
+    assert not job_threads()
+
+def test_monte_carlo_job_rejects_bad_seed(client):
+    resp = client.post("/api/valuations/monte-carlo/jobs", json={**MC_JOB_BODY, "seed": -1})
+    assert resp.status_code == 400
+
+def _get_sse_events(response):
+    return _get_sse_events_from_text(response.get_data(as_text=True))
+
+def _get_sse_events_from_text(data):
+    # Lines starting with ":" are heartbeat comments
+    return [json.loads(line[len('data: '):]) for line in data.splitlines() if line.startswith('data: ')]
+
+def test_monte_carlo_progress_is_time_based_with_heartbeats(app, client):
+    body = {**MC_JOB_BODY, "num_simulations": 2000, "seed": 4}
+    app.config["MONTE_CARLO_PROGRESS_SECONDS"] = 60
+    events = _get_sse_events(client.post("/api/valuations/monte-carlo", json=body))
+    assert [e["progress"] for e in events] == [5, 100]
+    app.config["SSE_HEARTBEAT_SECONDS"] = 0
+    data = client.post("/api/valuations/monte-carlo", json={**body, "seed": 5}).get_data(as_text=True)
+    assert ": heartbeat\n\n" in data
+    assert _get_sse_events_from_text(data)[-1]["done"]
+
+
+def test_monte_carlo_stream_stops_when_client_disconnects(app, client):
+    app.config["MONTE_CARLO_PROGRESS_SECONDS"] = 0
+    body = {**MC_JOB_BODY, "num_simulations": 2000, "seed": 6}
+    response = client.post("/api/valuations/monte-carlo", json=body, buffered=False)
+    first = json.loads(next(response.response).decode()[len("data: "):])
+    assert first["progress"] == 5
+    response.close()
+    # The abandoned run never finished, so nothing was cached
+    assert client.get("/api/valuations/monte-carlo/cache-stats").get_json()["entries"] == 0
+
+
+def test_monte_carlo_progress_events_carry_partial_summaries(app, client):
+    app.config["MONTE_CARLO_PROGRESS_SECONDS"] = 0  # an event per chunk
+    body = {**MC_JOB_BODY, "num_simulations": 2000, "seed": 3}
+    events = _get_sse_events(client.post("/api/valuations/monte-carlo", json=body))
+    progress_events = [e for e in events if not e.get("done")]
+    assert len(progress_events) == 20
+    assert [e["summary"]["simulations"] for e in progress_events][:2] == [100, 200]
+    final = events[-1]
+    partial = progress_events[-1]["summary"]
+    assert partial.keys() == final["summary"].keys()
+    assert partial["npv_mean"] == pytest.approx(final["summary"]["npv_mean"])
+    assert partial["npv_5th_percentile"] == pytest.approx(final["summary"]["npv_5th_percentile"], rel=0.01)
+
+    summary_only = _get_sse_events(client.post("/api/valuations/monte-carlo", json={**body, "include_samples": False}))
+    assert "npvs" not in summary_only[-1]
+    assert summary_only[-1]["summary"] == partial
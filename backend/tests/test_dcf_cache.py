@@ -0,0 +1,44 @@
+from dcf_cache import LRUCache, canonical_key
+
+def test_canonical_key_ignores_dict_order():
+    assert canonical_key({"a": 1, "b": 2.5}) == canonical_key({"b": 2.5, "a": 1})
+    assert canonical_key({"a": 1}) != canonical_key({"a": 2})
+
+def test_lru_hits_misses_and_eviction():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", 1, 40)
+    cache.put("b", 2, 40)
+    assert cache.get("a") == (True, 1)  # "b" is now least recently used
+    cache.put("c", 3, 40)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 80
+
+def test_lru_skips_oversized_values():
+    cache = LRUCache(max_bytes=10)
+    cache.put("big", "x", 11)
+    assert cache.get("big") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+def test_lru_invalidate_tag():
+    cache = LRUCache(max_bytes=1000)
+    cache.put("a", 1, 10, tags=("val-1",))
+    cache.put("b", 2, 10, tags=("val-2",))
+    cache.invalidate_tag("val-1")
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, 2)
+    assert cache.stats()["bytes"] == 10
+
+def test_get_or_compute_only_computes_once():
+    cache = LRUCache(max_bytes=1000)
+    calls = []
+    def compute():
+        calls.append(1)
+        return [1, 2, 3]
+    assert cache.get_or_compute("k", compute, len) == [1, 2, 3]
+    assert cache.get_or_compute("k", compute, len) == [1, 2, 3]
+    assert len(calls) == 1
@@ -0,0 +1,196 @@
+import numpy as np
+import pytest
+from app import calculate_cash_flows
+from fast_dcf import (
+    CASH_FLOW_COLUMNS,
+    MAX_HOLDING_PERIOD,
+    apply_what_if,
+    batch_cash_flows,
+    batch_rows,
+    calculate_cash_flows_batch,
+    calculate_cash_flows_fast,
+    calculate_monthly_cash_flows,
+    calculate_npv_summary,
+    cash_flow_columns,
+    columns_to_rows,
+    monthly_cash_flow_columns,
+    normalize_inputs,
+    round_half_up,
+    what_if_columns,
+    what_if_state,
+)
+
+BASE_INPUT = {
+    "initial_investment": 200000,
+    "annual_rental_income": 20000,
+    "service_charge": 1000,
+    "ground_rent": 500,
+    "maintenance": 1000,
+    "property_tax": 6000,
+    "insurance": 300,
+    "management_fees": 12,
+    "transaction_costs": 3000,
+    "annual_rent_growth": 2,
+    "discount_rate": 15,
+    "holding_period": 25,
+}
+
+SCENARIOS = [
+    BASE_INPUT,
+    {**BASE_INPUT, "vacancy_rate": 7.5, "capex": 1200},
+    {**BASE_INPUT, "ltv": 75, "interest_rate": 5.25, "holding_period": 10},
+    {**BASE_INPUT, "exit_cap_rate": 5.5, "selling_costs": 3, "discount_rate": 8, "holding_period": 7},
+    {**BASE_INPUT, "annual_rent_growth": -1.5, "holding_period": 40, "ltv": 60, "interest_rate": 4},
+    {**BASE_INPUT, "holding_period": 0},
+]
+
+
+def assert_rows_match(fast_rows, exact_rows):
+    assert len(fast_rows) == len(exact_rows)
+    for fast, exact in zip(fast_rows, exact_rows):
+        assert fast["year"] == exact["year"]
+        for column in CASH_FLOW_COLUMNS:
+            assert fast[column] == pytest.approx(exact[column], rel=1e-9, abs=1e-6), (exact["year"], column)
+
+
+@pytest.mark.parametrize("input_data", SCENARIOS)
+def test_fast_engine_matches_exact_engine(input_data):
+    assert_rows_match(calculate_cash_flows_fast(input_data), calculate_cash_flows(input_data))
+
+
+def test_fast_engine_selected_by_keyword():
+    rows = calculate_cash_flows(BASE_INPUT, engine="fast")
+    assert rows == calculate_cash_flows_fast(BASE_INPUT)
+    assert all(isinstance(row[column], float) for row in rows for column in CASH_FLOW_COLUMNS)
+    assert [row["year"] for row in rows] == list(range(26))
+
+
+def test_fast_engine_handles_missing_and_blank_fields():
+    input_data = {**BASE_INPUT, "ltv": None, "interest_rate": "", "capex": "None"}
+    assert_rows_match(calculate_cash_flows_fast(input_data), calculate_cash_flows(input_data))
+
+
+def test_cash_flow_columns_are_arrays():
+    columns = cash_flow_columns(BASE_INPUT)
+    assert columns["year"].shape == (26,)
+    for column in CASH_FLOW_COLUMNS:
+        assert columns[column].shape == (26,)
+    assert columns["cumulative_pv"][-1] == pytest.approx(columns["present_value"].sum())
+
+
+def test_batch_matches_single_deal_engine_with_ragged_holding_periods():
+    batch = calculate_cash_flows_batch(SCENARIOS)
+    assert batch["net_cash_flow"].shape == (len(SCENARIOS), 41)
+    for i, input_data in enumerate(SCENARIOS):
+        assert_rows_match(batch_rows(batch, i), calculate_cash_flows(input_data))
+        # Batch arrays are unrounded, like the single-deal columns
+        columns = cash_flow_columns(input_data)
+        assert batch["npv"][i] == pytest.approx(columns["cumulative_pv"][-1], abs=1e-6)
+        assert batch_cash_flows(batch, i).tolist() == pytest.approx(columns["net_cash_flow"].tolist())
+
+
+def test_batch_rejects_non_numeric_inputs():
+    with pytest.raises(ValueError, match="index 1"):
+        calculate_cash_flows_batch([BASE_INPUT, {**BASE_INPUT, "discount_rate": "abc"}])
+
+
+@pytest.mark.parametrize("holding_period", [MAX_HOLDING_PERIOD + 1, float("inf"), float("nan"), float("-inf")])
+def test_holding_period_beyond_max_is_rejected(holding_period):
+    with pytest.raises(ValueError, match="holding_period"):
+        normalize_inputs({**BASE_INPUT, "holding_period": holding_period})
+    with pytest.raises(ValueError, match="index 0: holding_period"):
+        calculate_cash_flows_batch([{**BASE_INPUT, "holding_period": holding_period}])
+
+
+@pytest.mark.parametrize("input_data", SCENARIOS + [
+    {**BASE_INPUT, "annual_rent_growth": 15, "discount_rate": 15},
+    {**BASE_INPUT, "discount_rate": 0, "exit_cap_rate": 6, "selling_costs": 2},
+    {**BASE_INPUT, "holding_period": 1, "exit_cap_rate": 6, "vacancy_rate": 3},
+])
+def test_closed_form_npv_matches_table_to_the_cent(input_data):
+    rows = calculate_cash_flows(input_data)
+    summary = calculate_npv_summary(input_data)
+    assert abs(summary["npv"] - rows[-1]["cumulative_pv"]) < 0.01
+    assert abs(summary["undiscounted_total"] - cash_flow_columns(input_data)["net_cash_flow"].sum()) < 0.01
+
+
+def test_closed_form_terminal_value():
+    input_data = SCENARIOS[3]
+    summary = calculate_npv_summary(input_data)
+    assert summary["terminal_value"] == pytest.approx(cash_flow_columns(input_data)["noi"][-1] / 0.055)
+    assert summary["net_terminal_value"] == pytest.approx(summary["terminal_value"] * 0.97)
+    assert calculate_npv_summary(BASE_INPUT)["terminal_value"] == 0
+
+
+def test_monthly_periods_roll_up_to_annual_cash_flows():
+    input_data = {**SCENARIOS[3], "ltv": 70, "interest_rate": 5, "capex": 1200, "vacancy_rate": 4}
+    columns = monthly_cash_flow_columns(input_data)
+    assert columns["period"].shape == (12 * 7 + 1,)
+    annual = cash_flow_columns(input_data)
+    yearly_totals = np.bincount(columns["year"], weights=columns["net_cash_flow"])
+    assert yearly_totals.tolist() == pytest.approx(annual["net_cash_flow"].tolist())
+    assert columns["loan_balance"][-1] == pytest.approx(0, abs=1e-6)
+    assert (columns["interest"][1:] + columns["principal"][1:]) == pytest.approx(columns["debt_service"][1:])
+
+
+def test_half_pence_year_zero_rounds_half_up_like_exact_engine():
+    input_data = {**BASE_INPUT, "initial_investment": 100000.125, "transaction_costs": 0, "property_tax": 0}
+    exact = calculate_cash_flows(input_data)
+    assert exact[0]["gross_rent"] == exact[0]["net_cash_flow"] == -100000.13
+    assert calculate_cash_flows_fast(input_data)[0] == exact[0]
+    assert monthly_cash_flow_columns(input_data)["gross_rent"][0] == -100000.13
+    assert cash_flow_columns(input_data)["net_cash_flow"][0] == -100000.13
+    assert abs(calculate_npv_summary(input_data)["npv"] - exact[-1]["cumulative_pv"]) < 0.005
+
+
+def test_round_half_up():
+    values = np.array([0.125, -0.125, 2.5, -2.5, 1.0, -1e-12])
+    assert round_half_up(values, 2).tolist() == [0.13, -0.13, 2.5, -2.5, 1.0, 0.0]
+    assert round_half_up(np.array([2.5, -0.5]), 0).tolist() == [3.0, -1.0]
+
+
+def test_monthly_mid_year_exit_repays_outstanding_loan():
+    input_data = {**BASE_INPUT, "ltv": 80, "interest_rate": 5, "holding_period_months": 30}
+    columns = monthly_cash_flow_columns(input_data)
+    assert columns["period"][-1] == 30
+    assert (columns["year"][-1], columns["month"][-1]) == (3, 6)
+    outstanding = columns["loan_balance"][-1]
+    assert outstanding > 0
+    expected = columns["noi"][-1] - columns["capex"][-1] - columns["debt_service"][-1] - outstanding
+    assert columns["net_cash_flow"][-1] == pytest.approx(expected)
+
+
+def test_monthly_rows_layout():
+    rows = calculate_monthly_cash_flows(BASE_INPUT)
+    assert len(rows) == 301
+    assert rows[0]["net_cash_flow"] == calculate_cash_flows(BASE_INPUT)[0]["net_cash_flow"]
+    assert rows[13]["year"] == 2 and rows[13]["month"] == 1
+    assert rows[1]["gross_rent"] == 1666.67
+
+
+def test_what_if_discount_rate_only_recomputes_pv_columns():
+    state = what_if_state(BASE_INPUT)
+    new_state, recomputed = apply_what_if(state, {"discount_rate": 9})
+    assert recomputed == ["discount", "present_value"]
+    assert new_state["stages"]["rent"] is state["stages"]["rent"]
+    expected = calculate_cash_flows_fast({**BASE_INPUT, "discount_rate": 9})
+    assert columns_to_rows(what_if_columns(new_state)) == expected
+
+
+@pytest.mark.parametrize("changes, expected_stages", [
+    ({"annual_rent_growth": 3}, ["rent", "operating", "cash_flow", "present_value"]),
+    ({"ltv": 60, "interest_rate": 4}, ["debt", "operating", "cash_flow", "present_value"]),
+    ({"exit_cap_rate": 6}, ["cash_flow", "present_value"]),
+    ({"holding_period": 10}, ["timeline", "rent", "debt", "operating", "cash_flow", "discount", "present_value"]),
+    ({"discount_rate": 15}, []),
+])
+def test_what_if_dependency_graph(changes, expected_stages):
+    state = what_if_state(BASE_INPUT)
+    new_state, recomputed = apply_what_if(state, changes)
+    assert recomputed == expected_stages
+    assert columns_to_rows(what_if_columns(new_state)) == calculate_cash_flows_fast({**BASE_INPUT, **changes})
+
+
+def test_what_if_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="discount"):
+        apply_what_if(what_if_state(BASE_INPUT), {"discount": 5})
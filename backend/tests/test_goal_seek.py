@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from app import calculate_payback_period
+from fast_dcf import calculate_cash_flows_batch, calculate_npv_summary, pack_inputs
+from goal_seek import goal_seek, parse_goal_seek, simple_payback
+from irr_solver import irr_batch
+
+BASE_INPUT = {
+    "initial_investment": 250000,
+    "annual_rental_income": 21000,
+    "vacancy_rate": 4,
+    "maintenance": 1100,
+    "property_tax": 1800,
+    "management_fees": 10,
+    "transaction_costs": 7500,
+    "annual_rent_growth": 2.5,
+    "discount_rate": 7.5,
+    "holding_period": 10,
+    "ltv": 60,
+    "interest_rate": 5,
+    "exit_cap_rate": 5.5,
+    "selling_costs": 2,
+}
+DEALS = [BASE_INPUT, {**BASE_INPUT, "holding_period": 25, "annual_rental_income": 30000}]
+
+
+def irr_percent(input):
+    batch = calculate_cash_flows_batch([input])
+    return irr_batch(batch["net_cash_flow"])[0][0] * 100
+
+
+def test_max_price_for_target_irr_is_linear():
+    results = goal_seek(pack_inputs(DEALS), "initial_investment", "irr", 12)
+    for deal, result in zip(DEALS, results):
+        assert result["status"] == "solved" and result["method"] == "linear"
+        assert irr_percent({**deal, "initial_investment": result["value"]}) == pytest.approx(12, abs=1e-5)
+        assert result["achieved"] == pytest.approx(12, abs=1e-5)
+
+
+def test_nonlinear_fields_are_bisected():
+    results = goal_seek(pack_inputs(DEALS), "annual_rent_growth", "npv", 10000)
+    for deal, result in zip(DEALS, results):
+        assert result["method"] == "bisection"
+        npv = calculate_npv_summary({**deal, "annual_rent_growth": result["value"]})["npv"]
+        assert npv == pytest.approx(10000, abs=1e-3)
+    exit_cap = goal_seek(pack_inputs(DEALS), "exit_cap_rate", "irr", 12)
+    assert irr_percent({**DEALS[0], "exit_cap_rate": exit_cap[0]["value"]}) == pytest.approx(12, abs=1e-6)
+
+
+def test_unreachable_targets_have_no_solution():
+    # No LTV between 0 and 100% gets a 10-year deal to a 200% IRR
+    result = goal_seek(pack_inputs([BASE_INPUT]), "ltv", "irr", 200)[0]
+    assert result == {"value": None, "achieved": None, "status": "no_solution", "method": "linear"}
+    assert goal_seek(pack_inputs([BASE_INPUT]), "exit_cap_rate", "npv", 1e9)[0]["status"] == "no_solution"
+
+
+def test_simple_payback_matches_reference():
+    rng = np.random.default_rng(5)
+    flows = rng.normal(10, 20, (200, 12))
+    flows[:, 0] = -rng.uniform(0, 100, 200)
+    expected = [calculate_payback_period(row.tolist())["simple_payback"] for row in flows]
+    expected = np.array([np.nan if value is None else value for value in expected])
+    np.testing.assert_allclose(simple_payback(flows), expected)
+
+
+def test_payback_target():
+    result = goal_seek(pack_inputs(DEALS), "annual_rental_income", "payback", 8)
+    for deal, solved in zip(DEALS, result):
+        batch = calculate_cash_flows_batch([{**deal, "annual_rental_income": solved["value"]}])
+        flows = batch["net_cash_flow"][0].tolist()
+        assert calculate_payback_period(flows)["simple_payback"] == pytest.approx(8, abs=1e-6)
+
+
+def test_parse_goal_seek():
+    assert parse_goal_seek({"field": "ltv", "metric": "irr", "target": 12}) == (
+        True, {"field": "ltv", "metric": "irr", "target": 12.0, "bounds": [0.0, 100.0]}
+    )
+    assert not parse_goal_seek({"field": "holding_period", "metric": "npv", "target": 0})[0]
+    assert not parse_goal_seek({"field": "discount_rate", "metric": "irr", "target": 12})[0]
+    assert not parse_goal_seek({"field": "ltv", "metric": "payback", "target": 0})[0]
+    assert not parse_goal_seek({"field": "ltv", "metric": "npv", "target": 0, "bounds": [5, 1]})[0]
+    assert not parse_goal_seek({"field": "ltv", "metric": "npv", "target": 10**400})[0]
+    assert not parse_goal_seek({"field": "ltv", "metric": "npv", "target": 0, "bounds": [0, 10**400]})[0]
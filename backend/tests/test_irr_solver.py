@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app import calculate_irr
+from fast_dcf import calculate_cash_flows_batch
+from irr_solver import IRR_CONVERGED, IRR_FALLBACK, IRR_NO_ROOT, irr_batch, npv_and_derivatives, pad_series, sign_changes
+from tests.test_fast_dcf import SCENARIOS
+
+SERIES = [
+    [-100, 10, 10, 110],
+    [-1000, 300, 300, 300, 300],
+    [-100, 50, 50],
+    [-100, 50, -10, 80],  # three sign changes
+    [100, -50, -60],
+    [0, 0, -5, 0, 6],
+    [-100, 0, 0, 0],  # no root
+    [1, 2, 3],  # no root
+    [-100, 2000],  # root outside the bracket
+]
+
+def assert_matches_calculate_irr(series, irrs):
+    for cash_flows, irr in zip(series, irrs):
+        expected = calculate_irr(list(cash_flows))
+        if expected is None:
+            assert np.isnan(irr)
+        else:
+            assert irr == pytest.approx(expected, abs=1e-8)
+
+def test_irr_batch_matches_brentq_on_ragged_series():
+    irrs, statuses = irr_batch(pad_series(SERIES))
+    assert_matches_calculate_irr(SERIES, irrs)
+    assert list(statuses[:3]) == [IRR_CONVERGED] * 3
+    assert statuses[3] == IRR_FALLBACK
+    assert list(statuses[6:]) == [IRR_NO_ROOT] * 3
+
+def test_irr_batch_matches_brentq_on_dcf_cash_flows():
+    rng = np.random.default_rng(7)
+    inputs = [
+        {**SCENARIOS[i % len(SCENARIOS)], "annual_rent_growth": g, "discount_rate": d, "interest_rate": r}
+        for i, (g, d, r) in enumerate(zip(rng.normal(2, 2, 300), rng.normal(15, 2, 300), rng.normal(5, 1, 300)))
+    ]
+    batch = calculate_cash_flows_batch(inputs)
+    irrs, _ = irr_batch(batch["net_cash_flow"])
+    series = [batch["net_cash_flow"][i, :h + 1] for i, h in enumerate(batch["holding_period"])]
+    assert_matches_calculate_irr(series, irrs)
+
+def test_npv_derivatives_match_finite_differences():
+    cash_flows = pad_series([[-1000, 300, 400, 500], [-50, 10, 60]])
+    rates = np.array([0.07, 0.12])
+    _, df, d2f = npv_and_derivatives(rates, cash_flows)
+    h = 1e-5
+    f_plus, df_plus, _ = npv_and_derivatives(rates + h, cash_flows)
+    f_minus, df_minus, _ = npv_and_derivatives(rates - h, cash_flows)
+    assert df == pytest.approx((f_plus - f_minus) / (2 * h), rel=1e-6)
+    assert d2f == pytest.approx((df_plus - df_minus) / (2 * h), rel=1e-6)
+
+def test_sign_changes_ignore_zeros():
+    assert sign_changes(pad_series(SERIES[:6])).tolist() == [1, 1, 1, 3, 1, 1]
@@ -0,0 +1,36 @@
+import json
+import math
+from decimal import Decimal
+
+import numpy as np
+
+from app import Valuation, clean_for_json
+from json_provider import dumps_bytes
+
+def test_nan_and_inf_become_null():
+    data = {"a": [1.5, float("nan"), float("inf")], "b": {"c": float("-inf")}}
+    assert json.loads(dumps_bytes(data)) == clean_for_json(data)
+
+def test_numpy_and_decimal_values():
+    data = {"arr": np.array([1.0, np.nan]), "i": np.int64(3), "f": np.float32(0.5), "d": Decimal("1.25")}
+    assert json.loads(dumps_bytes(data)) == {"arr": [1.0, None], "i": 3, "f": 0.5, "d": 1.25}
+
+def test_models_serialize_via_to_dict():
+    valuation = Valuation(id="v1", initial_investment=1000.0, discount_rate=math.nan)
+    payload = json.loads(dumps_bytes({"items": [valuation]}))
+    assert payload["items"][0]["id"] == "v1"
+    assert payload["items"][0]["discount_rate"] is None
+
+def test_jsonify_uses_provider(app):
+    with app.test_request_context():
+        assert app.json.dumps({"x": float("nan")}) == '{"x":null}'
+
+def test_unsupported_arrays_fall_back_to_lists():
+    grid = np.arange(6.0).reshape(2, 3)
+    data = {"column": grid[:, 1], "half": np.array([0.5, np.nan], dtype=np.float16), "h": np.float16(1.5)}
+    assert json.loads(dumps_bytes(data)) == {"column": [1.0, 4.0], "half": [0.5, None], "h": 1.5}
+
+def test_dumps_honours_sort_keys_and_indent(app):
+    assert app.json.dumps({"b": 1, "a": 2}) == '{"a":2,"b":1}'
+    assert app.json.dumps({"b": 1, "a": 2}, sort_keys=False) == '{"b":1,"a":2}'
+    assert app.json.dumps({"a": [1]}, indent=2) == '{\n  "a": [\n    1\n  ]\n}'
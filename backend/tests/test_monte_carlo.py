@@ -0,0 +1,277 @@
+import numpy as np
+import pytest
+
+from app import calculate_cash_flows, calculate_irr
+from fast_dcf import dcf_kernel
+from monte_carlo import (
+    MONTE_CARLO_MAX_WORKERS,
+    MONTE_CARLO_PARALLEL_THRESHOLD,
+    MONTE_CARLO_WORKING_ARRAYS,
+    STOCHASTIC_FIELDS,
+    ar1_paths,
+    chart_payload,
+    correlation_factor,
+    generate_random_variable,
+    in_start_order,
+    inverse_cdf,
+    monte_carlo_chunk_size,
+    monte_carlo_memory_plan,
+    parse_chart_options,
+    parse_correlation,
+    path_kernel_input,
+    run_monte_carlo,
+    run_portfolio_monte_carlo,
+    sample_inputs,
+    simulate_chunk,
+    simulate_portfolio_chunk,
+)
+from fast_dcf import normalize_inputs
+from tests.test_fast_dcf import BASE_INPUT
+
+MC_INPUT = {**BASE_INPUT, "ltv": 75, "interest_rate": 5, "exit_cap_rate": 6, "holding_period": 10}
+DISTRIBUTIONS = {
+    "annual_rent_growth": {"distribution": "normal", "mean": 2, "stddev": 1},
+    "discount_rate": {"distribution": "normal", "mean": 15, "stddev": 2},
+    "interest_rate": {"distribution": "pareto", "mean": 4, "shape": 3},
+}
+
+def collect(results, n):
+    npvs, irrs = np.empty(n), np.empty(n)
+    for _, start, chunk_npvs, chunk_irrs in results:
+        npvs[start:start + len(chunk_npvs)] = chunk_npvs
+        irrs[start:start + len(chunk_irrs)] = chunk_irrs
+    return npvs, irrs
+
+def test_vectorized_simulations_match_per_simulation_engine():
+    rng = np.random.default_rng(3)
+    n = 200
+    samples = {
+        "annual_rent_growth": rng.normal(2, 1, n),
+        "discount_rate": rng.normal(15, 2, n),
+        "interest_rate": rng.normal(5, 1, n),
+    }
+    npvs, irrs = simulate_chunk(normalize_inputs(MC_INPUT), samples)
+    for i in range(n):
+        sim_input = {**MC_INPUT, **{field: values[i] for field, values in samples.items()}}
+        rows = calculate_cash_flows(sim_input)
+        assert npvs[i] == pytest.approx(rows[-1]["cumulative_pv"], abs=0.01)
+        irr = calculate_irr([row["net_cash_flow"] for row in rows])
+        assert irrs[i] == pytest.approx(irr, abs=1e-6)
+
+def test_chunking_bounds_memory_and_reports_progress():
+    assert monte_carlo_chunk_size(1_000_000, 25) == 250_000 // 26
+    assert monte_carlo_chunk_size(100, 25) == 5
+    completed = [done for done, _, _, _ in run_monte_carlo(MC_INPUT, DISTRIBUTIONS, 1000, seed=1)]
+    assert completed == list(range(50, 1001, 50))
+
+def test_seeded_runs_are_reproducible_across_worker_counts():
+    n = 40_000
+    inline = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, n, seed=42, workers=1), n)
+    pooled = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, n, seed=42, workers=2), n)
+    np.testing.assert_array_equal(inline[0], pooled[0])
+    np.testing.assert_array_equal(inline[1], pooled[1])
+    other = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, n, seed=43, workers=1), n)
+    assert not np.array_equal(inline[0], other[0])
+
+    # Polled runs may interleave idle ticks but produce the same results
+    polled = list(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, n, seed=42, workers=2, poll=1e-4))
+    results = [chunk for chunk in polled if chunk is not None]
+    assert results[-1][0] == n
+    np.testing.assert_array_equal(collect(results, n)[0], inline[0])
+
+    # Closing a run early cancels its queued chunks and leaves the pool usable
+    run = run_monte_carlo(MC_INPUT, DISTRIBUTIONS, n, seed=42, workers=2)
+    assert next(run)[0] < n
+    run.close()
+    np.testing.assert_array_equal(collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, n, seed=42, workers=2), n)[0], inline[0])
+
+
+def test_chart_payload_summarizes_without_raw_arrays():
+    npvs, irrs = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, 5000, seed=2), 5000)
+    irrs[:10] = np.nan
+    charts = chart_payload(npvs, irrs, bins=25, sample_size=100, seed=2)
+    assert len(charts["histograms"]["npv"]["counts"]) == 25
+    assert charts["histograms"]["npv"]["counts"].sum() == 5000
+    assert charts["histograms"]["irr"]["counts"].sum() == 4990
+    assert charts["cdf"]["npv"][4] == pytest.approx(np.median(npvs))
+    assert len(charts["sample"]["npv"]) == 100
+    assert np.isin(charts["sample"]["npv"], npvs).all()
+    # Same seed, same scatter points; adaptive rules stay within the bin cap
+    again = chart_payload(npvs, irrs, sample_size=100, seed=2)
+    np.testing.assert_array_equal(again["sample"]["npv"], charts["sample"]["npv"])
+    assert len(chart_payload(npvs, irrs, bins="fd")["histograms"]["npv"]["counts"]) <= 200
+
+
+@pytest.mark.parametrize("value", [[], {"bins": 0}, {"bins": "bogus"}, {"bins": True}, {"sample_size": -1}])
+def test_parse_chart_options_rejects_invalid(value):
+    assert parse_chart_options(value)[0] is False
+
+
+@pytest.mark.parametrize("config", list(DISTRIBUTIONS.values()))
+def test_inverse_cdf_matches_sampled_distribution(config):
+    u = (np.arange(20_000) + 0.5) / 20_000
+    drawn = generate_random_variable(config, 200_000, np.random.default_rng(0))
+    levels = [0.05, 0.25, 0.5, 0.75, 0.95]
+    np.testing.assert_allclose(np.quantile(inverse_cdf(config, u), levels), np.quantile(drawn, levels), rtol=0.02)
+
+
+@pytest.mark.parametrize("sampling", ["sobol", "lhs"])
+def test_quasi_random_runs_are_seeded(sampling):
+    first = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, 1000, seed=5, sampling=sampling), 1000)
+    second = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, 1000, seed=5, sampling=sampling), 1000)
+    np.testing.assert_array_equal(first[0], second[0])
+    assert np.isfinite(first[0]).all()
+
+
+def test_sobol_sequence_does_not_depend_on_chunking():
+    default = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, 1000, seed=5, sampling="sobol"), 1000)
+    small = collect(run_monte_carlo(MC_INPUT, DISTRIBUTIONS, 1000, seed=5, sampling="sobol", chunk_size=64), 1000)
+    np.testing.assert_allclose(default[0], small[0])
+
+
+def test_every_stochastic_field_matches_per_simulation_engine():
+    rng = np.random.default_rng(8)
+    n = 50
+    base = {**MC_INPUT, "capex": 500, "vacancy_rate": 5, "selling_costs": 2}
+    samples = {field: normalize_inputs(base)[field] * rng.uniform(0.8, 1.2, n) for field in STOCHASTIC_FIELDS}
+    npvs, _ = simulate_chunk(normalize_inputs(base), samples)
+    for i in range(n):
+        rows = calculate_cash_flows({**base, **{field: values[i] for field, values in samples.items()}})
+        assert npvs[i] == pytest.approx(rows[-1]["cumulative_pv"], abs=0.01)
+
+
+CORRELATED = {
+    "discount_rate": {"distribution": "normal", "mean": 10, "stddev": 1},
+    "exit_cap_rate": {"distribution": "normal", "mean": 6, "stddev": 0.5},
+    "interest_rate": {"distribution": "pareto", "mean": 4, "shape": 3},
+}
+
+
+@pytest.mark.parametrize("sampling", ["random", "sobol"])
+def test_correlated_samples_keep_marginals(sampling):
+    correlation = {"fields": ["exit_cap_rate", "discount_rate"], "matrix": [[1, 0.7], [0.7, 1]]}
+    factor = correlation_factor(list(CORRELATED), correlation)
+    rng, qmc_seed = np.random.default_rng(1), np.random.SeedSequence(1)
+    samples = sample_inputs(CORRELATED, 0, 50_000, rng, sampling, qmc_seed, factor)
+    assert np.corrcoef(samples["discount_rate"], samples["exit_cap_rate"])[0, 1] == pytest.approx(0.7, abs=0.02)
+    assert abs(np.corrcoef(samples["discount_rate"], samples["interest_rate"])[0, 1]) < 0.03
+    assert samples["exit_cap_rate"].mean() == pytest.approx(6, abs=0.02)
+    assert samples["exit_cap_rate"].std() == pytest.approx(0.5, abs=0.02)
+    assert samples["interest_rate"].min() >= 4
+
+
+def test_perfectly_correlated_fields_use_semidefinite_factor():
+    correlation = {"fields": ["discount_rate", "exit_cap_rate"], "matrix": [[1, 1], [1, 1]]}
+    factor = correlation_factor(list(CORRELATED), correlation)
+    samples = sample_inputs(CORRELATED, 0, 1000, np.random.default_rng(2), factor=factor)
+    np.testing.assert_allclose((samples["discount_rate"] - 10) / 1, (samples["exit_cap_rate"] - 6) / 0.5, atol=1e-6)
+
+
+@pytest.mark.parametrize("value", [
+    {"fields": ["discount_rate"], "matrix": [[1, 0], [0, 1]]},
+    {"fields": ["discount_rate", "ltv"], "matrix": [[1, 0], [0, 1]]},
+    {"fields": ["discount_rate", "exit_cap_rate"], "matrix": [[1, 0.5], [0.4, 1]]},
+    {"fields": ["discount_rate", "exit_cap_rate"], "matrix": [[2, 0], [0, 1]]},
+    {"fields": ["discount_rate", "exit_cap_rate", "interest_rate"],
+     "matrix": [[1, 0.9, -0.9], [0.9, 1, 0.9], [-0.9, 0.9, 1]]},
+    {"fields": "discount_rate"},
+])
+def test_parse_correlation_rejects_invalid(value):
+    assert parse_correlation(value, list(CORRELATED))[0] is False
+
+
+PORTFOLIO = [
+    MC_INPUT,
+    {**MC_INPUT, "initial_investment": 150_000, "annual_rental_income": 14_000, "holding_period": 6, "exit_cap_rate": 5},
+    {**MC_INPUT, "ltv": 0, "holding_period": 3, "capex": 400},
+]
+
+
+def test_portfolio_chunk_matches_per_property_engine():
+    rng = np.random.default_rng(6)
+    n = 20
+    rows = [normalize_inputs(inputs) for inputs in PORTFOLIO]
+    property_params = {field: np.array([row[field] for row in rows]) for field in rows[0]}
+    macro = {"discount_rate": rng.normal(0, 2, n)}
+    noise = {"annual_rent_growth": rng.normal(0, 1, (n, len(PORTFOLIO)))}
+    npvs, irrs, property_npvs = simulate_portfolio_chunk(property_params, macro, noise, n)
+    for i in range(n):
+        total_cash_flows = np.zeros(max(inputs["holding_period"] for inputs in PORTFOLIO) + 1)
+        for p, inputs in enumerate(PORTFOLIO):
+            rows = calculate_cash_flows({
+                **inputs,
+                "discount_rate": inputs["discount_rate"] + macro["discount_rate"][i],
+                "annual_rent_growth": inputs["annual_rent_growth"] + noise["annual_rent_growth"][i, p],
+            })
+            assert property_npvs[i, p] == pytest.approx(rows[-1]["cumulative_pv"], abs=0.05)
+            total_cash_flows[:len(rows)] += [row["net_cash_flow"] for row in rows]
+        assert npvs[i] == pytest.approx(property_npvs[i].sum())
+        assert irrs[i] == pytest.approx(calculate_irr(list(total_cash_flows)), abs=1e-6)
+
+
+def test_portfolio_runs_are_chunked_and_seeded():
+    macro = {"discount_rate": {"distribution": "normal", "mean": 0, "stddev": 2}}
+    results = list(run_portfolio_monte_carlo(PORTFOLIO, macro, {"annual_rent_growth": 1}, 2000, seed=3))
+    assert [r[0] for r in results][-1] == 2000
+    assert results[0][4].shape == (len(results[0][2]), len(PORTFOLIO))
+    again = list(run_portfolio_monte_carlo(PORTFOLIO, macro, {"annual_rent_growth": 1}, 2000, seed=3))
+    np.testing.assert_array_equal(results[-1][2], again[-1][2])
+
+
+def test_ar1_paths_mean_revert():
+    config = {"distribution": "ar1", "mean": 2, "stddev": 1, "phi": 0.6}
+    paths = ar1_paths(config, 100_000, 10, np.random.default_rng(0))
+    assert paths.shape == (100_000, 10)
+    # Stationary start: every year has the same mean and variance
+    assert paths.mean(axis=0) == pytest.approx(np.full(10, 2), abs=0.02)
+    assert paths.var(axis=0) == pytest.approx(np.full(10, 1 / (1 - 0.36)), rel=0.03)
+    assert np.corrcoef(paths[:, 4], paths[:, 5])[0, 1] == pytest.approx(0.6, abs=0.01)
+    # From an initial value the mean decays geometrically towards the long-run mean
+    started = ar1_paths({**config, "initial": 7}, 100_000, 3, np.random.default_rng(1), dtype="float32")
+    assert started.dtype == np.float32
+    assert started.mean(axis=0) == pytest.approx([2 + 5 * 0.6, 2 + 5 * 0.36, 2 + 5 * 0.216], abs=0.02)
+
+
+def test_path_inputs_reproduce_compounded_paths():
+    rng = np.random.default_rng(2)
+    growth = rng.normal(2, 3, (5, 10))
+    discount = rng.normal(8, 2, (5, 10))
+    params = {
+        **normalize_inputs(MC_INPUT),
+        "annual_rent_growth": path_kernel_input("annual_rent_growth", growth),
+        "discount_rate": path_kernel_input("discount_rate", discount),
+    }
+    columns = dcf_kernel(params, np.arange(11)[None, :])
+    expected_rent = MC_INPUT["annual_rental_income"] * np.cumprod(1 + growth[:, 1:] / 100, axis=1)
+    np.testing.assert_allclose(columns["gross_rent"][:, 2:], expected_rent)
+    np.testing.assert_allclose(columns["discount_factor"][:, 1:], np.cumprod(1 / (1 + discount / 100), axis=1))
+
+    # A flat path prices like the constant input
+    flat = {"annual_rent_growth": np.full((3, 10), 2.0), "discount_rate": np.full((3, 10), 15.0)}
+    constant = {"annual_rent_growth": np.full(3, 2.0), "discount_rate": np.full(3, 15.0)}
+    np.testing.assert_allclose(
+        simulate_chunk(normalize_inputs(MC_INPUT), flat)[0], simulate_chunk(normalize_inputs(MC_INPUT), constant)[0]
+    )
+
+
+def test_in_start_order_holds_chunks_that_finish_early():
+    chunks = [(2, 3, [0, 0]), None, (4, 8, [0, 0]), (6, 0, [0, 0]), (9, 5, [0, 0, 0]), (10, 2, [0])]
+    assert [chunk and chunk[:2] for chunk in in_start_order(chunks)] == [None, (2, 0), (3, 2), (5, 3), (8, 5), (10, 8)]
+
+
+def test_memory_plan_bounds_chunks():
+    default = monte_carlo_memory_plan(1_000_000, 30)
+    assert default["chunk_size"] == monte_carlo_chunk_size(1_000_000, 30)
+    limit = 40 * 2**20
+    plan = monte_carlo_memory_plan(1_000_000, 30, memory_limit=limit)
+    assert plan["chunk_size"] < default["chunk_size"]
+    assert plan["estimated_bytes"] <= limit
+    wide = monte_carlo_memory_plan(1_000_000, 30, dtype="float32", memory_limit=limit)
+    assert wide["chunk_size"] > plan["chunk_size"]
+    with pytest.raises(ValueError):
+        monte_carlo_memory_plan(1_000_000, 30, memory_limit=16 * 2**20)
+    assert monte_carlo_memory_plan(1_000_000, 30, keep_samples=False, memory_limit=16 * 2**20)["chunk_size"] > 0
+    # Pooled runs are sized for MONTE_CARLO_MAX_WORKERS chunks in flight, whatever the CPU count
+    pooled = monte_carlo_memory_plan(MONTE_CARLO_PARALLEL_THRESHOLD, 30, memory_limit=limit)
+    assert pooled["estimated_bytes"] <= limit
+    assert pooled["chunk_size"] * MONTE_CARLO_MAX_WORKERS * 31 * MONTE_CARLO_WORKING_ARRAYS * 8 <= limit
@@ -0,0 +1,49 @@
+import base64
+import struct
+
+import numpy as np
+from werkzeug.datastructures import MIMEAccept
+
+from payload_formats import (
+    compress_float64,
+    decode_binary,
+    decompress_float64,
+    encode_binary,
+    encode_float64_base64,
+    parse_response_format,
+    rows_to_columns,
+)
+
+def test_rows_to_columns():
+    rows = [{"year": 0, "noi": 1.5}, {"year": 1, "noi": 2.25}]
+    assert rows_to_columns(rows) == {"year": [0, 1], "noi": [1.5, 2.25]}
+    assert rows_to_columns([]) == {}
+
+def test_binary_round_trip_and_alignment():
+    columns = {"year": [0, 1, 2], "net_cash_flow": [-1000.5, 200.25, float("nan")]}
+    payload = encode_binary(columns)
+    (header_length,) = struct.unpack_from("<I", payload)
+    assert (4 + header_length) % 8 == 0
+    assert len(payload) == 4 + header_length + 2 * 3 * 8
+    decoded = decode_binary(payload)
+    assert decoded["year"].tolist() == [0, 1, 2]
+    assert decoded["net_cash_flow"][:2].tolist() == [-1000.5, 200.25]
+    assert np.isnan(decoded["net_cash_flow"][2])
+
+def test_float64_base64():
+    encoded = encode_float64_base64([1.0, -2.5])
+    assert np.frombuffer(base64.b64decode(encoded), "<f8").tolist() == [1.0, -2.5]
+
+def test_parse_response_format():
+    assert parse_response_format(None) == (True, "json")
+    assert parse_response_format("columnar") == (True, "columnar")
+    assert parse_response_format(None, MIMEAccept([("application/octet-stream", 1)])) == (True, "binary")
+    assert parse_response_format("xml")[0] is False
+
+def test_compressed_float64_round_trip():
+    values = np.random.default_rng(0).normal(10000, 5000, 5000)
+    values[::50] = np.nan
+    blob = compress_float64(values)
+    assert len(blob) < values.nbytes
+    np.testing.assert_array_equal(decompress_float64(blob), values)
+    assert decompress_float64(compress_float64([])).shape == (0,)
@@ -1,7 +1,127 @@
+import json
 import time
+from fractions import Fraction
 import numpy as np
-from app import calculate_cash_flows, calculate_irr
+from app import Valuation, calculate_cash_flows, calculate_irr, clean_for_json
+from json_provider import dumps_bytes
+
+BENCHMARK_INPUT = {
+    "initial_investment": 250000,
+    "annual_rental_income": 21000,
+    "vacancy_rate": 4,
+    "service_charge": 1200,
+    "ground_rent": 250,
+    "maintenance": 1100,
+    "property_tax": 1800,
+    "insurance": 350,
+    "management_fees": 10,
+    "transaction_costs": 7500,
+    "annual_rent_growth": 2.75,
+    "discount_rate": 7.5,
+    "ltv": 75,
+    "interest_rate": 5.25,
+    "capex": 900,
+    "exit_cap_rate": 5.5,
+    "selling_costs": 2.5,
+}
+
+def fraction_cash_flows(input):
+    """The previous Fraction-based exact engine, kept as the benchmark baseline."""
+    f = {k: Fraction(str(input.get(k, 0) or 0)) for k in BENCHMARK_INPUT}
+    holding_period = int(input["holding_period"])
+    monthly_rate = f["interest_rate"] / 100 / 12
+    num_payments = holding_period * 12
+    mortgage_amount = f["initial_investment"] * (f["ltv"] / 100)
+    annual_mortgage_payment = 12 * mortgage_amount * (monthly_rate * (1 + monthly_rate) ** num_payments) / ((1 + monthly_rate) ** num_payments - 1)
+    fixed_costs = f["service_charge"] + f["ground_rent"] + f["maintenance"] + f["property_tax"] + f["insurance"]
+    rows = [{"year": 0, "net_cash_flow": -f["initial_investment"] - f["transaction_costs"] - f["property_tax"]}]
+    cumulative_pv = rows[0]["net_cash_flow"]
+    for year in range(1, holding_period + 1):
+        gross_rent = f["annual_rental_income"] * (1 + f["annual_rent_growth"] / 100) ** (year - 1)
+        effective_rent = gross_rent - gross_rent * (f["vacancy_rate"] / 100)
+        management_fee = effective_rent * f["management_fees"] / 100
+        noi = effective_rent - (fixed_costs + management_fee)
+        net_cash_flow = noi - f["capex"] - annual_mortgage_payment
+        if year == holding_period:
+            terminal_value = noi / (f["exit_cap_rate"] / 100)
+            net_cash_flow += terminal_value - terminal_value * (f["selling_costs"] / 100)
+        cumulative_pv += net_cash_flow / (1 + f["discount_rate"] / 100) ** year
+        rows.append({"year": year, "net_cash_flow": net_cash_flow, "cumulative_pv": cumulative_pv})
+    rows[0]["cumulative_pv"] = rows[0]["net_cash_flow"]
+    return rows
+
+def _best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+BENCHMARK_HOLDING_PERIODS = (5, 25, 100)
+
+def test_decimal_engine_matches_fraction_engine():
+    for holding_period in BENCHMARK_HOLDING_PERIODS:
+        input_data = {**BENCHMARK_INPUT, "holding_period": holding_period}
+        exact = fraction_cash_flows(input_data)
+        rows = calculate_cash_flows(input_data)
+        for fraction_row, row in zip(exact, rows):
+            assert row["net_cash_flow"] == float(round(fraction_row["net_cash_flow"], 2))
+            assert abs(row["cumulative_pv"] - float(fraction_row["cumulative_pv"])) <= 0.005
+
+def benchmark_engines():
+    """Print Fraction vs Decimal vs fast engine timings (wall-clock, so not part of the suite)."""
+    print(f"{'years':>5} {'fraction ms':>12} {'decimal ms':>11} {'fast ms':>8} {'speed-up':>9}")
+    for holding_period in BENCHMARK_HOLDING_PERIODS:
+        input_data = {**BENCHMARK_INPUT, "holding_period": holding_period}
+        repeats = 3 if holding_period == 100 else 10
+        fraction_s = _best_time(lambda: fraction_cash_flows(input_data), repeats)
+        decimal_s = _best_time(lambda: calculate_cash_flows(input_data), repeats)
+        fast_s = _best_time(lambda: calculate_cash_flows(input_data, engine="fast"), repeats)
+        print(f"{holding_period:>5} {fraction_s * 1e3:>12.2f} {decimal_s * 1e3:>11.2f} {fast_s * 1e3:>8.3f} {fraction_s / decimal_s:>8.1f}x")
+
+def test_irr_on_decimal_cash_flows():
+    rows = calculate_cash_flows({**BENCHMARK_INPUT, "holding_period": 25})
+    irr = calculate_irr([row["net_cash_flow"] for row in rows])
+    assert irr is not None and np.isfinite(irr)
+
+def legacy_serialize(payload):
+    """The previous response path: clean_for_json walk, then stdlib json (as jsonify did)."""
+    return json.dumps(clean_for_json(payload), sort_keys=True).encode("utf-8")
+
+def serialization_payloads():
+    """Large responses as (legacy, provider) serializer pairs, keyed by name."""
+    valuations = [
+        Valuation(id=str(i), property_id=str(i), created_at="2024-01-01T00:00:00+00:00", holding_period=25,
+                  **{k: float(v) for k, v in BENCHMARK_INPUT.items()})
+        for i in range(5000)
+    ]
+    rng = np.random.default_rng(0)
+    npvs = rng.normal(10000, 5000, 50000).tolist()
+    irrs = np.where(rng.random(50000) < 0.05, np.nan, rng.normal(0.08, 0.02, 50000)).tolist()
+    return {
+        "valuations x5000": (
+            lambda: legacy_serialize({"items": [v.to_dict() for v in valuations]}),
+            lambda: dumps_bytes({"items": valuations}),
+        ),
+        "monte carlo 50k": (
+            lambda: legacy_serialize({"npvs": npvs, "irrs": irrs, "done": True}),
+            lambda: dumps_bytes({"npvs": npvs, "irrs": irrs, "done": True}),
+        ),
+    }
+
+def test_provider_matches_legacy_serialization():
+    for legacy, provider in serialization_payloads().values():
+        assert json.loads(legacy()) == json.loads(provider())
+
+def benchmark_serialization():
+    """Print legacy vs single-pass provider serialization timings."""
+    print(f"{'payload':>18} {'legacy ms':>10} {'provider ms':>12} {'speed-up':>9}")
+    for name, (legacy, provider) in serialization_payloads().items():
+        legacy_s, provider_s = _best_time(legacy, 3), _best_time(provider, 3)
+        print(f"{name:>18} {legacy_s * 1e3:>10.1f} {provider_s * 1e3:>12.1f} {legacy_s / provider_s:>8.1f}x")
 
 if __name__ == "__main__":
-    # Run performance tests directly
-    test_performance_comparison() 
\ No newline at end of file
+    # Timing comparisons only run directly: python tests/test_performance.py
+    benchmark_engines()
+    benchmark_serialization()
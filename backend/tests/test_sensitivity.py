@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+import pytest
+from fast_dcf import MAX_HOLDING_PERIOD, calculate_cash_flows_batch, normalize_inputs
+from irr_solver import irr_batch
+from sensitivity import (
+    parse_sensitivity_axis,
+    parse_sensitivity_request,
+    parse_tornado_bumps,
+    sensitivity_grid,
+    tornado,
+)
+
+BASE_INPUT = {
+    "initial_investment": 250000,
+    "annual_rental_income": 21000,
+    "vacancy_rate": 4,
+    "maintenance": 1100,
+    "property_tax": 1800,
+    "management_fees": 10,
+    "transaction_costs": 7500,
+    "annual_rent_growth": 2.5,
+    "discount_rate": 7.5,
+    "holding_period": 10,
+    "ltv": 60,
+    "interest_rate": 5,
+    "exit_cap_rate": 5.5,
+    "selling_costs": 2,
+}
+
+
+def batch_results(inputs):
+    batch = calculate_cash_flows_batch(inputs)
+    irrs, _ = irr_batch(batch["net_cash_flow"])
+    return batch["npv"], irrs * 100
+
+
+def test_grid_matches_per_cell_batch():
+    x = {"field": "discount_rate", "values": [5.0, 7.5, 10.0]}
+    y = {"field": "annual_rent_growth", "values": [0.0, 2.0, 4.0, 6.0]}
+    grid = sensitivity_grid(normalize_inputs(BASE_INPUT), x, y)
+    assert grid["npv"].shape == grid["irr"].shape == (3, 4)
+    cells = [{**BASE_INPUT, "discount_rate": r, "annual_rent_growth": g} for r in x["values"] for g in y["values"]]
+    npvs, irrs = batch_results(cells)
+    np.testing.assert_allclose(grid["npv"].ravel(), npvs, rtol=1e-12)
+    np.testing.assert_allclose(grid["irr"].ravel(), irrs, rtol=1e-10)
+    base_npv, base_irr = batch_results([BASE_INPUT])
+    assert grid["base"] == {"npv": pytest.approx(base_npv[0]), "irr": pytest.approx(base_irr[0])}
+
+
+def test_grid_over_holding_periods_pads_years():
+    x = {"field": "holding_period", "values": [3.0, 10.0, 25.0]}
+    y = {"field": "exit_cap_rate", "values": [4.0, 6.0]}
+    grid = sensitivity_grid(normalize_inputs(BASE_INPUT), x, y)
+    cells = [{**BASE_INPUT, "holding_period": h, "exit_cap_rate": c} for h in x["values"] for c in y["values"]]
+    npvs, irrs = batch_results(cells)
+    np.testing.assert_allclose(grid["npv"].ravel(), npvs, rtol=1e-12)
+    np.testing.assert_allclose(grid["irr"].ravel(), irrs, rtol=1e-10)
+
+
+def test_tornado_bars_sorted_by_swing():
+    result = tornado(normalize_inputs(BASE_INPUT), {"discount_rate": 1, "vacancy_rate": 2, "exit_cap_rate": 0.5})
+    swings = [bar["swing"] for bar in result["bars"]]
+    assert swings == sorted(swings, reverse=True)
+    bar = next(bar for bar in result["bars"] if bar["field"] == "discount_rate")
+    assert (bar["low_value"], bar["high_value"]) == (6.5, 8.5)
+    npvs, irrs = batch_results([{**BASE_INPUT, "discount_rate": 6.5}, {**BASE_INPUT, "discount_rate": 8.5}])
+    assert (bar["npv_low"], bar["npv_high"]) == (pytest.approx(npvs[0]), pytest.approx(npvs[1]))
+    assert bar["npv_delta_low"] == pytest.approx(npvs[0] - result["base"]["npv"])
+    assert bar["irr_low"] == pytest.approx(irrs[0])
+
+
+def test_parse_sensitivity_requests():
+    assert parse_sensitivity_axis({"field": "discount_rate", "min": 4, "max": 8, "steps": 5}) == (
+        True, {"field": "discount_rate", "values": [4.0, 5.0, 6.0, 7.0, 8.0]}
+    )
+    assert not parse_sensitivity_axis({"field": "nope", "values": [1]})[0]
+    assert not parse_sensitivity_axis({"field": "discount_rate", "min": 8, "max": 4})[0]
+    assert not parse_sensitivity_axis({"field": "discount_rate", "min": 0, "max": 1, "steps": 101})[0]
+    assert not parse_sensitivity_axis({"field": "holding_period", "values": [2.5]})[0]
+    assert not parse_sensitivity_axis({"field": "holding_period", "values": [MAX_HOLDING_PERIOD + 1]})[0]
+    assert not parse_sensitivity_axis({"field": "ltv", "values": [10**400]})[0]
+    assert not parse_tornado_bumps({"holding_period": MAX_HOLDING_PERIOD + 1})[0]
+    assert not parse_tornado_bumps({"ltv": 10**400})[0]
+    assert not parse_tornado_bumps({"discount_rate": -1})[0]
+    assert not parse_tornado_bumps({})[0]
+    same = {"x": {"field": "ltv", "values": [50]}, "y": {"field": "ltv", "values": [60]}}
+    assert not parse_sensitivity_request(same)[0]
+    assert not parse_sensitivity_request({"mode": "spider"})[0]
+    assert parse_sensitivity_request({"mode": "tornado", "bumps": {"ltv": 10}}) == (
+        True, {"mode": "tornado", "bumps": {"ltv": 10.0}}
+    )
+
+
+def test_tornado_holding_period_stays_within_max():
+    result = tornado(normalize_inputs({**BASE_INPUT, "holding_period": 90}), {"holding_period": 20})
+    assert (result["bars"][0]["low_value"], result["bars"][0]["high_value"]) == (70, MAX_HOLDING_PERIOD)
+
+
+GRID_50_BY_50 = (
+    {"field": "discount_rate", "values": np.linspace(4, 12, 50).tolist()},
+    {"field": "annual_rent_growth", "values": np.linspace(-1, 5, 50).tolist()},
+)
+
+
+def test_50_by_50_grid():
+    grid = sensitivity_grid(normalize_inputs({**BASE_INPUT, "holding_period": 25}), *GRID_50_BY_50)
+    assert np.isfinite(grid["npv"]).all()
+
+
+def benchmark_grid():
+    """Print the time of a 50 x 50 grid (wall-clock, so not part of the suite)."""
+    base_params = normalize_inputs({**BASE_INPUT, "holding_period": 25})
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        sensitivity_grid(base_params, *GRID_50_BY_50)
+        best = min(best, time.perf_counter() - start)
+    print(f"50 x 50 grid, 25 years: {best * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    # Timing only runs directly: python tests/test_sensitivity.py
+    benchmark_grid()
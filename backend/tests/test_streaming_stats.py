@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from streaming_stats import (
+    MonteCarloAccumulator,
+    RunningCovariance,
+    RunningMoments,
+    TDigest,
+    diversification_statistics,
+)
+
+def sample(n=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.normal(10000, 5000, n), rng.lognormal(8, 1, n // 4) - 20000])
+
+def test_running_moments_match_numpy_across_chunks():
+    values = sample()
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 37):
+        moments.update(chunk)
+    assert moments.count == values.size
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.variance == pytest.approx(values.var(ddof=1))
+
+def test_tdigest_quantiles_within_small_rank_error():
+    values = sample()
+    digest = TDigest()
+    for chunk in np.array_split(values, 50):
+        digest.update(chunk)
+    assert digest.means.size < 500
+    ordered = np.sort(values)
+    for q in (0.01, 0.05, 0.5, 0.95, 0.99):
+        rank = np.searchsorted(ordered, digest.quantile(q)) / values.size
+        assert abs(rank - q) < 0.002
+    assert digest.tail_mean(0.05) == pytest.approx(ordered[: values.size // 20].mean(), rel=0.002)
+
+def test_accumulators_merge_like_one_stream():
+    values = sample()
+    irrs = np.where(values > 0, values / 1e5, np.nan)
+    whole = MonteCarloAccumulator()
+    whole.update(values, irrs)
+    left, right = MonteCarloAccumulator(), MonteCarloAccumulator()
+    left.update(values[:1000], irrs[:1000])
+    right.update(values[1000:], irrs[1000:])
+    left.merge(right)
+    merged, expected = left.summary(), whole.summary()
+    assert merged.keys() == expected.keys()
+    for key, value in expected.items():
+        assert merged[key] == pytest.approx(value, rel=0.01), key
+    assert expected["probability_npv_positive"] == pytest.approx(np.mean(values > 0))
+    assert expected["percent_valid_irr"] == pytest.approx(100 * np.mean(values > 0))
+
+def test_empty_accumulator_summary():
+    summary = MonteCarloAccumulator().summary()
+    assert summary["npv_mean"] is None
+    assert summary["simulations"] == 0
+
+
+def test_relative_precision_shrinks_with_more_simulations():
+    rng = np.random.default_rng(4)
+    stats = MonteCarloAccumulator()
+    stats.update(rng.normal(1000, 100, 500), np.full(500, 0.1))
+    assert not stats.meets_precision(0.5)  # too few simulations to trust
+    coarse = stats.relative_precision()
+    stats.update(rng.normal(1000, 100, 50_000), np.full(50_000, 0.1))
+    assert stats.relative_precision() < coarse / 5
+    assert stats.meets_precision(0.01)
+    assert MonteCarloAccumulator().relative_precision() == np.inf
+
+
+def test_running_covariance_and_diversification():
+    rng = np.random.default_rng(5)
+    common = rng.normal(0, 1, 20_000)
+    values = np.column_stack([common + rng.normal(0, 1, 20_000) for _ in range(3)]) * [100, 200, 300]
+    moments = RunningCovariance(3)
+    for chunk in np.array_split(values, 7):
+        moments.update(chunk)
+    np.testing.assert_allclose(moments.covariance, np.cov(values, rowvar=False))
+    np.testing.assert_allclose(moments.mean, values.mean(axis=0))
+
+    stats = diversification_statistics(moments)
+    assert stats["portfolio_npv_std"] == pytest.approx(values.sum(axis=1).std(ddof=1))
+    assert stats["diversification_ratio"] > 1
+    assert stats["average_correlation"] == pytest.approx(0.5, abs=0.02)
+    assert stats["risk_contribution"].sum() == pytest.approx(1)
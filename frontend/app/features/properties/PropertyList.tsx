@@ -38,6 +38,9 @@ export default function HomePage() {
         setProperties(data);
         // For each property, fetch valuation and cash flows
         const ribbonsObj: Record<string, RibbonData> = {};
+        // IRRs for every property are solved in one batch request below
+        const pending: { propertyId: string; npv: number; series: number[] }[] =
+          [];
         await Promise.all(
           data.map(async (property) => {
             const valuation = await valuationsAPI.getByPropertyId(property.id);
@@ -93,32 +96,32 @@ export default function HomePage() {
             }
             const npv = cashFlows[cashFlows.length - 1]?.cumulative_pv;
             const netCashFlows = cashFlows.map((row) => row.net_cash_flow);
-            let irr: number | null = null;
-            if (netCashFlows.length > 1) {
-              try {
-                irr = await valuationsAPI.calculateIRR([
-                  -valuation.initial_investment,
-                  ...netCashFlows,
-                ]);
-              } catch {
-                irr = null;
-              }
-            }
-            if (npv > 0 && irr && irr > 0) {
-              ribbonsObj[property.id] = {
-                status: "buy",
-                npv,
-                irr: irr || undefined,
-              };
-            } else {
-              ribbonsObj[property.id] = {
-                status: "no-buy",
-                npv,
-                irr: irr || undefined,
-              };
-            }
+            pending.push({
+              propertyId: property.id,
+              npv,
+              series: [-valuation.initial_investment, ...netCashFlows],
+            });
           }),
         );
+        let irrs: (number | null)[] = pending.map(() => null);
+        if (pending.length > 0) {
+          try {
+            const results = await valuationsAPI.calculateIRRBatch(
+              pending.map((p) => p.series),
+            );
+            irrs = results.map((r) => r.irr);
+          } catch {
+            // Ribbons still show NPV-based status without IRRs
+          }
+        }
+        pending.forEach(({ propertyId, npv }, i) => {
+          const irr = irrs[i];
+          ribbonsObj[propertyId] = {
+            status: npv > 0 && irr && irr > 0 ? "buy" : "no-buy",
+            npv,
+            irr: irr || undefined,
+          };
+        });
         setRibbons(ribbonsObj);
         // Fetch portfolios
         const portfoliosData = await portfoliosAPI.getAll();
@@ -29,6 +29,15 @@ interface MonteCarloSummary {
   percent_valid_irr?: number | null;
 }
 
+// Initial seed; "New Sample" draws another one
+const MONTE_CARLO_SEED = 1;
+
+interface HistogramBin {
+  count: number;
+  range: number[];
+  height: number;
+}
+
 interface RentalAnalysis {
   metrics: {
     monthly_cash_flow: number;
@@ -110,7 +119,8 @@ export default function ValuationDetailPage() {
   const [mcInterestStd, setMcInterestStd] = useState(1);
   const [mcInterestShape, setMcInterestShape] = useState(4);
   const [mcNumSim, setMcNumSim] = useState(10000);
-  const [mcResults, setMcResults] = useState<number[]>([]);
+  const [mcSeed, setMcSeed] = useState(MONTE_CARLO_SEED);
+  const [mcHistogram, setMcHistogram] = useState<HistogramBin[]>([]);
   const [mcSummary, setMcSummary] = useState<MonteCarloSummary | null>(null);
   const [mcProgress, setMcProgress] = useState(0);
   const [mcTotal, setMcTotal] = useState(0);
@@ -358,12 +368,12 @@ export default function ValuationDetailPage() {
     setSaving(false);
   };
 
-  const runMonteCarlo = async () => {
+  const runMonteCarlo = async (seed: number = mcSeed) => {
     if (!valuation) return;
     setMcRunning(true);
     setMcProgress(0);
     setMcTotal(mcNumSim);
-    setMcResults([]);
+    setMcHistogram([]);
     setMcSummary(null);
     const textDecoder = new TextDecoder();
     // Prepare the request body for POST
@@ -394,6 +404,11 @@ export default function ValuationDetailPage() {
               shape: mcDiscountShape,
             },
       num_simulations: mcNumSim,
+      // Server-side bins instead of one NPV per simulation
+      histogram: { bins: 20, sample_size: 0 },
+      // A seeded run is cacheable, so repeat views are instant; writes to the valuation invalidate them
+      seed,
+      valuation_id: valuation.id,
     };
     if (parseFloat(String(valuation.ltv ?? "")) > 0) {
       body.interest_rate =
@@ -448,7 +463,14 @@ export default function ValuationDetailPage() {
                 setMcProgress(Math.round((payload.progress / 100) * mcNumSim));
               }
               if (payload.done) {
-                setMcResults(payload.npvs || []);
+                setMcHistogram(
+                  payload.histograms?.npv
+                    ? histogramFromBins(
+                        payload.histograms.npv.edges,
+                        payload.histograms.npv.counts,
+                      )
+                    : getHistogram(payload.npvs || [], 20),
+                );
                 setMcSummary(payload.summary || null);
                 setMcProgress(mcNumSim);
               }
@@ -466,6 +488,13 @@ export default function ValuationDetailPage() {
     }
   };
 
+  // Draw a fresh sample; the new seed is kept so repeat runs reuse its cached result
+  const rerollMonteCarlo = () => {
+    const seed = Math.floor(Math.random() * 2 ** 31);
+    setMcSeed(seed);
+    runMonteCarlo(seed);
+  };
+
   const runRentalAnalysis = async () => {
     if (!valuation) return;
     setRentalLoading(true);
@@ -535,7 +564,16 @@ export default function ValuationDetailPage() {
     }
   };
 
-  function getHistogram(data: number[], bins: number) {
+  function histogramFromBins(edges: number[], counts: number[]) {
+    const maxCount = Math.max(0, ...counts);
+    return counts.map((count, i) => ({
+      count,
+      range: [edges[i], edges[i + 1]],
+      height: maxCount > 0 ? Math.round((count / maxCount) * 100) : 0,
+    }));
+  }
+
+  function getHistogram(data: number[], bins: number): HistogramBin[] {
     if (!data || data.length === 0) return [];
     const min = Math.min(...data),
       max = Math.max(...data);
@@ -1205,7 +1243,7 @@ export default function ValuationDetailPage() {
                     className="w-full p-2 border rounded"
                   />
                   <Button
-                    onClick={runMonteCarlo}
+                    onClick={() => runMonteCarlo()}
                     className="w-full mt-8 px-4 py-3"
                     disabled={
                       mcRunning || !hasValidValuation(valuation as DCFRow)
@@ -1215,6 +1253,19 @@ export default function ValuationDetailPage() {
                       ? `Running... (${mcProgress}/${mcTotal})`
                       : "Run Simulation"}
                   </Button>
+                  <Button
+                    variant="secondary"
+                    onClick={rerollMonteCarlo}
+                    className="w-full mt-2 px-4 py-3"
+                    disabled={
+                      mcRunning || !hasValidValuation(valuation as DCFRow)
+                    }
+                  >
+                    New Sample
+                  </Button>
+                  <div className="text-xs text-gray-500 mt-1 text-center">
+                    Seed {mcSeed}: re-running shows the same sample
+                  </div>
                   {!hasValidValuation(valuation as DCFRow) && (
                     <div className="text-xs text-red-500 mt-2 text-center">
                       Please enter and save a valid valuation before running the
@@ -1442,7 +1493,7 @@ export default function ValuationDetailPage() {
                   )}
                 </div>
               )}
-              {mcResults && mcResults.length > 0 && (
+              {mcHistogram.length > 0 && (
                 <div className="mt-6">
                   <div className="flex justify-center">
                     <div
@@ -1472,7 +1523,7 @@ export default function ValuationDetailPage() {
                       </span>
                       {/* Y-axis ticks */}
                       {(() => {
-                        const hist = getHistogram(mcResults, 20);
+                        const hist = mcHistogram;
                         const maxCount =
                           hist.length > 0
                             ? Math.max(...hist.map((b) => b.count))
@@ -1495,7 +1546,7 @@ export default function ValuationDetailPage() {
                       })()}
                       {/* X-axis ticks */}
                       {(() => {
-                        const hist = getHistogram(mcResults, 20);
+                        const hist = mcHistogram;
                         const min = hist.length > 0 ? hist[0].range[0] : 0;
                         const max =
                           hist.length > 0 ? hist[hist.length - 1].range[1] : 0;
@@ -1517,9 +1568,8 @@ export default function ValuationDetailPage() {
                       })()}
                       {/* NPV=0 line (only if in range) */}
                       {(() => {
-                        const data = mcResults;
-                        const min = Math.min(...data),
-                          max = Math.max(...data);
+                        const min = mcHistogram[0].range[0],
+                          max = mcHistogram[mcHistogram.length - 1].range[1];
                         if (min < 0 && max > 0) {
                           const zeroPos = ((0 - min) / (max - min)) * 100;
                           return (
@@ -1554,7 +1604,7 @@ export default function ValuationDetailPage() {
                         }}
                       >
                         {(() => {
-                          const hist = getHistogram(mcResults, 20);
+                          const hist = mcHistogram;
                           if (hist.length > 0) {
                             return hist.map((bin, i) => (
                               <div
@@ -1,6 +1,6 @@
 import { api, APIError } from "@/lib/api";
 import { DCFRow } from "@/types/cashflow";
-import { CashFlowRow } from "@/types/cashflow";
+import { CashFlowRow, IRRBatchResult } from "@/types/cashflow";
 
 // Valuation API functions
 export const valuationsAPI = {
@@ -68,6 +68,26 @@ export const valuationsAPI = {
     }
   },
 
+  // Calculate IRR (and optionally NPV at discountRate, in percent) for many
+  // cash-flow series in one request; failures are reported per series.
+  calculateIRRBatch: async (
+    series: number[][],
+    discountRate?: number,
+  ): Promise<IRRBatchResult[]> => {
+    try {
+      const response = await api.post<{ results: IRRBatchResult[] }>(
+        "/api/cashflows/irr/batch",
+        { series, discount_rate: discountRate },
+      );
+      return response.results;
+    } catch (error) {
+      if (error instanceof APIError) {
+        throw error;
+      }
+      throw new APIError("Failed to calculate IRRs");
+    }
+  },
+
   // Get payback period for a valuation
   getPaybackPeriod: async (
     valuationId: string,
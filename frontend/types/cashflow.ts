@@ -38,3 +38,10 @@ export interface CashFlowRow {
   present_value: number;
   cumulative_pv: number;
 }
+
+export interface IRRBatchResult {
+  irr: number | null;
+  npv: number | null;
+  status: "converged" | "fallback" | "no_root" | "invalid";
+  error?: string;
+}